@@ -6,7 +6,9 @@ from app.services.conversation_service import conversation_service
 from app.services.transcription_service import transcription_service
 from app.services.knowledge_extraction_service import knowledge_extraction_service
 from app.services.knowledge_graph_service import knowledge_graph_service
+from app.services.job_queue import job_queue
 from app.utils.user_utils import ensure_user_profile
+from app.utils.uploads import spool_upload, UploadTooLarge
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 import os
@@ -18,6 +20,9 @@ router = APIRouter(prefix="/conversation", tags=["conversation"])
 TEMP_AUDIO_DIR = "temp_audio"
 os.makedirs(TEMP_AUDIO_DIR, exist_ok=True)
 
+# Audio upload size limit (convert MB to bytes)
+MAX_AUDIO_UPLOAD_SIZE = int(os.getenv("MAX_AUDIO_UPLOAD_SIZE_MB", "25")) * 1024 * 1024
+
 class ConversationStartRequest(BaseModel):
     user_id: str
 
@@ -79,10 +84,11 @@ async def transcribe_audio(request: Request, audio: UploadFile = File(...)):
     file_path = os.path.join(TEMP_AUDIO_DIR, f"{file_id}{file_ext}")
 
     try:
-        # Save uploaded file
-        with open(file_path, "wb") as f:
-            content = await audio.read()
-            f.write(content)
+        # Save uploaded file (copied to disk in chunks)
+        try:
+            await spool_upload(audio, file_path, MAX_AUDIO_UPLOAD_SIZE)
+        except UploadTooLarge as e:
+            raise HTTPException(status_code=413, detail=str(e))
 
         print(f"Audio file saved: {file_path}, size: {os.path.getsize(file_path)} bytes")
 
@@ -96,6 +102,8 @@ async def transcribe_audio(request: Request, audio: UploadFile = File(...)):
             "transcript": transcript
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Transcription error: {type(e).__name__}: {str(e)}")
         import traceback
@@ -107,6 +115,84 @@ async def transcribe_audio(request: Request, audio: UploadFile = File(...)):
         if os.path.exists(file_path):
             os.remove(file_path)
 
+async def end_conversation_extraction(
+    conversation_id: str,
+    user_id: str,
+    conversation_history: list,
+    progress=lambda stage, **data: None
+) -> dict:
+    """
+    Extract knowledge from a finished conversation and store it as unconfirmed
+
+    Shared by /end and its background job handler.
+    """
+    print(f"Ending conversation {conversation_id} for user {user_id}")
+    print(f"Extracting knowledge from {len(conversation_history)} messages")
+
+    # Extract knowledge from conversation
+    progress("extracting")
+    extraction_result = await knowledge_extraction_service.extract_from_conversation(
+        conversation_history=conversation_history,
+        user_id=user_id,
+        source_reference=conversation_id
+    )
+
+    if not extraction_result["success"]:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Knowledge extraction failed: {extraction_result.get('error', 'Unknown error')}"
+        )
+
+    entities = extraction_result["entities"]
+    relationships = extraction_result["relationships"]
+
+    # Store entities in database
+    progress("storing", entities=len(entities))
+    storage_result = await knowledge_graph_service.store_entities(
+        entities=entities,
+        user_id=user_id
+    )
+
+    if not storage_result["success"]:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Storage failed: {storage_result.get('error', 'Unknown error')}"
+        )
+
+    # Create relationships
+    entity_ids = storage_result["entity_ids"]
+    if relationships:
+        await knowledge_graph_service.create_relationships(
+            relationships=relationships,
+            entity_ids=entity_ids
+        )
+
+    print(f"Successfully extracted and stored {len(entities)} entities")
+
+    return {
+        "success": True,
+        "conversation_id": conversation_id,
+        "facts_extracted": len(entities),
+        "pending_confirmation": len(entities),
+        "duplicates_removed": extraction_result.get("duplicates_removed", 0),
+        "failed_chunks": extraction_result.get("failed_chunks", 0),
+        "entities": entities,
+        "entity_ids": entity_ids,
+        "message": "Conversation ended. Please review and confirm extracted facts."
+    }
+
+
+async def _end_conversation_job(payload: dict, progress) -> dict:
+    """Background job handler for /end/async"""
+    try:
+        return await end_conversation_extraction(progress=progress, **payload)
+    except HTTPException as e:
+        raise RuntimeError(e.detail)
+
+
+job_queue.register("conversation_end", _end_conversation_job)
+
+
 @router.post("/end")
 async def end_conversation(request: ConversationEndRequest):
     """
@@ -121,62 +207,46 @@ async def end_conversation(request: ConversationEndRequest):
     The frontend should then navigate user to knowledge confirmation screen.
     """
     try:
-        print(f"Ending conversation {request.conversation_id} for user {request.user_id}")
-        print(f"Extracting knowledge from {len(request.conversation_history)} messages")
-
-        # Extract knowledge from conversation
-        extraction_result = await knowledge_extraction_service.extract_from_conversation(
-            conversation_history=request.conversation_history,
+        return await end_conversation_extraction(
+            conversation_id=request.conversation_id,
             user_id=request.user_id,
-            source_reference=request.conversation_id
+            conversation_history=request.conversation_history
         )
 
-        if not extraction_result["success"]:
-            raise HTTPException(
-                status_code=500,
-                detail=f"Knowledge extraction failed: {extraction_result.get('error', 'Unknown error')}"
-            )
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Error ending conversation: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"Failed to end conversation: {str(e)}")
 
-        entities = extraction_result["entities"]
-        relationships = extraction_result["relationships"]
 
-        # Store entities in database
-        storage_result = await knowledge_graph_service.store_entities(
-            entities=entities,
+@router.post("/end/async")
+async def end_conversation_async(request: ConversationEndRequest):
+    """
+    End conversation and run knowledge extraction as a background task
+
+    Returns a task id immediately; the /end response body is available from
+    /tasks/{job_id}/result once the task succeeds.
+    """
+    try:
+        job = await job_queue.submit(
+            "conversation_end",
+            {
+                "conversation_id": request.conversation_id,
+                "user_id": request.user_id,
+                "conversation_history": request.conversation_history
+            },
             user_id=request.user_id
         )
 
-        if not storage_result["success"]:
-            raise HTTPException(
-                status_code=500,
-                detail=f"Storage failed: {storage_result.get('error', 'Unknown error')}"
-            )
-
-        # Create relationships
-        entity_ids = storage_result["entity_ids"]
-        if relationships:
-            await knowledge_graph_service.create_relationships(
-                relationships=relationships,
-                entity_ids=entity_ids
-            )
-
-        print(f"Successfully extracted and stored {len(entities)} entities")
-
         return {
             "success": True,
+            "job_id": job["id"],
             "conversation_id": request.conversation_id,
-            "facts_extracted": len(entities),
-            "pending_confirmation": len(entities),
-            "duplicates_removed": extraction_result.get("duplicates_removed", 0),
-            "entities": entities,
-            "entity_ids": entity_ids,
-            "message": "Conversation ended. Please review and confirm extracted facts."
+            "status": job["status"]
         }
 
-    except HTTPException:
-        raise
     except Exception as e:
-        print(f"Error ending conversation: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        raise HTTPException(status_code=500, detail=f"Failed to end conversation: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to queue conversation extraction: {str(e)}")
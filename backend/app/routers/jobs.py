@@ -3,16 +3,33 @@ Jobs Router
 API endpoints for job posting management and keyword analysis
 """
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+import asyncio
+import hashlib
+import json
+import os
+import numpy as np
 from ..services.job_matcher import JobMatcher
 from ..services.ats_optimizer import ATSOptimizer
 from ..services.web_scraper_service import WebScraperService
+from ..services.ats_detection_service import ats_detection_service
 from ..services.company_research_service import company_research_service
 from ..database import get_supabase
 
 router = APIRouter(prefix="/jobs", tags=["jobs"])
 
+# Bulk import limits
+BULK_ANALYZE_MAX_ITEMS = 100
+BULK_ANALYZE_CONCURRENCY = int(os.getenv("BULK_ANALYZE_CONCURRENCY", "5"))
+BULK_INSERT_BATCH_SIZE = 25
+
+# Match matrix limits
+MATCH_MATRIX_MAX_RESUMES = 100
+MATCH_MATRIX_MAX_JOBS = 100
+
 # Pydantic models
 class AddJobRequest(BaseModel):
     job_description: str
@@ -23,6 +40,15 @@ class AnalyzeMatchRequest(BaseModel):
     job_id: str
     resume_id: str
 
+class MatchMatrixRequest(BaseModel):
+    resume_ids: Optional[List[str]] = None  # default: all of the user's resumes
+    job_ids: Optional[List[str]] = None  # default: all of the user's job postings
+    top_n: int = 3
+
+class BulkAnalyzeRequest(BaseModel):
+    urls: List[str] = []
+    texts: List[str] = []
+
 class CreateJobRequest(BaseModel):
     title: str
     company: Optional[str] = None
@@ -194,6 +220,105 @@ async def analyze_job_match(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/match-matrix")
+async def match_matrix(
+    request: MatchMatrixRequest,
+    user_id: str
+):
+    """
+    Score every resume version against every saved job posting
+
+    Loads all resumes and job postings in two queries and scores the whole
+    grid at once (same score as /jobs/analyze-match). Returns the
+    resume x job score matrix plus, for each job, the best resumes to send
+    and, for each resume, the jobs it fits best.
+    """
+    try:
+        resume_query = supabase.table("resume_versions")\
+            .select("id, version_number, job_posting_id, content")\
+            .eq("user_id", user_id)
+        if request.resume_ids:
+            resume_query = resume_query.in_("id", request.resume_ids)
+        resumes = resume_query\
+            .order("created_at", desc=True)\
+            .limit(MATCH_MATRIX_MAX_RESUMES)\
+            .execute().data
+
+        job_query = supabase.table("job_postings")\
+            .select("id, job_title, company_name, extracted_keywords, required_skills, preferred_skills")\
+            .eq("user_id", user_id)
+        if request.job_ids:
+            job_query = job_query.in_("id", request.job_ids)
+        jobs = job_query\
+            .order("created_at", desc=True)\
+            .limit(MATCH_MATRIX_MAX_JOBS)\
+            .execute().data
+
+        if not resumes or not jobs:
+            return {"resumes": [], "jobs": [], "scores": [], "best_resumes_by_job": [], "best_jobs_by_resume": []}
+
+        scores = job_matcher.score_matrix(
+            resume_texts=[_resume_to_text(resume['content'] or {}) for resume in resumes],
+            job_keyword_sets=[
+                {
+                    "all": job.get('extracted_keywords') or [],
+                    "required": job.get('required_skills') or [],
+                    "preferred": job.get('preferred_skills') or []
+                }
+                for job in jobs
+            ]
+        )
+        match_scores = np.round(scores["match_score"], 1)
+        top_n = max(1, request.top_n)
+
+        # Rank along each axis (stable, so ties keep newest-first order)
+        resume_order = np.argsort(-match_scores, axis=0, kind="stable")[:top_n]
+        job_order = np.argsort(-match_scores, axis=1, kind="stable")[:, :top_n]
+
+        def ranked_entry(r: int, j: int, id_key: str, row_id: str) -> Dict[str, Any]:
+            score = float(match_scores[r, j])
+            return {
+                id_key: row_id,
+                "match_score": score,
+                "match_level": job_matcher._get_match_level(score),
+                "required_match": round(float(scores["required_match"][r, j]), 1)
+            }
+
+        best_resumes_by_job = [
+            {
+                "job_id": job['id'],
+                "resumes": [ranked_entry(r, j, "resume_id", resumes[r]['id']) for r in resume_order[:, j]]
+            }
+            for j, job in enumerate(jobs)
+        ]
+
+        best_jobs_by_resume = [
+            {
+                "resume_id": resume['id'],
+                "jobs": [ranked_entry(r, j, "job_id", jobs[j]['id']) for j in job_order[r]]
+            }
+            for r, resume in enumerate(resumes)
+        ]
+
+        return {
+            "resumes": [
+                {"id": resume['id'], "version": resume['version_number'], "job_posting_id": resume['job_posting_id']}
+                for resume in resumes
+            ],
+            "jobs": [
+                {"id": job['id'], "job_title": job['job_title'], "company": job['company_name']}
+                for job in jobs
+            ],
+            # scores[i][k] = resumes[i] against jobs[k]
+            "scores": match_scores.tolist(),
+            "best_resumes_by_job": best_resumes_by_job,
+            "best_jobs_by_resume": best_jobs_by_resume
+        }
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @router.get("/{job_id}/keywords")
 async def get_job_keywords(job_id: str, user_id: str):
     """Get extracted keywords from job posting"""
@@ -272,6 +397,10 @@ async def analyze_job_posting(
             company_name=company_name
         )
 
+        # Fall back to the location found by the analysis
+        if not location:
+            location = job_data.get('location')
+
         # Merge scraped keywords if available
         if scraped_data and scraped_data.get('keywords'):
             # Combine and deduplicate keywords
@@ -282,10 +411,9 @@ async def analyze_job_posting(
         # Merge scraped requirements if available
         if scraped_data and scraped_data.get('requirements'):
             scraped_reqs = scraped_data['requirements']
-            if scraped_reqs.get('required'):
-                job_data['requirements']['required'].extend(scraped_reqs['required'])
-            if scraped_reqs.get('preferred'):
-                job_data['requirements']['preferred'].extend(scraped_reqs['preferred'])
+            for level in ('required', 'preferred'):
+                existing = job_data['requirements'][level]
+                existing.extend(r for r in scraped_reqs.get(level, []) if r not in existing)
             print("Merged scraped requirements")
 
         # Detect ATS system if URL provided
@@ -380,6 +508,112 @@ async def analyze_job_posting(
         raise HTTPException(status_code=500, detail=f"Job analysis failed: {str(e)}")
 
 
+@router.post("/bulk-analyze")
+async def bulk_analyze_job_postings(
+    request: BulkAnalyzeRequest,
+    user_id: str
+):
+    """
+    Analyze many job postings at once
+
+    Accepts a list of URLs and/or pasted job descriptions. Duplicates are
+    dropped, postings are scraped and analyzed a few at a time, and results
+    are streamed back as Server-Sent Events:
+
+    - item:  one per posting as soon as it is analyzed (or fails)
+    - saved: job ids for a batch of postings written to job_postings
+    - done:  totals once everything has finished
+
+    Company research is skipped; run /jobs/analyze on a single posting for that.
+    """
+    items, duplicates = _dedupe_bulk_items(request.urls, request.texts)
+
+    if not items:
+        raise HTTPException(status_code=400, detail="Provide at least one job URL or description")
+    if len(items) > BULK_ANALYZE_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many job postings ({len(items)}), the limit is {BULK_ANALYZE_MAX_ITEMS}"
+        )
+
+    async def event_stream():
+        def sse(event: str, data: Dict[str, Any]) -> str:
+            return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+        try:
+            ats_rows = supabase.table("ats_systems").select("*").execute().data or []
+        except Exception as e:
+            print(f"Could not load ATS systems for bulk import: {str(e)}")
+            ats_rows = []
+
+        semaphore = asyncio.Semaphore(BULK_ANALYZE_CONCURRENCY)
+
+        async def run(index: int, item: Dict[str, Any]):
+            async with semaphore:
+                try:
+                    return index, await _analyze_bulk_item(item, user_id, ats_rows)
+                except Exception as e:
+                    return index, {"success": False, "error": str(e)}
+
+        tasks = [asyncio.create_task(run(index, item)) for index, item in enumerate(items)]
+        pending_rows: List[Tuple[int, Dict[str, Any]]] = []
+        analyzed = failed = saved = 0
+
+        try:
+            yield sse("status", {
+                "total": len(items),
+                "duplicates_skipped": duplicates,
+                "concurrency": BULK_ANALYZE_CONCURRENCY
+            })
+
+            for next_done in asyncio.as_completed(tasks):
+                index, outcome = await next_done
+                item = items[index]
+
+                if outcome["success"]:
+                    analyzed += 1
+                    pending_rows.append((index, outcome.pop("record")))
+                else:
+                    failed += 1
+
+                yield sse("item", {
+                    "index": index,
+                    "source": item["source"],
+                    "url": item.get("url"),
+                    **outcome
+                })
+
+                if len(pending_rows) >= BULK_INSERT_BATCH_SIZE:
+                    batch, pending_rows = pending_rows, []
+                    saved_event = await _insert_job_batch(batch)
+                    saved += len(saved_event["jobs"])
+                    yield sse("saved", saved_event)
+
+            if pending_rows:
+                saved_event = await _insert_job_batch(pending_rows)
+                saved += len(saved_event["jobs"])
+                yield sse("saved", saved_event)
+
+            yield sse("done", {
+                "total": len(items),
+                "analyzed": analyzed,
+                "failed": failed,
+                "saved": saved,
+                "duplicates_skipped": duplicates
+            })
+
+        finally:
+            # Client went away: stop scraping/analyzing what's left
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.post("/create")
 async def create_job_posting(
     request: CreateJobRequest,
@@ -495,3 +729,151 @@ def _resume_to_text(resume_structure: Dict[str, Any]) -> str:
         text_parts.append(cert.get('name', ''))
 
     return ' '.join(text_parts)
+
+
+
+def _normalize_job_url(url: str) -> str:
+    """Canonical form of a job URL for de-duplication (drops fragments and tracking params)"""
+    parts = urlsplit(url.strip())
+    query = [
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in ("ref", "source", "gh_src")
+    ]
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, urlencode(query), ""))
+
+
+def _dedupe_bulk_items(urls: List[str], texts: List[str]) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Build the bulk work list, dropping blank and duplicate entries
+
+    Returns:
+        (items, number of duplicates skipped)
+    """
+    items = []
+    seen = set()
+    duplicates = 0
+
+    for url in urls:
+        if not url or not url.strip():
+            continue
+        key = "url:" + _normalize_job_url(url)
+        if key in seen:
+            duplicates += 1
+            continue
+        seen.add(key)
+        items.append({"source": "url", "url": url.strip()})
+
+    for text in texts:
+        if not text or not text.strip():
+            continue
+        normalized = " ".join(text.lower().split())
+        key = "text:" + hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+        if key in seen:
+            duplicates += 1
+            continue
+        seen.add(key)
+        items.append({"source": "text", "text": text})
+
+    return items, duplicates
+
+
+def _match_ats_system_id(ats_system: Optional[str], ats_rows: List[Dict[str, Any]]) -> Optional[str]:
+    """Map a detected ATS key (e.g. "workday") to an ats_systems row id"""
+    if not ats_system:
+        return None
+
+    for row in ats_rows:
+        name = (row.get('name') or row.get('system_name') or "").lower()
+        if ats_system.lower() in name:
+            return row['id']
+    return None
+
+
+async def _analyze_bulk_item(
+    item: Dict[str, Any],
+    user_id: str,
+    ats_rows: List[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """Scrape (for URLs), analyze and detect the ATS for one bulk entry"""
+    job_url = item.get("url")
+    job_description = item.get("text")
+    company_name = None
+    location = None
+    html = None
+
+    if job_url:
+        scraped_data = await web_scraper.scrape_job_posting(job_url)
+        if not scraped_data.get('success'):
+            return {"success": False, "error": scraped_data.get('error') or "Scraping failed"}
+
+        job_description = scraped_data['text']
+        company_name = scraped_data.get('company')
+        location = scraped_data.get('location')
+        html = scraped_data.get('html')
+
+    # Scraping already ran the same analysis prompt, so this is a cache hit
+    job_data = await job_matcher.parse_job_description(
+        job_description=job_description,
+        job_url=job_url,
+        company_name=company_name
+    )
+
+    ats = ats_detection_service.detect_ats(job_url=job_url, html_content=html)
+    ats_system = ats["ats_system"] or job_data.get('ats_system')
+
+    company_name = company_name or job_data.get('company')
+    location = location or job_data.get('location')
+
+    record = {
+        "user_id": user_id,
+        "job_title": job_data.get('job_title'),
+        "company_name": company_name,
+        "job_url": job_url,
+        "job_description": job_description,
+        "extracted_keywords": job_data['keywords']['all'],
+        "required_skills": job_data['keywords'].get('required', []),
+        "preferred_skills": job_data['keywords'].get('preferred', []),
+        "ats_system_id": _match_ats_system_id(ats_system, ats_rows)
+    }
+
+    return {
+        "success": True,
+        "record": record,
+        "job_data": {
+            "title": job_data.get('job_title'),
+            "company": company_name,
+            "location": location,
+            "url": job_url,
+            "ats_system": ats.get("system_name") if ats["ats_system"] else ats_system,
+            "ats_confidence": ats["confidence"],
+            "keywords": job_data['keywords']['all'][:15],
+            "requirements": (
+                job_data['requirements'].get('required', []) +
+                job_data['requirements'].get('preferred', [])
+            )[:10]
+        }
+    }
+
+
+async def _insert_job_batch(batch: List[Tuple[int, Dict[str, Any]]]) -> Dict[str, Any]:
+    """Insert a batch of job_postings rows in one request, mapping ids back to item indexes"""
+    indexes = [index for index, _ in batch]
+    records = [record for _, record in batch]
+
+    try:
+        result = await asyncio.to_thread(
+            lambda: supabase.table("job_postings").insert(records).execute()
+        )
+        # PostgREST returns inserted rows in request order
+        return {
+            "jobs": [
+                {"index": index, "job_id": row['id']}
+                for index, row in zip(indexes, result.data)
+            ],
+            "failed_indexes": [],
+            "error": None
+        }
+    except Exception as e:
+        print(f"Bulk job insert failed: {str(e)}")
+        return {"jobs": [], "failed_indexes": indexes, "error": str(e)}
@@ -8,6 +8,7 @@ from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
 from app.services.knowledge_extraction_service import knowledge_extraction_service
 from app.services.knowledge_graph_service import knowledge_graph_service
+from app.services.job_queue import job_queue
 from app.database import get_supabase
 
 router = APIRouter(prefix="/knowledge", tags=["knowledge"])
@@ -100,6 +101,7 @@ async def extract_from_conversation(request: ExtractConversationRequest):
             "relationships": relationships,
             "total_extracted": len(entities),
             "duplicates_removed": extraction_result.get("duplicates_removed", 0),
+            "failed_chunks": extraction_result.get("failed_chunks", 0),
             "entity_ids": entity_ids
         }
 
@@ -110,6 +112,81 @@ async def extract_from_conversation(request: ExtractConversationRequest):
         raise HTTPException(status_code=500, detail=f"Extraction failed: {str(e)}")
 
 
+async def extract_resume_knowledge(
+    user_id: str,
+    resume_text: str,
+    source_reference: Optional[str] = None,
+    progress=lambda stage, **data: None
+) -> dict:
+    """
+    Extract knowledge entities from resume text and store them as unconfirmed
+
+    Shared by /extract-resume and its background job handler.
+    """
+    print(f"Extracting knowledge from resume for user {user_id}")
+
+    # Extract entities using AI
+    progress("extracting")
+    extraction_result = await knowledge_extraction_service.extract_from_resume(
+        resume_text=resume_text,
+        user_id=user_id,
+        source_reference=source_reference
+    )
+
+    if not extraction_result["success"]:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Extraction failed: {extraction_result.get('error', 'Unknown error')}"
+        )
+
+    entities = extraction_result["entities"]
+    relationships = extraction_result["relationships"]
+
+    # Store entities in database
+    progress("storing", entities=len(entities))
+    storage_result = await knowledge_graph_service.store_entities(
+        entities=entities,
+        user_id=user_id
+    )
+
+    if not storage_result["success"]:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Storage failed: {storage_result.get('error', 'Unknown error')}"
+        )
+
+    # Create relationships
+    entity_ids = storage_result["entity_ids"]
+    if relationships:
+        await knowledge_graph_service.create_relationships(
+            relationships=relationships,
+            entity_ids=entity_ids
+        )
+
+    print(f"Successfully extracted {len(entities)} entities from resume")
+
+    return {
+        "success": True,
+        "entities": entities,
+        "relationships": relationships,
+        "total_extracted": len(entities),
+        "duplicates_removed": extraction_result.get("duplicates_removed", 0),
+        "failed_chunks": extraction_result.get("failed_chunks", 0),
+        "entity_ids": entity_ids
+    }
+
+
+async def _extract_resume_job(payload: dict, progress) -> dict:
+    """Background job handler for /extract-resume/async"""
+    try:
+        return await extract_resume_knowledge(progress=progress, **payload)
+    except HTTPException as e:
+        raise RuntimeError(e.detail)
+
+
+job_queue.register("knowledge_extract_resume", _extract_resume_job)
+
+
 @router.post("/extract-resume")
 async def extract_from_resume(request: ExtractResumeRequest):
     """
@@ -122,60 +199,42 @@ async def extract_from_resume(request: ExtractResumeRequest):
     4. Returns extracted entities for user review
     """
     try:
-        print(f"Extracting knowledge from resume for user {request.user_id}")
-
-        # Extract entities using AI
-        extraction_result = await knowledge_extraction_service.extract_from_resume(
-            resume_text=request.resume_text,
+        return await extract_resume_knowledge(
             user_id=request.user_id,
+            resume_text=request.resume_text,
             source_reference=request.source_reference
         )
 
-        if not extraction_result["success"]:
-            raise HTTPException(
-                status_code=500,
-                detail=f"Extraction failed: {extraction_result.get('error', 'Unknown error')}"
-            )
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Resume extraction error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Extraction failed: {str(e)}")
 
-        entities = extraction_result["entities"]
-        relationships = extraction_result["relationships"]
 
-        # Store entities in database
-        storage_result = await knowledge_graph_service.store_entities(
-            entities=entities,
+@router.post("/extract-resume/async")
+async def extract_from_resume_async(request: ExtractResumeRequest):
+    """
+    Queue resume knowledge extraction as a background task
+
+    Returns a task id immediately; the /extract-resume response body is
+    available from /tasks/{job_id}/result once the task succeeds.
+    """
+    try:
+        job = await job_queue.submit(
+            "knowledge_extract_resume",
+            {
+                "user_id": request.user_id,
+                "resume_text": request.resume_text,
+                "source_reference": request.source_reference
+            },
             user_id=request.user_id
         )
 
-        if not storage_result["success"]:
-            raise HTTPException(
-                status_code=500,
-                detail=f"Storage failed: {storage_result.get('error', 'Unknown error')}"
-            )
+        return {"success": True, "job_id": job["id"], "status": job["status"]}
 
-        # Create relationships
-        entity_ids = storage_result["entity_ids"]
-        if relationships:
-            await knowledge_graph_service.create_relationships(
-                relationships=relationships,
-                entity_ids=entity_ids
-            )
-
-        print(f"Successfully extracted {len(entities)} entities from resume")
-
-        return {
-            "success": True,
-            "entities": entities,
-            "relationships": relationships,
-            "total_extracted": len(entities),
-            "duplicates_removed": extraction_result.get("duplicates_removed", 0),
-            "entity_ids": entity_ids
-        }
-
-    except HTTPException:
-        raise
     except Exception as e:
-        print(f"Resume extraction error: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Extraction failed: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to queue extraction: {str(e)}")
 
 
 @router.get("/pending/{user_id}")
@@ -2,17 +2,21 @@
 Resumes Router
 API endpoints for resume generation, editing, and management
 """
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
 from ..services.resume_generator import ResumeGenerator
 from ..services.fact_checker import FactChecker
 from ..services.ats_optimizer import ATSOptimizer
-from ..services.pdf_exporter import PDFExporter
+from ..services.pdf_exporter import pdf_exporter
 from ..services.docx_exporter import DOCXExporter
+from ..services.job_queue import job_queue
+from ..services.fact_index import fact_index
+from ..services.knowledge_snapshot import knowledge_snapshot
 from ..database import get_supabase
 from datetime import datetime
+import json
 
 router = APIRouter(prefix="/resumes", tags=["resumes"])
 
@@ -35,11 +39,115 @@ class ResolveFlagRequest(BaseModel):
 resume_gen = ResumeGenerator()
 fact_checker = FactChecker()
 ats_optimizer = ATSOptimizer()
-pdf_exporter = PDFExporter()
 docx_exporter = DOCXExporter()
 supabase = get_supabase()
 
 
+async def generate_resume_for_user(
+    user_id: str,
+    job_description: Optional[str] = None,
+    target_role: Optional[str] = None,
+    job_posting_id: Optional[str] = None,
+    progress=lambda stage, **data: None
+) -> Dict[str, Any]:
+    """
+    Generate, optimize, store and fact-check a resume
+
+    Shared by /generate and its background job handler.
+    """
+    job_description, target_role = _resolve_job_target(job_posting_id, job_description, target_role)
+
+    # Generate resume structure
+    progress("generating")
+    resume_structure = await resume_gen.generate_resume(
+        user_id=user_id,
+        job_description=job_description,
+        target_role=target_role
+    )
+
+    return await _save_and_verify_resume(user_id, job_posting_id, resume_structure, progress)
+
+
+def _resolve_job_target(
+    job_posting_id: Optional[str],
+    job_description: Optional[str],
+    target_role: Optional[str]
+) -> tuple:
+    """If a job posting ID is provided, use its description and title"""
+    if job_posting_id:
+        job_result = supabase.table("job_postings")\
+            .select("*")\
+            .eq("id", job_posting_id)\
+            .single()\
+            .execute()
+
+        job_data = job_result.data
+        job_description = job_data['job_description']
+        target_role = job_data['job_title']
+
+    return job_description, target_role
+
+
+async def _save_and_verify_resume(
+    user_id: str,
+    job_posting_id: Optional[str],
+    resume_structure: Dict[str, Any],
+    progress=lambda stage, **data: None
+) -> Dict[str, Any]:
+    """ATS-optimize, store and fact-check a generated resume structure"""
+    # Apply ATS optimization
+    optimized_resume = ats_optimizer.optimize_resume(resume_structure)
+
+    # Generate HTML version
+    html_resume = await resume_gen.generate_html_resume(optimized_resume)
+
+    # Create resume version in database
+    resume_record = {
+        "user_id": user_id,
+        "job_posting_id": job_posting_id,
+        "content": optimized_resume,
+        "html_content": html_resume,
+        "status": "draft",
+        "version_number": await _get_next_version_number(user_id)
+    }
+
+    result = supabase.table("resume_versions").insert(resume_record).execute()
+    resume_version_id = result.data[0]['id']
+
+    # Run fact verification
+    progress("verifying", resume_version_id=resume_version_id)
+    verification_result = await fact_checker.verify_resume(
+        user_id=user_id,
+        resume_structure=optimized_resume,
+        resume_version_id=resume_version_id
+    )
+
+    # Update resume status based on verification
+    new_status = "fact_check_complete" if not verification_result['requires_review'] else "fact_check_pending"
+
+    supabase.table("resume_versions")\
+        .update({"status": new_status})\
+        .eq("id", resume_version_id)\
+        .execute()
+
+    return {
+        "success": True,
+        "resume_version_id": resume_version_id,
+        "resume": optimized_resume,
+        "html": html_resume,
+        "verification": verification_result,
+        "ats_score": optimized_resume['optimization_report']['ats_score']
+    }
+
+
+async def _generate_resume_job(payload: dict, progress) -> Dict[str, Any]:
+    """Background job handler for /generate/async"""
+    return await generate_resume_for_user(progress=progress, **payload)
+
+
+job_queue.register("resume_generate", _generate_resume_job)
+
+
 @router.post("/generate")
 async def generate_resume(
     request: GenerateResumeRequest,
@@ -52,74 +160,101 @@ async def generate_resume(
     Otherwise uses provided job_description or generates generic resume
     """
     try:
-        job_description = request.job_description
-        target_role = request.target_role
-
-        # If job posting ID provided, fetch from database
-        if request.job_posting_id:
-            job_result = supabase.table("job_postings")\
-                .select("*")\
-                .eq("id", request.job_posting_id)\
-                .single()\
-                .execute()
-
-            job_data = job_result.data
-            job_description = job_data['job_description']
-            target_role = job_data['job_title']
-
-        # Generate resume structure
-        resume_structure = await resume_gen.generate_resume(
+        return await generate_resume_for_user(
             user_id=user_id,
-            job_description=job_description,
-            target_role=target_role
+            job_description=request.job_description,
+            target_role=request.target_role,
+            job_posting_id=request.job_posting_id
         )
 
-        # Apply ATS optimization
-        optimized_resume = ats_optimizer.optimize_resume(resume_structure)
-
-        # Generate HTML version
-        html_resume = await resume_gen.generate_html_resume(optimized_resume)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
-        # Create resume version in database
-        resume_record = {
-            "user_id": user_id,
-            "job_posting_id": request.job_posting_id,
-            "content": optimized_resume,
-            "html_content": html_resume,
-            "status": "draft",
-            "version_number": await _get_next_version_number(user_id)
-        }
 
-        result = supabase.table("resume_versions").insert(resume_record).execute()
-        resume_version_id = result.data[0]['id']
+@router.post("/generate/async")
+async def generate_resume_async(
+    request: GenerateResumeRequest,
+    user_id: str
+):
+    """
+    Queue resume generation as a background task
 
-        # Run fact verification
-        verification_result = await fact_checker.verify_resume(
-            user_id=user_id,
-            resume_structure=optimized_resume,
-            resume_version_id=resume_version_id
+    Returns a task id immediately; the /generate response body is available
+    from /tasks/{job_id}/result once the task succeeds.
+    """
+    try:
+        job = await job_queue.submit(
+            "resume_generate",
+            {
+                "user_id": user_id,
+                "job_description": request.job_description,
+                "target_role": request.target_role,
+                "job_posting_id": request.job_posting_id
+            },
+            user_id=user_id
         )
 
-        # Update resume status based on verification
-        new_status = "fact_check_complete" if not verification_result['requires_review'] else "fact_check_pending"
+        return {"success": True, "job_id": job["id"], "status": job["status"]}
 
-        supabase.table("resume_versions")\
-            .update({"status": new_status})\
-            .eq("id", resume_version_id)\
-            .execute()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
-        return {
-            "success": True,
-            "resume_version_id": resume_version_id,
-            "resume": optimized_resume,
-            "html": html_resume,
-            "verification": verification_result,
-            "ats_score": optimized_resume['optimization_report']['ats_score']
-        }
 
+@router.post("/generate/stream")
+async def generate_resume_stream(
+    request: GenerateResumeRequest,
+    user_id: str
+):
+    """
+    Generate a resume and stream sections as Server-Sent Events
+
+    Events, in order:
+    - status: {"stage": "preparing" | "generating" | "saving"}
+    - delta: {"section", "index", "text"} streamed tokens of a section
+    - section: {"section", "index", "content"} a finished section
+      (summary, skills, or one experience entry; index = position number)
+    - done: the same body /generate returns (after saving and fact-checking)
+    - error: {"detail"} if generation fails
+    """
+    # Resolve the job posting before streaming so a bad ID is a normal HTTP error
+    try:
+        job_description, target_role = _resolve_job_target(
+            request.job_posting_id, request.job_description, request.target_role
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+    def sse(event: str, data: Dict[str, Any]) -> str:
+        return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+    async def event_stream():
+        try:
+            resume_structure = None
+            async for event in resume_gen.generate_resume_stream(
+                user_id=user_id,
+                job_description=job_description,
+                target_role=target_role
+            ):
+                name = event.pop("event")
+                if name == "resume":
+                    resume_structure = event["resume"]
+                else:
+                    yield sse(name, event)
+
+            yield sse("status", {"stage": "saving"})
+            result = await _save_and_verify_resume(user_id, request.job_posting_id, resume_structure)
+            yield sse("done", result)
+
+        except Exception as e:
+            print(f"Streaming generation error: {str(e)}")
+            yield sse("error", {"detail": str(e)})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 
 @router.post("/generate-generic")
 async def generate_generic_resume(
@@ -142,14 +277,9 @@ async def generate_generic_resume(
     try:
         print(f"Generating generic resume for prompt: {request.prompt}")
 
-        # 1. Fetch all confirmed knowledge entities for user
-        result = supabase.table("knowledge_entities")\
-            .select("*")\
-            .eq("user_id", user_id)\
-            .eq("is_confirmed", True)\
-            .execute()
-
-        confirmed_entities = result.data
+        # 1. Fetch all confirmed knowledge entities for user (shared snapshot)
+        snapshot = await knowledge_snapshot.get(user_id)
+        confirmed_entities = snapshot.entities
         print(f"Found {len(confirmed_entities)} confirmed knowledge entities")
 
         if not confirmed_entities:
@@ -158,10 +288,12 @@ async def generate_generic_resume(
                 detail="No confirmed knowledge entities found. Please confirm some facts first."
             )
 
-        # 2. Use Claude to select relevant entities based on prompt
+        # 2. Shortlist with the local fact index, then let Claude pick from it
+        candidates = fact_index.shortlist(user_id, request.prompt, confirmed_entities)
+
         entities_text = "\n\n".join([
             f"ID: {i}\nType: {e['entity_type']}\nTitle: {e['title']}\nDescription: {e['description']}"
-            for i, e in enumerate(confirmed_entities)
+            for i, e in enumerate(candidates)
         ])
 
         selection_prompt = f"""You are helping generate a resume. The user wants to emphasize: "{request.prompt}"
@@ -182,15 +314,11 @@ Focus on:
 
 Return ONLY the JSON, nothing else."""
 
-        message = resume_gen.claude.messages.create(
-            model="claude-3-5-sonnet-20241022",
-            max_tokens=500,
-            messages=[{"role": "user", "content": selection_prompt}]
-        )
+        selection_text = await resume_gen.llm.complete(selection_prompt, max_tokens=500)
 
         # Parse selection response
         import json
-        selection_text = message.content[0].text.strip()
+        selection_text = selection_text.strip()
         # Extract JSON if wrapped in markdown
         if '```' in selection_text:
             selection_text = selection_text.split('```')[1].replace('json', '').strip()
@@ -200,29 +328,11 @@ Return ONLY the JSON, nothing else."""
         print(f"Selected {len(selected_ids)} relevant entities")
 
         # 3. Build filtered knowledge base
-        selected_entities = [confirmed_entities[i] for i in selected_ids if i < len(confirmed_entities)]
-
-        # Convert to knowledge base format expected by resume generator
-        knowledge_base = []
-        for entity in selected_entities:
-            kb_entry = {
-                'id': entity['id'],
-                'user_id': entity['user_id'],
-                'title': entity['title'],
-                'content': entity.get('structured_data', {}) or {'description': entity['description']},
-                'knowledge_type': _map_entity_type_to_knowledge_type(entity['entity_type']),  # FIXED: removed 'self.'
-                'tags': [],
-                'date_range': None,
-                'created_at': entity['created_at']
-            }
-
-            # Set date range if available
-            if entity.get('start_date') or entity.get('end_date'):
-                start = entity.get('start_date', '1900-01-01')
-                end = entity.get('end_date', '9999-12-31')
-                kb_entry['date_range'] = f"[{start},{end})"
+        selected_entities = [candidates[i] for i in selected_ids if i < len(candidates)]
 
-            knowledge_base.append(kb_entry)
+        # Knowledge base format expected by resume generator (normalized once per snapshot)
+        entries_by_id = {entry['id']: entry for entry in snapshot.knowledge_base}
+        knowledge_base = [entries_by_id[entity['id']] for entity in selected_entities]
 
         print(f"Converted to {len(knowledge_base)} knowledge base entries")
 
@@ -313,59 +423,75 @@ Return ONLY the JSON, nothing else."""
         raise HTTPException(status_code=500, detail=f"Resume generation failed: {str(e)}")
 
 
-def _map_entity_type_to_knowledge_type(entity_type: str) -> str:
-    """Map knowledge_entities.entity_type to user_knowledge_base.knowledge_type"""
-    mapping = {
-        'work_experience': 'experience',
-        'job_experience': 'experience',
-        'education': 'education',
-        'skill': 'skill',
-        'achievement': 'accomplishment',
-        'accomplishment': 'accomplishment',
-        'certification': 'certification',
-        'project': 'project',
-        'metric': 'metric',
-        'story': 'story'
-    }
-    return mapping.get(entity_type.lower(), 'experience')
+@router.get("/list")
+async def list_resumes(
+    user_id: str,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None
+):
+    """
+    Get resume versions for user, newest first
 
+    Only summary columns are selected (ats_score is projected out of the
+    content JSON) and linked job postings are fetched in one IN query.
 
-@router.get("/list")
-async def list_resumes(user_id: str):
-    """Get all resume versions for user"""
+    Args:
+        limit: Page size
+        cursor: "created_at|id" of the last resume on the previous page (next_cursor)
+    """
     try:
-        result = supabase.table("resume_versions")\
-            .select("id, created_at, status, version_number, job_posting_id, content")\
-            .eq("user_id", user_id)\
+        query = supabase.table("resume_versions")\
+            .select("id, created_at, status, version_number, job_posting_id, ats_score:content->optimization_report->ats_score")\
+            .eq("user_id", user_id)
+
+        if cursor:
+            # Keyset on (created_at, id) so rows sharing the boundary timestamp aren't skipped
+            created_at, _, last_id = cursor.partition("|")
+            if not last_id:
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            query = query.or_(
+                f'created_at.lt."{created_at}",'
+                f'and(created_at.eq."{created_at}",id.lt."{last_id}")'
+            )
+
+        # Fetch one extra row to know whether another page exists
+        result = query\
             .order("created_at", desc=True)\
+            .order("id", desc=True)\
+            .limit(limit + 1)\
             .execute()
 
+        rows = result.data[:limit]
+        next_cursor = f"{rows[-1]['created_at']}|{rows[-1]['id']}" if len(result.data) > limit else None
+
+        # Batch-load linked job postings
+        job_ids = list({r['job_posting_id'] for r in rows if r['job_posting_id']})
+        jobs_by_id = {}
+        if job_ids:
+            job_result = supabase.table("job_postings")\
+                .select("id, job_title, company_name")\
+                .in_("id", job_ids)\
+                .execute()
+            jobs_by_id = {job['id']: job for job in job_result.data}
+
         resumes = []
-        for resume in result.data:
-            # Get job info if linked
-            job_title = None
-            company = None
-            if resume['job_posting_id']:
-                job_result = supabase.table("job_postings")\
-                    .select("job_title, company_name")\
-                    .eq("id", resume['job_posting_id'])\
-                    .single()\
-                    .execute()
-                job_title = job_result.data['job_title']
-                company = job_result.data['company_name']
+        for resume in rows:
+            job = jobs_by_id.get(resume['job_posting_id'], {})
 
             resumes.append({
                 "id": resume['id'],
                 "version": resume['version_number'],
                 "status": resume['status'],
                 "created_at": resume['created_at'],
-                "job_title": job_title,
-                "company": company,
-                "ats_score": resume['content'].get('optimization_report', {}).get('ats_score', 0)
+                "job_title": job.get('job_title'),
+                "company": job.get('company_name'),
+                "ats_score": resume.get('ats_score') or 0
             })
 
-        return {"resumes": resumes}
+        return {"resumes": resumes, "next_cursor": next_cursor}
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -431,8 +557,14 @@ async def update_resume(
 
 
 @router.post("/{resume_id}/verify")
-async def reverify_resume(resume_id: str, user_id: str):
-    """Re-run fact verification on resume"""
+async def reverify_resume(resume_id: str, user_id: str, full: bool = False):
+    """
+    Re-run fact verification on resume
+
+    By default only bullets/sections whose text or supporting knowledge
+    changed since the last run are re-checked; pass full=true to re-check
+    everything.
+    """
     try:
         # Get resume
         result = supabase.table("resume_versions")\
@@ -448,7 +580,8 @@ async def reverify_resume(resume_id: str, user_id: str):
         verification_result = await fact_checker.verify_resume(
             user_id=user_id,
             resume_structure=resume_structure,
-            resume_version_id=resume_id
+            resume_version_id=resume_id,
+            incremental=not full
         )
 
         # Update status
@@ -590,8 +723,8 @@ async def export_pdf(resume_id: str, user_id: str):
 
         html_content = result.data['html_content']
 
-        # Convert to PDF
-        pdf_stream = pdf_exporter.get_pdf_stream(html_content)
+        # Convert to PDF (rendered in the worker pool, cached by content hash)
+        pdf_stream = await pdf_exporter.get_pdf_stream_async(html_content)
 
         # Get contact name for filename
         contact_info = result.data['content'].get('contact_info', {})
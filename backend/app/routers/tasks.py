@@ -0,0 +1,82 @@
+"""
+Tasks Router
+Status, result, cancel and progress streaming for background jobs
+"""
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from typing import Any, Dict, Optional
+import json
+from ..services.job_queue import job_queue, public_job_view, SUCCEEDED, TERMINAL_STATUSES
+
+router = APIRouter(prefix="/tasks", tags=["tasks"])
+
+
+async def _get_user_job(job_id: str, user_id: Optional[str]) -> Dict[str, Any]:
+    """Load a job, hiding jobs owned by other users (anonymous jobs are reachable by id)"""
+    job = await job_queue.get(job_id)
+    if not job or (job["user_id"] and job["user_id"] != user_id):
+        raise HTTPException(status_code=404, detail="Task not found")
+    return job
+
+
+@router.get("")
+async def list_tasks(user_id: str, limit: int = Query(20, ge=1, le=100)):
+    """List the user's most recent background tasks"""
+    jobs = await job_queue.list_for_user(user_id, limit)
+    return {"tasks": [public_job_view(job) for job in jobs]}
+
+
+@router.get("/{job_id}")
+async def get_task_status(job_id: str, user_id: Optional[str] = None):
+    """Get task status and progress (poll until finished is true)"""
+    job = await _get_user_job(job_id, user_id)
+    return public_job_view(job)
+
+
+@router.get("/{job_id}/result")
+async def get_task_result(job_id: str, user_id: Optional[str] = None):
+    """
+    Get the result of a finished task
+
+    Returns the same body the synchronous endpoint would have returned.
+    409 while the task is still queued or running.
+    """
+    job = await _get_user_job(job_id, user_id)
+
+    if job["status"] not in TERMINAL_STATUSES:
+        raise HTTPException(status_code=409, detail=f"Task is {job['status']}")
+
+    if job["status"] != SUCCEEDED:
+        raise HTTPException(
+            status_code=500,
+            detail=job["error"] or f"Task {job['status']}"
+        )
+
+    return job["result"]
+
+
+@router.post("/{job_id}/cancel")
+async def cancel_task(job_id: str, user_id: Optional[str] = None):
+    """Cancel a queued or running task"""
+    await _get_user_job(job_id, user_id)
+
+    cancelled = await job_queue.cancel(job_id)
+    return {"success": cancelled, "job_id": job_id}
+
+
+@router.get("/{job_id}/events")
+async def stream_task_events(job_id: str, user_id: Optional[str] = None):
+    """Stream task progress as Server-Sent Events until the task finishes"""
+    await _get_user_job(job_id, user_id)
+
+    async def event_stream():
+        async for job in job_queue.events(job_id):
+            view = public_job_view(job)
+            event = "done" if view["finished"] else "progress"
+            yield f"event: {event}\ndata: {json.dumps(view)}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
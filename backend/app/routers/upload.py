@@ -4,6 +4,8 @@ from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Request
 from app.services.ocr_service import ocr_service
 from app.services.knowledge_extraction_service import knowledge_extraction_service
 from app.services.knowledge_graph_service import knowledge_graph_service
+from app.services.job_queue import job_queue
+from app.utils.uploads import spool_upload, UploadTooLarge
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 import os
@@ -18,132 +20,170 @@ os.makedirs(UPLOAD_DIR, exist_ok=True)
 # File upload size limit (convert MB to bytes)
 MAX_UPLOAD_SIZE = int(os.getenv("MAX_UPLOAD_SIZE_MB", "10")) * 1024 * 1024
 
-@router.post("/resume")
-@limiter.limit("5/minute")
-async def upload_resume(
-    request: Request,
-    file: UploadFile = File(...),
-    user_id: str = Form(None)
-):
-    """
-    Upload resume (PDF/Image/DOCX/DOC/TXT) and extract data via OCR
+ALLOWED_TYPES = [
+    'application/pdf',
+    'image/jpeg',
+    'image/png',
+    'application/vnd.openxmlformats-officedocument.wordprocessingml.document',  # .docx
+    'application/msword',  # .doc
+    'text/plain'  # .txt
+]
 
-    If user_id is provided, automatically extracts knowledge entities
-    and stores them as unconfirmed for user review.
-    """
+ALLOWED_EXTENSIONS = ['.pdf', '.jpg', '.jpeg', '.png', '.docx', '.doc', '.txt']
+
+
+async def _save_upload(file: UploadFile) -> tuple:
+    """Validate an uploaded resume and save it to UPLOAD_DIR, returning (file_id, file_path)"""
 
-    # Validate file type
-    allowed_types = [
-        'application/pdf',
-        'image/jpeg',
-        'image/png',
-        'application/vnd.openxmlformats-officedocument.wordprocessingml.document',  # .docx
-        'application/msword',  # .doc
-        'text/plain'  # .txt
-    ]
-
-    # Also check file extension as a fallback
-    allowed_extensions = ['.pdf', '.jpg', '.jpeg', '.png', '.docx', '.doc', '.txt']
+    # Validate file type (file extension is checked as a fallback)
     file_ext = os.path.splitext(file.filename)[1].lower()
 
-    if file.content_type not in allowed_types and file_ext not in allowed_extensions:
+    if file.content_type not in ALLOWED_TYPES and file_ext not in ALLOWED_EXTENSIONS:
         raise HTTPException(
             status_code=400,
             detail="Invalid file type. Allowed: PDF, JPG, PNG, DOCX, DOC, TXT"
         )
 
-    # Read file content
-    content = await file.read()
-
-    # Validate file size
-    if len(content) > MAX_UPLOAD_SIZE:
-        raise HTTPException(
-            status_code=413,
-            detail=f"File too large. Maximum size: {MAX_UPLOAD_SIZE / 1024 / 1024}MB"
-        )
-
-    # Save file temporarily
+    # Save file temporarily, copying it in chunks after checking its size
     file_id = str(uuid.uuid4())
     file_ext = os.path.splitext(file.filename)[1]
     file_path = os.path.join(UPLOAD_DIR, f"{file_id}{file_ext}")
 
     try:
-        with open(file_path, "wb") as f:
-            f.write(content)
-
-        # Extract data via OCR
-        extracted_data = await ocr_service.extract_resume_text(file_path)
-
-        response = {
-            "success": True,
-            "file_id": file_id,
-            "file_name": file.filename,
-            "extracted_data": extracted_data
-        }
-
-        # If user_id provided, automatically extract knowledge
-        if user_id:
-            print(f"Auto-extracting knowledge from uploaded resume for user {user_id}")
-
-            try:
-                # Extract knowledge entities
-                extraction_result = await knowledge_extraction_service.extract_from_resume(
-                    resume_text=extracted_data,
-                    user_id=user_id,
-                    source_reference=file_id
+        await spool_upload(file, file_path, MAX_UPLOAD_SIZE)
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+    return file_id, file_path
+
+
+async def process_resume_upload(
+    file_id: str,
+    file_name: str,
+    file_path: str,
+    user_id: str = None,
+    progress=lambda stage, **data: None
+) -> dict:
+    """
+    OCR a saved resume file and, if user_id is given, extract and store knowledge
+
+    Shared by the synchronous upload endpoint and the background job handler.
+    """
+    # Extract data via OCR
+    progress("ocr")
+    extracted_data = await ocr_service.extract_resume_text(file_path)
+
+    response = {
+        "success": True,
+        "file_id": file_id,
+        "file_name": file_name,
+        "extracted_data": extracted_data
+    }
+
+    # If user_id provided, automatically extract knowledge
+    if user_id:
+        print(f"Auto-extracting knowledge from uploaded resume for user {user_id}")
+
+        try:
+            # Extract knowledge entities
+            progress("extracting")
+            extraction_result = await knowledge_extraction_service.extract_from_resume(
+                resume_text=extracted_data,
+                user_id=user_id,
+                source_reference=file_id
+            )
+
+            if extraction_result["success"]:
+                entities = extraction_result["entities"]
+                relationships = extraction_result["relationships"]
+
+                # Store entities in database
+                progress("storing", entities=len(entities))
+                storage_result = await knowledge_graph_service.store_entities(
+                    entities=entities,
+                    user_id=user_id
                 )
 
-                if extraction_result["success"]:
-                    entities = extraction_result["entities"]
-                    relationships = extraction_result["relationships"]
-
-                    # Store entities in database
-                    storage_result = await knowledge_graph_service.store_entities(
-                        entities=entities,
-                        user_id=user_id
-                    )
-
-                    if storage_result["success"]:
-                        # Create relationships
-                        entity_ids = storage_result["entity_ids"]
-                        if relationships:
-                            await knowledge_graph_service.create_relationships(
-                                relationships=relationships,
-                                entity_ids=entity_ids
-                            )
-
-                        print(f"Successfully extracted {len(entities)} entities from resume")
-
-                        # Add extraction results to response
-                        response["knowledge_extraction"] = {
-                            "success": True,
-                            "entities_extracted": len(entities),
-                            "pending_confirmation": len(entities),
-                            "duplicates_removed": extraction_result.get("duplicates_removed", 0),
-                            "entity_ids": entity_ids
-                        }
-                    else:
-                        print(f"Storage failed: {storage_result.get('error')}")
-                        response["knowledge_extraction"] = {
-                            "success": False,
-                            "error": storage_result.get("error", "Storage failed")
-                        }
+                if storage_result["success"]:
+                    # Create relationships
+                    entity_ids = storage_result["entity_ids"]
+                    if relationships:
+                        await knowledge_graph_service.create_relationships(
+                            relationships=relationships,
+                            entity_ids=entity_ids
+                        )
+
+                    print(f"Successfully extracted {len(entities)} entities from resume")
+
+                    # Add extraction results to response
+                    response["knowledge_extraction"] = {
+                        "success": True,
+                        "entities_extracted": len(entities),
+                        "pending_confirmation": len(entities),
+                        "duplicates_removed": extraction_result.get("duplicates_removed", 0),
+                        "failed_chunks": extraction_result.get("failed_chunks", 0),
+                        "entity_ids": entity_ids
+                    }
                 else:
-                    print(f"Extraction failed: {extraction_result.get('error')}")
+                    print(f"Storage failed: {storage_result.get('error')}")
                     response["knowledge_extraction"] = {
                         "success": False,
-                        "error": extraction_result.get("error", "Extraction failed")
+                        "error": storage_result.get("error", "Storage failed")
                     }
-
-            except Exception as e:
-                print(f"Knowledge extraction error (non-fatal): {str(e)}")
-                # Don't fail the whole upload if knowledge extraction fails
+            else:
+                print(f"Extraction failed: {extraction_result.get('error')}")
                 response["knowledge_extraction"] = {
                     "success": False,
-                    "error": str(e)
+                    "error": extraction_result.get("error", "Extraction failed")
                 }
 
-        return response
+        except Exception as e:
+            print(f"Knowledge extraction error (non-fatal): {str(e)}")
+            # Don't fail the whole upload if knowledge extraction fails
+            response["knowledge_extraction"] = {
+                "success": False,
+                "error": str(e)
+            }
+
+    return response
+
+
+def _remove_upload(payload: dict) -> None:
+    """Delete a job's temp file"""
+    if os.path.exists(payload["file_path"]):
+        os.remove(payload["file_path"])
+
+
+async def _resume_upload_job(payload: dict, progress) -> dict:
+    """Background job handler for /upload/resume/async"""
+    try:
+        return await process_resume_upload(progress=progress, **payload)
+    finally:
+        # Cleanup temp file
+        _remove_upload(payload)
+
+
+# The cleanup covers jobs cancelled before they start or interrupted by a restart
+job_queue.register("resume_upload", _resume_upload_job, cleanup=_remove_upload)
+
+
+@router.post("/resume")
+@limiter.limit("5/minute")
+async def upload_resume(
+    request: Request,
+    file: UploadFile = File(...),
+    user_id: str = Form(None)
+):
+    """
+    Upload resume (PDF/Image/DOCX/DOC/TXT) and extract data via OCR
+
+    If user_id is provided, automatically extracts knowledge entities
+    and stores them as unconfirmed for user review.
+    """
+    file_id, file_path = await _save_upload(file)
+
+    try:
+        return await process_resume_upload(file_id, file.filename, file_path, user_id)
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"OCR failed: {str(e)}")
@@ -152,3 +192,38 @@ async def upload_resume(
         # Cleanup temp file
         if os.path.exists(file_path):
             os.remove(file_path)
+
+
+@router.post("/resume/async")
+@limiter.limit("5/minute")
+async def upload_resume_async(
+    request: Request,
+    file: UploadFile = File(...),
+    user_id: str = Form(None)
+):
+    """
+    Upload resume and process it in the background
+
+    Same processing as /upload/resume, but returns a task id immediately.
+    Poll /tasks/{job_id} (or stream /tasks/{job_id}/events) and fetch the
+    upload response from /tasks/{job_id}/result.
+    """
+    file_id, file_path = await _save_upload(file)
+
+    try:
+        job = await job_queue.submit(
+            "resume_upload",
+            {"file_id": file_id, "file_name": file.filename, "file_path": file_path, "user_id": user_id},
+            user_id=user_id
+        )
+    except Exception as e:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        raise HTTPException(status_code=500, detail=f"Failed to queue upload: {str(e)}")
+
+    return {
+        "success": True,
+        "job_id": job["id"],
+        "file_id": file_id,
+        "status": job["status"]
+    }
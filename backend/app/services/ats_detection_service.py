@@ -3,10 +3,92 @@ ATS Detection Service
 Identifies which Applicant Tracking System (ATS) a job posting uses
 Provides system-specific optimization recommendations
 """
-from typing import Dict, Any, Optional, Tuple
+from typing import Dict, Any, List, Optional, Tuple
+from collections import Counter
+import os
 import re
 from urllib.parse import urlparse
 
+# Shared signature prefixes at least this long are scanned as gates
+MIN_GATE_LENGTH = 4
+
+
+class ATSSignatureMatcher:
+    """
+    Precompiled matcher for ATS URL patterns and HTML signatures
+
+    Built once from the ats_systems table:
+    - Each system's URL patterns are compiled into one alternation, checked
+      in priority order (no per-call pattern compile/cache lookup)
+    - HTML signatures are lowercased and de-duplicated, and shared prefixes
+      and contained signatures become gates: "lever-job", "lever-apply" and
+      "lever-frame" are only searched for if "lever-" occurs in the page,
+      "gwt-workday" only if "workday" does. Pages without ATS markup (the
+      common case) cost a handful of substring scans instead of one per
+      signature per system.
+    """
+
+    def __init__(self, ats_systems: Dict[str, Dict[str, Any]]):
+        self.priority = list(ats_systems)
+
+        self.url_regexes = [
+            (name, re.compile("|".join(info["url_patterns"])))
+            for name, info in ats_systems.items()
+        ]
+
+        # signature -> {system: times listed} (e.g. "icims" and "iCIMS" count twice)
+        self.signature_systems: Dict[str, Counter] = {}
+        self.signature_totals: Dict[str, int] = {}
+        for name, info in ats_systems.items():
+            self.signature_totals[name] = len(info["html_signatures"])
+            for signature in info["html_signatures"]:
+                self.signature_systems.setdefault(signature.lower(), Counter())[name] += 1
+
+        self.scan_plan = self._build_scan_plan(list(self.signature_systems))
+
+    @staticmethod
+    def _build_scan_plan(signatures: List[str]) -> List[Tuple[str, Optional[str]]]:
+        """
+        Order needles shortest-first, each paired with the longest earlier
+        needle it contains (its gate), or None if it must always be scanned
+        """
+        needles = set(signatures)
+        ordered = sorted(signatures)
+        for a, b in zip(ordered, ordered[1:]):
+            prefix = os.path.commonprefix([a, b])
+            if len(prefix) >= MIN_GATE_LENGTH:
+                needles.add(prefix)
+
+        plan: List[Tuple[str, Optional[str]]] = []
+        for needle in sorted(needles, key=lambda n: (len(n), n)):
+            gates = [earlier for earlier, _ in plan if earlier in needle]
+            plan.append((needle, max(gates, key=len) if gates else None))
+        return plan
+
+    def match_url(self, job_url: str) -> Optional[str]:
+        """Highest-priority system whose URL pattern occurs in the URL"""
+        url_lower = job_url.lower()
+        for name, regex in self.url_regexes:
+            if regex.search(url_lower):
+                return name
+        return None
+
+    def match_html(self, html_content: str) -> Dict[str, int]:
+        """Number of signatures found per system (systems with no hits omitted)"""
+        text = html_content.lower()
+
+        found = set()
+        for needle, gate in self.scan_plan:
+            if (gate is None or gate in found) and needle in text:
+                found.add(needle)
+
+        counts: Counter = Counter()
+        for signature in found:
+            if signature in self.signature_systems:
+                counts.update(self.signature_systems[signature])
+        return dict(counts)
+
+
 class ATSDetectionService:
     """
     Detects ATS systems from job URLs and HTML content
@@ -228,6 +310,9 @@ class ATSDetectionService:
             }
         }
 
+        # Compiled once, used for every detection
+        self.matcher = ATSSignatureMatcher(self.ats_systems)
+
     def detect_ats(
         self,
         job_url: Optional[str] = None,
@@ -297,36 +382,29 @@ class ATSDetectionService:
     def _detect_from_url(self, job_url: str) -> Optional[Dict[str, Any]]:
         """Detect ATS system from URL patterns"""
 
-        url_lower = job_url.lower()
-
-        for system_name, system_info in self.ats_systems.items():
-            for pattern in system_info["url_patterns"]:
-                if re.search(pattern, url_lower):
-                    return {
-                        "system": system_name,
-                        "confidence": system_info["confidence_boost"]
-                    }
+        system_name = self.matcher.match_url(job_url)
+        if not system_name:
+            return None
 
-        return None
+        return {
+            "system": system_name,
+            "confidence": self.ats_systems[system_name]["confidence_boost"]
+        }
 
     def _detect_from_html(self, html_content: str) -> Optional[Dict[str, Any]]:
         """Detect ATS system from HTML signatures"""
 
-        html_lower = html_content.lower()
-
         # Track matches and their scores
         matches = {}
 
-        for system_name, system_info in self.ats_systems.items():
-            match_count = 0
-            for signature in system_info["html_signatures"]:
-                if signature.lower() in html_lower:
-                    match_count += 1
+        signature_counts = self.matcher.match_html(html_content)
+        for system_name in self.matcher.priority:
+            match_count = signature_counts.get(system_name, 0)
 
             if match_count > 0:
                 # Confidence based on number of signature matches
                 base_confidence = 0.5
-                signature_boost = (match_count / len(system_info["html_signatures"])) * 0.3
+                signature_boost = (match_count / self.matcher.signature_totals[system_name]) * 0.3
                 matches[system_name] = base_confidence + signature_boost
 
         if matches:
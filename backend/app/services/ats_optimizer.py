@@ -4,6 +4,7 @@ Applies ATS formatting rules and optimization strategies
 """
 from typing import Dict, Any, List
 import re
+from .keyword_index import get_keyword_index
 
 class ATSOptimizer:
     """Applies ATS best practices from the 2025 guide"""
@@ -350,16 +351,16 @@ class ATSOptimizer:
         Returns:
             Dictionary with keyword analysis
         """
-        text_lower = text.lower()
         word_count = len(text.split())
 
         keyword_matches = {}
         total_matches = 0
 
+        # Whole-word, stemmed occurrence counts from the shared resume index
+        occurrences = get_keyword_index(text).match(keywords)
         for keyword in keywords:
-            keyword_lower = keyword.lower()
-            count = text_lower.count(keyword_lower)
-            if count > 0:
+            count = occurrences[keyword]["count"]
+            if count > 0 and keyword not in keyword_matches:
                 keyword_matches[keyword] = count
                 total_matches += count
 
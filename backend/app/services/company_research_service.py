@@ -3,12 +3,8 @@ Company Research Service
 Automatically researches companies to gather information for resume tailoring
 """
 from typing import Dict, Any, Optional, List
-import anthropic
-import os
 import re
-from dotenv import load_dotenv
-
-load_dotenv()
+from .llm_client import llm_client
 
 class CompanyResearchService:
     """
@@ -17,7 +13,7 @@ class CompanyResearchService:
     """
 
     def __init__(self):
-        self.claude = anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+        self.llm = llm_client
 
     async def research_company(
         self,
@@ -124,13 +120,7 @@ Company: {company_name}
 URL:"""
 
         try:
-            message = self.claude.messages.create(
-                model="claude-3-5-sonnet-20241022",
-                max_tokens=100,
-                messages=[{"role": "user", "content": prompt}]
-            )
-
-            url = message.content[0].text.strip()
+            url = (await self.llm.complete(prompt, max_tokens=100, temperature=0)).strip()
 
             if url == "UNKNOWN" or not url.startswith("http"):
                 return None
@@ -167,13 +157,7 @@ Company: {company_name}
 LinkedIn URL:"""
 
         try:
-            message = self.claude.messages.create(
-                model="claude-3-5-sonnet-20241022",
-                max_tokens=100,
-                messages=[{"role": "user", "content": prompt}]
-            )
-
-            linkedin_url = message.content[0].text.strip()
+            linkedin_url = (await self.llm.complete(prompt, max_tokens=100, temperature=0)).strip()
 
             if not linkedin_url.startswith("https://www.linkedin.com/company/"):
                 return None
@@ -211,13 +195,7 @@ Include:
 Keep it to 2-3 sentences. If you don't have information, return: UNKNOWN"""
 
         try:
-            message = self.claude.messages.create(
-                model="claude-3-5-sonnet-20241022",
-                max_tokens=300,
-                messages=[{"role": "user", "content": prompt}]
-            )
-
-            about_text = message.content[0].text.strip()
+            about_text = (await self.llm.complete(prompt, max_tokens=300)).strip()
 
             if about_text == "UNKNOWN":
                 return None
@@ -270,13 +248,7 @@ If information is not available, use empty arrays or null.
 Return ONLY valid JSON, no markdown or explanation."""
 
         try:
-            message = self.claude.messages.create(
-                model="claude-3-5-sonnet-20241022",
-                max_tokens=500,
-                messages=[{"role": "user", "content": prompt}]
-            )
-
-            response_text = message.content[0].text.strip()
+            response_text = (await self.llm.complete(prompt, max_tokens=500)).strip()
 
             # Clean JSON if wrapped in code blocks
             if response_text.startswith('```json'):
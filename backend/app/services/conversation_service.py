@@ -1,13 +1,7 @@
 """Conversation Service - AI-powered resume data collection"""
 
-from anthropic import Anthropic
-import os
-from dotenv import load_dotenv
 import json
-
-load_dotenv()
-
-CLAUDE_API_KEY = os.getenv("CLAUDE_API_KEY")
+from .llm_client import llm_client
 
 # Question bank (40 questions across 7 categories)
 QUESTION_BANK = {
@@ -69,7 +63,7 @@ QUESTION_BANK = {
 
 class ConversationService:
     def __init__(self):
-        self.client = Anthropic(api_key=CLAUDE_API_KEY)
+        self.llm = llm_client
 
     async def start_conversation(self, user_id: str) -> dict:
         """Start a new conversation session"""
@@ -125,15 +119,7 @@ Return a JSON object:
   "conversation_progress": "percentage complete (0-100)"
 }}"""
 
-        message = self.client.messages.create(
-            model="claude-3-5-sonnet-20241022",
-            max_tokens=2000,
-            messages=[
-                {"role": "user", "content": prompt}
-            ]
-        )
-
-        response_text = message.content[0].text
+        response_text = await self.llm.complete(prompt, max_tokens=2000)
 
         # Clean JSON
         if response_text.startswith('```json'):
@@ -3,38 +3,66 @@ Fact Verification Algorithm
 Compares resume claims against knowledge base evidence
 Conservative thresholds to maintain integrity
 """
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Tuple, Awaitable, Optional
 from datetime import datetime
-import anthropic
+import asyncio
+import hashlib
+import json
 import os
 from ..database import get_supabase
+from .llm_client import llm_client
+from .knowledge_snapshot import knowledge_snapshot
+from .fact_rules import FactRules, AMBIGUOUS, split_sentences
+from .kb_text_index import KnowledgeTextIndex
 
 class FactChecker:
-    def __init__(self):
-        self.claude = anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+    def __init__(
+        self,
+        max_concurrency: Optional[int] = None,
+        section_timeout: Optional[float] = None
+    ):
+        self.llm = llm_client
         self.supabase = get_supabase()
+        self.knowledge_snapshot = knowledge_snapshot
+
+        # Sections are verified in parallel, bounded by max_concurrency;
+        # a section that exceeds section_timeout is reported as incomplete
+        self.max_concurrency = max_concurrency or int(os.getenv("FACT_CHECK_CONCURRENCY", "4"))
+        self.section_timeout = section_timeout or float(os.getenv("FACT_CHECK_SECTION_TIMEOUT", "60"))
 
     async def verify_resume(
         self,
         user_id: str,
         resume_structure: Dict[str, Any],
-        resume_version_id: str
+        resume_version_id: str,
+        incremental: bool = False
     ) -> Dict[str, Any]:
         """
         Verify all claims in a resume against knowledge base
 
+        Every claim (the summary, each bullet, skill, degree and
+        certification) gets a fingerprint, stored on its flags and, per
+        section, on the resume version together with a fingerprint of the
+        evidence the section was checked against.
+
+        In incremental mode only sections/bullets whose text or supporting
+        evidence changed since the last run are sent to Claude; earlier
+        verdicts (including resolved flags) are carried forward for the
+        rest. Falls back to a full check when there is no previous run.
+
         Args:
             user_id: UUID of the user
             resume_structure: The generated resume structure
             resume_version_id: UUID of the resume version being checked
+            incremental: Only re-check claims that changed since the last run
 
         Returns:
             Dictionary with verification results and flags
         """
-        # Fetch knowledge base
-        knowledge_base = await self._fetch_knowledge_base(user_id)
+        # Fetch knowledge base (shared snapshot, with its text index)
+        snapshot = await self.knowledge_snapshot.get(user_id)
+        knowledge_base = list(snapshot.knowledge_base)
 
-        flags = []
         verification_report = {
             "total_checks": 0,
             "passed": 0,
@@ -46,65 +74,120 @@ class FactChecker:
             }
         }
 
-        # 1. Verify professional summary claims
-        summary_flags = await self._verify_summary(
-            resume_structure['summary'],
-            knowledge_base,
-            resume_version_id,
-            user_id
-        )
-        flags.extend(summary_flags)
-
-        # 2. Verify each work experience bullet
-        for exp_idx, experience in enumerate(resume_structure['experience']):
-            exp_flags = await self._verify_experience(
-                experience,
-                knowledge_base,
-                resume_version_id,
-                exp_idx,
-                user_id
-            )
-            flags.extend(exp_flags)
-
-        # 3. Verify skills claims
-        skills_flags = await self._verify_skills(
-            resume_structure['skills'],
-            knowledge_base,
-            resume_version_id,
-            user_id
-        )
-        flags.extend(skills_flags)
-
-        # 4. Verify education claims
-        edu_flags = await self._verify_education(
-            resume_structure['education'],
-            knowledge_base,
-            resume_version_id,
-            user_id
-        )
-        flags.extend(edu_flags)
-
-        # 5. Verify certifications
-        cert_flags = await self._verify_certifications(
-            resume_structure['certifications'],
-            knowledge_base,
-            resume_version_id,
-            user_id
+        units = self._build_claim_units(resume_structure, knowledge_base)
+
+        # Numbers, dates and skills are checked locally first; only claims
+        # the rules can't settle are sent to Claude
+        rules = FactRules(knowledge_base)
+
+        previous = await self._load_fingerprints(resume_version_id) if incremental else None
+        mode = "incremental" if previous else "full"
+
+        # Every section is an independent check, so run them as one
+        # bounded-concurrency group instead of one after another
+        checks = []
+        checked_claims: Dict[str, List[str]] = {}
+
+        for key, unit in units.items():
+            changed = self._changed_claims(unit, (previous or {}).get(key))
+            if not changed:
+                continue
+            checked_claims[key] = changed
+
+            if unit['kind'] == 'summary':
+                coro = self._verify_summary(
+                    resume_structure['summary'],
+                    knowledge_base,
+                    resume_version_id,
+                    user_id,
+                    rules
+                )
+            elif unit['kind'] == 'experience':
+                experience = unit['experience']
+                if len(changed) < len(unit['claims']):
+                    # Only the edited bullets go back to Claude
+                    experience = {**experience, 'bullets': [unit['claims'][fp] for fp in changed]}
+                coro = self._verify_experience(
+                    experience,
+                    knowledge_base,
+                    resume_version_id,
+                    unit['index'],
+                    user_id,
+                    rules
+                )
+            elif unit['kind'] == 'skills':
+                coro = self._verify_skills(
+                    resume_structure['skills'],
+                    knowledge_base,
+                    resume_version_id,
+                    user_id,
+                    snapshot.text_index
+                )
+            elif unit['kind'] == 'education':
+                coro = self._verify_education(
+                    resume_structure['education'],
+                    knowledge_base,
+                    resume_version_id,
+                    user_id
+                )
+            else:
+                coro = self._verify_certifications(
+                    resume_structure['certifications'],
+                    knowledge_base,
+                    resume_version_id,
+                    user_id
+                )
+
+            checks.append((key, coro))
+
+        new_flags, incomplete_sections = await self._run_checks(checks)
+        verification_report['incomplete_sections'] = incomplete_sections
+
+        # Sections that failed keep their old flags and fingerprints, so the
+        # next incremental run retries them
+        failed = {section['section'] for section in incomplete_sections}
+        rechecked = {
+            fp for key, fps in checked_claims.items() if key not in failed for fp in fps
+        }
+        current = {fp for unit in units.values() for fp in unit['claims']}
+
+        # Position-level flags belong to their experience section as a whole
+        positions = {key: unit['position'] for key, unit in units.items() if unit['kind'] == 'experience'}
+        rechecked_positions = {fp for key, fp in positions.items() if key in checked_claims and key not in failed}
+
+        existing_flags = await self.get_flags_for_resume(resume_version_id)
+        flags, stale_ids, to_insert = self._reconcile_flags(
+            existing_flags,
+            new_flags,
+            rechecked | rechecked_positions,
+            current | set(positions.values())
         )
-        flags.extend(cert_flags)
 
         # Calculate verification stats
         verification_report['total_checks'] = len(flags) if flags else 0
-        verification_report['flagged'] = len([f for f in flags if f['severity'] in ['medium', 'high']])
+        verification_report['flagged'] = len([f for f in flags if f['severity'] in ['medium', 'high'] and not f.get('resolved')])
         verification_report['passed'] = verification_report['total_checks'] - verification_report['flagged']
+        verification_report['mode'] = mode
+        verification_report['claims_checked'] = len(rechecked)
+        verification_report['claims_carried_forward'] = len(current - rechecked)
+
+        # Supporting knowledge entries per skill (lookups are memoized by the index)
+        verification_report['skill_evidence'] = {
+            skill: snapshot.text_index.find_skill(skill)['entity_ids']
+            for skill in units['skills']['claims'].values()
+        }
 
         for flag in flags:
             severity = flag['severity']
             verification_report['severity_breakdown'][severity] += 1
 
-        # Store flags in database
-        if flags:
-            await self._store_flags(flags)
+        # Store flags in database (replacing stale ones instead of duplicating)
+        if stale_ids:
+            await self._delete_flags(stale_ids)
+        if to_insert:
+            await self._store_flags(to_insert)
+
+        await self._save_fingerprints(resume_version_id, units, previous or {}, failed)
 
         return {
             "verification_report": verification_report,
@@ -112,69 +195,276 @@ class FactChecker:
             "requires_review": verification_report['flagged'] > 0
         }
 
-    async def _fetch_knowledge_base(self, user_id: str) -> List[Dict]:
-        """Fetch all confirmed knowledge entities"""
-        # FIXED: Was querying user_knowledge_base (empty), now queries knowledge_entities (has data)
-        result = self.supabase.table("knowledge_entities")\
-            .select("*")\
-            .eq("user_id", user_id)\
-            .eq("is_confirmed", True)\
-            .execute()
+    @staticmethod
+    def _fingerprint(*parts: Any) -> str:
+        """Stable short hash of claim text / evidence"""
+        raw = json.dumps(parts, sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+    def _evidence_fingerprint(self, entries: List[Dict]) -> str:
+        return self._fingerprint(sorted(
+            (str(entry.get('id')), entry.get('title'), entry.get('content'), entry.get('date_range'))
+            for entry in entries
+        ))
+
+    def _position_fingerprint(self, experience: Dict) -> str:
+        return self._fingerprint(
+            experience.get('title', ''),
+            experience.get('company', ''),
+            experience.get('start_date', ''),
+            experience.get('end_date', '')
+        )
+
+    def _bullet_fingerprint(self, experience: Dict, bullet: str) -> str:
+        return self._fingerprint(
+            "bullet",
+            experience.get('title', ''),
+            experience.get('company', ''),
+            experience.get('start_date', ''),
+            experience.get('end_date', ''),
+            bullet.strip()
+        )
+
+    def _build_claim_units(
+        self,
+        resume_structure: Dict[str, Any],
+        knowledge_base: List[Dict]
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Split a resume into independently checkable sections
 
-        # Transform knowledge_entities schema to format expected by verification
-        transformed_data = []
-        for entity in result.data:
-            # Map entity_type to knowledge_type
-            knowledge_type = self._map_entity_type_to_knowledge_type(entity.get('entity_type', 'experience'))
-
-            transformed_data.append({
-                'id': entity['id'],
-                'user_id': entity['user_id'],
-                'title': entity.get('title', ''),
-                'content': entity.get('structured_data', {}) or {'description': entity.get('description', '')},
-                'knowledge_type': knowledge_type,
-                'tags': entity.get('tags', []),
-                'date_range': self._build_date_range(entity.get('start_date'), entity.get('end_date')),
-                'created_at': entity.get('created_at', '')
-            })
-
-        return transformed_data
-
-    def _map_entity_type_to_knowledge_type(self, entity_type: str) -> str:
-        """Map knowledge_entities.entity_type to knowledge_type"""
-        mapping = {
-            'job': 'experience',
-            'work_experience': 'experience',
-            'job_experience': 'experience',
-            'job_detail': 'accomplishment',
-            'education': 'education',
-            'skill': 'skill',
-            'achievement': 'accomplishment',
-            'accomplishment': 'accomplishment',
-            'certification': 'certification',
-            'project': 'project',
-            'metric': 'metric',
-            'story': 'story'
+        Returns:
+            {section key: {"kind", "claims": {fingerprint: text}, "evidence": fingerprint, ...}}
+            Experience sections are keyed by position (not list index), so
+            reordering experiences doesn't invalidate them.
+        """
+        units = {}
+
+        summary = resume_structure.get('summary') or ''
+        units['summary'] = {
+            "kind": "summary",
+            "claims": {self._fingerprint("summary", summary.strip()): summary},
+            "evidence": self._evidence_fingerprint(self._summary_evidence(knowledge_base))
         }
-        return mapping.get(entity_type.lower(), 'experience')
 
-    def _build_date_range(self, start_date, end_date):
-        """Build PostgreSQL date range format from start/end dates"""
-        if not start_date and not end_date:
+        for exp_idx, experience in enumerate(resume_structure.get('experience') or []):
+            position = self._position_fingerprint(experience)
+            units[f"experience:{position}"] = {
+                "kind": "experience",
+                "index": exp_idx,
+                "experience": experience,
+                # Fingerprint of position-level flags (no evidence for the position)
+                "position": position,
+                "claims": {
+                    self._bullet_fingerprint(experience, bullet): bullet
+                    for bullet in experience.get('bullets') or []
+                },
+                "evidence": self._evidence_fingerprint(self._experience_evidence(experience, knowledge_base))
+            }
+
+        # Local (no API) checks: always re-run, results reconciled by fingerprint
+        skills = [skill for skill_list in (resume_structure.get('skills') or {}).values() for skill in skill_list]
+        units['skills'] = {
+            "kind": "skills",
+            "claims": {self._fingerprint("skill", skill): skill for skill in skills},
+            "evidence": None
+        }
+        units['education'] = {
+            "kind": "education",
+            "claims": {
+                self._fingerprint("education", edu.get('degree', ''), edu.get('institution', '')): edu.get('institution', '')
+                for edu in resume_structure.get('education') or []
+            },
+            "evidence": None
+        }
+        units['certifications'] = {
+            "kind": "certifications",
+            "claims": {
+                self._fingerprint("certification", cert.get('name', '')): cert.get('name', '')
+                for cert in resume_structure.get('certifications') or []
+            },
+            "evidence": None
+        }
+
+        return units
+
+    def _changed_claims(self, unit: Dict[str, Any], previous: Optional[Dict[str, Any]]) -> List[str]:
+        """Fingerprints of the claims in a section that need (re)checking"""
+        claims = list(unit['claims'])
+
+        if unit['evidence'] is None or previous is None:
+            return claims
+        if previous.get('evidence') != unit['evidence']:
+            return claims
+        if unit['kind'] == 'summary':
+            return claims if set(previous.get('claims', [])) != set(claims) else []
+
+        checked_before = set(previous.get('claims', []))
+        return [fp for fp in claims if fp not in checked_before]
+
+    def _reconcile_flags(
+        self,
+        existing_flags: List[Dict],
+        new_flags: List[Dict],
+        rechecked: set,
+        current: set
+    ) -> Tuple[List[Dict], List[str], List[Dict]]:
+        """
+        Merge this run's flags with the stored ones
+
+        - flags on claims that were not re-checked are carried forward
+        - a stored flag the re-check raised again is kept as is (so a
+          resolution survives) instead of being inserted a second time
+        - everything else on re-checked or removed claims is deleted
+
+        Returns:
+            (current flags, ids of stored flags to delete, new flags to insert)
+        """
+        def issue(flag: Dict) -> Tuple[Optional[str], Optional[str]]:
+            return flag.get('claim_fingerprint'), flag.get('flagged_content')
+
+        raised = {issue(flag) for flag in new_flags}
+
+        kept = []
+        stale_ids = []
+        for flag in existing_flags:
+            fp = flag.get('claim_fingerprint')
+            if fp in current and fp not in rechecked:
+                kept.append(flag)
+            elif fp in rechecked and issue(flag) in raised:
+                kept.append(flag)
+            elif fp is None and flag.get('resolved'):
+                # Pre-fingerprint flag the user already dealt with
+                kept.append(flag)
+            else:
+                stale_ids.append(flag['id'])
+
+        already_stored = {issue(flag) for flag in kept}
+        to_insert = [flag for flag in new_flags if issue(flag) not in already_stored]
+
+        return kept + to_insert, stale_ids, to_insert
+
+    async def _load_fingerprints(self, resume_version_id: str) -> Optional[Dict[str, Any]]:
+        """Section fingerprints from the last verification run (None if never run)"""
+        try:
+            result = self.supabase.table("resume_versions")\
+                .select("verification_fingerprints")\
+                .eq("id", resume_version_id)\
+                .single()\
+                .execute()
+            return (result.data or {}).get('verification_fingerprints') or None
+        except Exception as e:
+            print(f"Error loading verification fingerprints: {e}")
             return None
-        start = start_date or '1900-01-01'
-        end = end_date or '9999-12-31'
-        return f"[{start},{end})"
+
+    async def _save_fingerprints(
+        self,
+        resume_version_id: str,
+        units: Dict[str, Dict[str, Any]],
+        previous: Dict[str, Any],
+        failed_sections: set
+    ) -> None:
+        """Record what each section was checked against"""
+        fingerprints = {}
+        for key, unit in units.items():
+            if key in failed_sections:
+                # Keep the last successful state so the section is retried
+                if key in previous:
+                    fingerprints[key] = previous[key]
+                continue
+            fingerprints[key] = {
+                "claims": list(unit['claims']),
+                "evidence": unit['evidence']
+            }
+
+        try:
+            self.supabase.table("resume_versions")\
+                .update({"verification_fingerprints": fingerprints})\
+                .eq("id", resume_version_id)\
+                .execute()
+        except Exception as e:
+            print(f"Error saving verification fingerprints: {e}")
+
+    async def _run_checks(
+        self,
+        checks: List[Tuple[str, Awaitable[List[Dict]]]]
+    ) -> Tuple[List[Dict], List[Dict]]:
+        """
+        Run section checks concurrently with a parallelism limit
+
+        Args:
+            checks: List of (section_name, verification coroutine)
+
+        Returns:
+            Tuple of (flags in section order, sections that failed or timed out)
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def run(coro: Awaitable[List[Dict]]) -> List[Dict]:
+            async with semaphore:
+                return await asyncio.wait_for(coro, timeout=self.section_timeout)
+
+        results = await asyncio.gather(
+            *(run(coro) for _, coro in checks),
+            return_exceptions=True
+        )
+
+        flags = []
+        incomplete_sections = []
+        for (section, _), result in zip(checks, results):
+            if isinstance(result, asyncio.TimeoutError):
+                print(f"Fact check timed out for section {section}")
+                incomplete_sections.append({"section": section, "error": "timeout"})
+            elif isinstance(result, BaseException):
+                if isinstance(result, asyncio.CancelledError):
+                    raise result
+                print(f"Fact check failed for section {section}: {result}")
+                incomplete_sections.append({"section": section, "error": str(result)})
+            else:
+                flags.extend(result)
+
+        return flags, incomplete_sections
 
     async def _verify_summary(
         self,
         summary: str,
         knowledge_base: List[Dict],
         resume_version_id: str,
-        user_id: str
+        user_id: str,
+        rules: Optional[FactRules] = None
     ) -> List[Dict]:
         """Verify claims in professional summary"""
 
+        claim_fingerprint = self._fingerprint("summary", summary.strip())
+
+        def to_flag(issue: Dict) -> Dict:
+            return {
+                "resume_version_id": resume_version_id,
+                "user_id": user_id,
+                "flagged_content": issue['claim'],
+                "flag_reason": issue['reason'],
+                "severity": issue['severity'],
+                "explanation": f"{issue['explanation']} | Suggestion: {issue['suggestion']}",
+                "claim_fingerprint": claim_fingerprint
+            }
+
+        # Settle sentences locally; Claude only sees the ambiguous ones
+        rules = rules or FactRules(knowledge_base)
+        summary_evidence = self._summary_evidence(knowledge_base)
+        local_flags = []
+        ambiguous = []
+        sentences = split_sentences(summary)
+        for sentence in sentences:
+            verdict = rules.check_sentence(sentence, summary_evidence)
+            local_flags.extend(to_flag(issue) for issue in verdict['issues'])
+            if verdict['status'] == AMBIGUOUS:
+                ambiguous.append(sentence)
+
+        print(f"Summary: {len(sentences) - len(ambiguous)}/{len(sentences)} sentences settled by rules")
+        if not ambiguous:
+            return local_flags
+        summary = " ".join(ambiguous)
+
         # Extract accomplishments and experiences for context
         accomplishments = "\n".join([
             f"- {entry['title']}: {entry['content']}"
@@ -232,31 +522,11 @@ Return JSON array format:
 
 If everything is supported, return: []"""
 
-        message = self.claude.messages.create(
-            model="claude-3-5-sonnet-20241022",
-            max_tokens=1000,
-            messages=[{"role": "user", "content": prompt}]
-        )
-
-        response_text = message.content[0].text.strip()
+        response_text = (await self.llm.complete(prompt, max_tokens=1000)).strip()
 
         # Parse JSON response
-        import json
-        try:
-            issues = json.loads(response_text)
-            flags = []
-            for issue in issues:
-                flags.append({
-                    "resume_version_id": resume_version_id,
-                    "user_id": user_id,
-                    "flagged_content": issue['claim'],
-                    "flag_reason": issue['reason'],
-                    "severity": issue['severity'],
-                    "explanation": f"{issue['explanation']} | Suggestion: {issue['suggestion']}"
-                })
-            return flags
-        except:
-            return []
+        issues = self._parse_issues(response_text, "summary")
+        return self._merge_flags(local_flags, [to_flag(issue) for issue in issues])
 
     async def _verify_experience(
         self,
@@ -264,22 +534,57 @@ If everything is supported, return: []"""
         knowledge_base: List[Dict],
         resume_version_id: str,
         exp_idx: int,
-        user_id: str
+        user_id: str,
+        rules: Optional[FactRules] = None
     ) -> List[Dict]:
         """Verify work experience bullets against evidence"""
 
-        # Find relevant knowledge base entries
         company = experience.get('company', '')
         start_date = experience.get('start_date', '')
         end_date = experience.get('end_date', '')
 
         # Get relevant accomplishments and stories for this time period/company
-        relevant_entries = [
-            entry for entry in knowledge_base
-            if (entry['knowledge_type'] in ['accomplishment', 'story', 'metric'])
-            and (company.lower() in str(entry.get('content', '')).lower() or
-                 self._date_overlaps(entry.get('date_range'), start_date, end_date))
-        ]
+        relevant_entries = self._experience_evidence(experience, knowledge_base)
+
+        def to_flag(issue: Dict, bullet_text: str) -> Dict:
+            return {
+                "resume_version_id": resume_version_id,
+                "user_id": user_id,
+                "flagged_content": issue['claim'],
+                "flag_reason": issue['reason'],
+                "severity": issue['severity'],
+                "explanation": f"Experience {exp_idx+1}: {issue['explanation']} | Suggestion: {issue['suggestion']} | Context: {bullet_text}",
+                "claim_fingerprint": self._bullet_fingerprint(experience, bullet_text)
+            }
+
+        rules = rules or FactRules(knowledge_base)
+
+        # No evidence at all: one flag for the position, nothing for Claude to check against
+        position_issue = rules.check_position(experience, relevant_entries)
+        if position_issue:
+            return [{
+                "resume_version_id": resume_version_id,
+                "user_id": user_id,
+                "flagged_content": position_issue['claim'],
+                "flag_reason": position_issue['reason'],
+                "severity": position_issue['severity'],
+                "explanation": f"Experience {exp_idx+1}: {position_issue['explanation']} | Suggestion: {position_issue['suggestion']}",
+                "claim_fingerprint": self._position_fingerprint(experience)
+            }]
+
+        # Settle bullets locally; Claude only sees the ambiguous ones
+        local_flags = []
+        ambiguous = []
+        for bullet in experience['bullets']:
+            verdict = rules.check_bullet(bullet, experience, relevant_entries)
+            local_flags.extend(to_flag(issue, bullet) for issue in verdict['issues'])
+            if verdict['status'] == AMBIGUOUS:
+                ambiguous.append(bullet)
+
+        print(f"Experience {exp_idx+1}: {len(experience['bullets']) - len(ambiguous)}/{len(experience['bullets'])} bullets settled by rules")
+        if not ambiguous:
+            return local_flags
+        experience = {**experience, 'bullets': ambiguous}
 
         evidence = "\n".join([
             f"- {entry['title']}: {entry['content']}"
@@ -320,55 +625,62 @@ For each unsupported bullet or claim, return:
 
 Return JSON array. If all bullets supported, return: []"""
 
-        message = self.claude.messages.create(
-            model="claude-3-5-sonnet-20241022",
-            max_tokens=1500,
-            messages=[{"role": "user", "content": prompt}]
-        )
+        response_text = (await self.llm.complete(prompt, max_tokens=1500)).strip()
 
-        response_text = message.content[0].text.strip()
+        issues = self._parse_issues(response_text, f"experience {exp_idx+1}")
+        flags = []
+        for issue in issues:
+            bullet_idx = issue.get('bullet_index', 0)
+            bullet_text = experience['bullets'][bullet_idx] if bullet_idx < len(experience['bullets']) else ""
+            flags.append(to_flag(issue, bullet_text))
+        return self._merge_flags(local_flags, flags)
+
+    @staticmethod
+    def _merge_flags(local_flags: List[Dict], claude_flags: List[Dict]) -> List[Dict]:
+        """Local flags plus Claude's, minus Claude's repeats of a local finding"""
+        seen = {
+            (flag['claim_fingerprint'], flag['flagged_content'], flag['flag_reason'])
+            for flag in local_flags
+        }
+        return local_flags + [
+            flag for flag in claude_flags
+            if (flag['claim_fingerprint'], flag['flagged_content'], flag['flag_reason']) not in seen
+        ]
+
+    def _parse_issues(self, response_text: str, section: str) -> List[Dict]:
+        """
+        Parse Claude's JSON array of issues
+
+        Raises:
+            ValueError: The response is not a JSON array. The caller's section
+            is then reported as incomplete and its claims are not marked checked,
+            instead of an unreadable reply passing as "no issues".
+        """
+        if response_text.startswith('```json'):
+            response_text = response_text.split('```json')[1].split('```')[0].strip()
+        elif response_text.startswith('```'):
+            response_text = response_text.split('```')[1].split('```')[0].strip()
 
-        import json
         try:
             issues = json.loads(response_text)
-            flags = []
-            for issue in issues:
-                bullet_idx = issue.get('bullet_index', 0)
-                bullet_text = experience['bullets'][bullet_idx] if bullet_idx < len(experience['bullets']) else ""
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Unreadable fact check response for {section}: {str(e)}")
 
-                flags.append({
-                    "resume_version_id": resume_version_id,
-                    "user_id": user_id,
-                    "flagged_content": issue['claim'],
-                    "flag_reason": issue['reason'],
-                    "severity": issue['severity'],
-                    "explanation": f"Experience {exp_idx+1}: {issue['explanation']} | Suggestion: {issue['suggestion']} | Context: {bullet_text}"
-                })
-            return flags
-        except:
-            return []
+        if not isinstance(issues, list):
+            raise ValueError(f"Fact check response for {section} is not a JSON array")
+        return issues
 
     async def _verify_skills(
         self,
         skills: Dict[str, List[str]],
         knowledge_base: List[Dict],
         resume_version_id: str,
-        user_id: str
+        user_id: str,
+        text_index: Optional[KnowledgeTextIndex] = None
     ) -> List[Dict]:
-        """Verify skills against knowledge base evidence"""
+        """Verify skills against knowledge base evidence (exact, alias or fuzzy match)"""
 
-        # Get all skills from knowledge base
-        kb_skills = [
-            entry['title']
-            for entry in knowledge_base
-            if entry['knowledge_type'] == 'skill'
-        ]
-
-        # Also check if skills are mentioned in accomplishments/experiences
-        all_kb_text = " ".join([
-            str(entry.get('content', '')) + " " + str(entry.get('title', ''))
-            for entry in knowledge_base
-        ]).lower()
+        text_index = text_index or KnowledgeTextIndex(knowledge_base)
 
         flags = []
         all_resume_skills = []
@@ -377,20 +689,27 @@ Return JSON array. If all bullets supported, return: []"""
 
         # Check each skill
         for skill in all_resume_skills:
-            skill_lower = skill.lower()
+            evidence = text_index.find_skill(skill)
 
-            # Check if skill is in knowledge base or mentioned in evidence
-            in_kb_skills = any(skill_lower in kb_skill.lower() for kb_skill in kb_skills)
-            mentioned_in_evidence = skill_lower in all_kb_text
-
-            if not in_kb_skills and not mentioned_in_evidence:
+            if not evidence['entity_ids']:
                 flags.append({
                     "resume_version_id": resume_version_id,
                     "user_id": user_id,
                     "flagged_content": skill,
                     "flag_reason": "no_evidence",
                     "severity": "low",
-                    "explanation": f"Skill '{skill}' not found in knowledge base. Consider adding evidence through accomplishments or remove if not applicable."
+                    "explanation": f"Skill '{skill}' not found in knowledge base. Consider adding evidence through accomplishments or remove if not applicable.",
+                    "claim_fingerprint": self._fingerprint("skill", skill)
+                })
+            elif evidence['match'] == 'fuzzy':
+                flags.append({
+                    "resume_version_id": resume_version_id,
+                    "user_id": user_id,
+                    "flagged_content": skill,
+                    "flag_reason": "weak_evidence",
+                    "severity": "low",
+                    "explanation": f"Skill '{skill}' only loosely matches '{evidence['matched']}' in knowledge base. Check the spelling or add evidence.",
+                    "claim_fingerprint": self._fingerprint("skill", skill)
                 })
 
         return flags
@@ -429,7 +748,8 @@ Return JSON array. If all bullets supported, return: []"""
                     "flagged_content": f"{degree} from {institution}",
                     "flag_reason": "no_evidence",
                     "severity": "high",
-                    "explanation": "No evidence of this degree in knowledge base. Add education entry or verify accuracy."
+                    "explanation": "No evidence of this degree in knowledge base. Add education entry or verify accuracy.",
+                    "claim_fingerprint": self._fingerprint("education", degree, institution)
                 })
 
         return flags
@@ -466,11 +786,32 @@ Return JSON array. If all bullets supported, return: []"""
                     "flagged_content": cert_name,
                     "flag_reason": "no_evidence",
                     "severity": "high",
-                    "explanation": "No evidence of this certification in knowledge base. Add certification or remove from resume."
+                    "explanation": "No evidence of this certification in knowledge base. Add certification or remove from resume.",
+                    "claim_fingerprint": self._fingerprint("certification", cert_name)
                 })
 
         return flags
 
+    def _summary_evidence(self, knowledge_base: List[Dict]) -> List[Dict]:
+        """Entries the summary is checked against"""
+        return [
+            entry for entry in knowledge_base
+            if entry['knowledge_type'] in ['accomplishment', 'experience', 'metric']
+        ]
+
+    def _experience_evidence(self, experience: Dict, knowledge_base: List[Dict]) -> List[Dict]:
+        """Accomplishments, stories and metrics for a position's company or time period"""
+        company = experience.get('company', '')
+        start_date = experience.get('start_date', '')
+        end_date = experience.get('end_date', '')
+
+        return [
+            entry for entry in knowledge_base
+            if (entry['knowledge_type'] in ['accomplishment', 'story', 'metric'])
+            and (company.lower() in str(entry.get('content', '')).lower() or
+                 self._date_overlaps(entry.get('date_range'), start_date, end_date))
+        ]
+
     def _date_overlaps(self, date_range: str, start_date: str, end_date: str) -> bool:
         """Check if a date range overlaps with given dates"""
         if not date_range or not start_date:
@@ -496,7 +837,26 @@ Return JSON array. If all bullets supported, return: []"""
         try:
             self.supabase.table("truth_check_flags").insert(flags).execute()
         except Exception as e:
-            print(f"Error storing flags: {e}")
+            if "claim_fingerprint" not in str(e):
+                print(f"Error storing flags: {e}")
+                return
+            # Migration 007 not applied yet: store without fingerprints
+            print("truth_check_flags.claim_fingerprint missing, storing flags without fingerprints")
+            try:
+                stripped = [{k: v for k, v in flag.items() if k != "claim_fingerprint"} for flag in flags]
+                self.supabase.table("truth_check_flags").insert(stripped).execute()
+            except Exception as retry_error:
+                print(f"Error storing flags: {retry_error}")
+
+    async def _delete_flags(self, flag_ids: List[str]) -> None:
+        """Remove flags superseded by a re-check"""
+        try:
+            self.supabase.table("truth_check_flags")\
+                .delete()\
+                .in_("id", flag_ids)\
+                .execute()
+        except Exception as e:
+            print(f"Error deleting flags: {e}")
 
     async def get_flags_for_resume(self, resume_version_id: str) -> List[Dict]:
         """Retrieve all flags for a resume version"""
@@ -0,0 +1,260 @@
+"""
+Fact Index
+Per-user TF-IDF index over confirmed knowledge entities for fact retrieval
+"""
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from collections import Counter, defaultdict
+import hashlib
+import math
+import os
+import threading
+from dotenv import load_dotenv
+from .keyword_index import tokenize
+from ..utils.cache import TTLLRUCache
+
+load_dotenv()
+
+# Facts handed to Claude for the final pick
+FACT_SHORTLIST_SIZE = int(os.getenv("FACT_SHORTLIST_SIZE", "40"))
+
+# Words that say nothing about which facts are relevant
+STOPWORDS = {
+    "a", "an", "and", "the", "of", "for", "to", "in", "on", "at", "with", "as",
+    "by", "or", "my", "me", "i", "im", "am", "is", "are", "be", "this", "that",
+    "role", "position", "job", "apply", "applying", "application", "resume",
+    "want", "looking", "emphasize", "focus",
+}
+
+
+def entity_text(entity: Dict[str, Any]) -> str:
+    """
+    Searchable text of an entity
+
+    Accepts both raw knowledge_entities rows (description/structured_data)
+    and knowledge base entries (content/knowledge_type); both produce the
+    same text for the same fact.
+    """
+    content = entity.get('content')
+    if content is None:
+        content = entity.get('structured_data') or {'description': entity.get('description', '')}
+
+    parts = [entity.get('title') or '']
+    if isinstance(content, dict):
+        parts.extend(str(value) for value in content.values() if value)
+    else:
+        parts.append(str(content))
+    parts.extend(str(tag) for tag in entity.get('tags') or [])
+    return "\n".join(parts)
+
+
+def terms_of(text: str) -> List[str]:
+    """Stemmed, stopword-free terms"""
+    return [term for term, _ in tokenize(text) if term not in STOPWORDS]
+
+
+class UserFactIndex:
+    """
+    Inverted TF-IDF index for one user's facts
+
+    Entities are added, replaced and removed one at a time; document norms
+    (which depend on IDF) are recomputed lazily on the next search.
+    """
+
+    def __init__(self):
+        self.entities: Dict[str, Dict[str, Any]] = {}
+        self.fingerprints: Dict[str, str] = {}
+        self.term_counts: Dict[str, Counter] = {}
+        self.postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self.doc_freq: Counter = Counter()
+        self.norms: Dict[str, float] = {}
+        self.norms_stale = True
+        self.lock = threading.Lock()
+
+    def upsert(self, entity: Dict[str, Any]) -> bool:
+        """Index or re-index an entity; returns False if it was already current"""
+        entity_id = entity['id']
+        text = entity_text(entity)
+        fingerprint = hashlib.md5(text.encode("utf-8")).hexdigest()
+
+        if self.fingerprints.get(entity_id) == fingerprint:
+            self.entities[entity_id] = entity
+            return False
+
+        self.remove(entity_id)
+
+        counts = Counter(terms_of(text))
+        self.entities[entity_id] = entity
+        self.fingerprints[entity_id] = fingerprint
+        self.term_counts[entity_id] = counts
+        for term, count in counts.items():
+            self.postings[term][entity_id] = count
+            self.doc_freq[term] += 1
+
+        self.norms_stale = True
+        return True
+
+    def remove(self, entity_id: str) -> None:
+        counts = self.term_counts.pop(entity_id, None)
+        self.entities.pop(entity_id, None)
+        self.fingerprints.pop(entity_id, None)
+        if counts is None:
+            return
+
+        for term in counts:
+            self.postings[term].pop(entity_id, None)
+            self.doc_freq[term] -= 1
+            if self.doc_freq[term] <= 0:
+                del self.doc_freq[term]
+                del self.postings[term]
+
+        self.norms_stale = True
+
+    def remove_children(self, parent_id: str) -> None:
+        """Drop entities whose parent was deleted (the database cascades)"""
+        for entity_id, entity in list(self.entities.items()):
+            if entity.get('parent_id') == parent_id:
+                self.remove_children(entity_id)
+                self.remove(entity_id)
+
+    def sync(self, entities: Iterable[Dict[str, Any]]) -> int:
+        """
+        Make the index hold exactly these entities
+
+        Unchanged entities cost one hash; only new or edited ones are
+        re-tokenized. Returns the number of entities (re)indexed.
+        """
+        changed = 0
+        seen = set()
+        for entity in entities:
+            seen.add(entity['id'])
+            if self.upsert(entity):
+                changed += 1
+
+        for entity_id in set(self.entities) - seen:
+            self.remove(entity_id)
+            changed += 1
+
+        return changed
+
+    def _idf(self, term: str) -> float:
+        return math.log((1 + len(self.entities)) / (1 + self.doc_freq.get(term, 0))) + 1
+
+    def _refresh_norms(self) -> None:
+        self.norms = {
+            entity_id: math.sqrt(sum((count * self._idf(term)) ** 2 for term, count in counts.items())) or 1.0
+            for entity_id, counts in self.term_counts.items()
+        }
+        self.norms_stale = False
+
+    def search(self, query: str, k: int) -> List[Tuple[Dict[str, Any], float]]:
+        """Top-k entities by cosine similarity to the query (score > 0 only)"""
+        if self.norms_stale:
+            self._refresh_norms()
+
+        scores: Dict[str, float] = defaultdict(float)
+        for term, query_count in Counter(terms_of(query)).items():
+            if term not in self.postings:
+                continue
+            idf = self._idf(term)
+            for entity_id, count in self.postings[term].items():
+                scores[entity_id] += query_count * count * idf * idf
+
+        ranked = sorted(
+            ((entity_id, score / self.norms[entity_id]) for entity_id, score in scores.items()),
+            key=lambda item: item[1],
+            reverse=True
+        )
+        return [(self.entities[entity_id], score) for entity_id, score in ranked[:k]]
+
+
+class FactIndexService:
+    """
+    Retrieval over each user's confirmed facts
+
+    Indexes live in-process (LRU by user). KnowledgeGraphService pushes
+    confirm / update / delete changes in; every search also syncs against
+    the entity list the caller already fetched, so edits made by another
+    worker process are picked up on the next search.
+    """
+
+    def __init__(self, max_users: int = 256):
+        self.indexes = TTLLRUCache(maxsize=max_users)
+        self._create_lock = threading.Lock()
+
+    def _index_for(self, user_id: str, create: bool = True) -> Optional[UserFactIndex]:
+        index = self.indexes.get(user_id)
+        if index is None and create:
+            with self._create_lock:
+                index = self.indexes.get(user_id)
+                if index is None:
+                    index = UserFactIndex()
+                    self.indexes.set(user_id, index)
+        return index
+
+    def shortlist(
+        self,
+        user_id: str,
+        query: str,
+        entities: List[Dict[str, Any]],
+        k: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Most relevant entities for a query
+
+        Args:
+            user_id: Owner of the entities
+            query: Prompt / target role, optionally with expanded keywords
+            entities: The user's current confirmed entities (raw rows or
+                knowledge base entries)
+            k: Shortlist size (default FACT_SHORTLIST_SIZE)
+
+        Returns:
+            Up to k entities: matches by score, then the remaining
+            entities in their original order to fill the list
+        """
+        k = k or FACT_SHORTLIST_SIZE
+        if len(entities) <= k:
+            return list(entities)
+
+        index = self._index_for(user_id)
+        with index.lock:
+            changed = index.sync(entities)
+            matches = index.search(query, k)
+
+        if changed:
+            print(f"Fact index for {user_id}: {changed} entities (re)indexed")
+
+        shortlist = [entity for entity, _ in matches]
+        if len(shortlist) < k:
+            chosen = {entity['id'] for entity in shortlist}
+            shortlist.extend(
+                entity for entity in entities if entity['id'] not in chosen
+            )
+            shortlist = shortlist[:k]
+
+        return shortlist
+
+    def upsert_entities(self, user_id: str, entities: List[Dict[str, Any]]) -> None:
+        """Index confirmed entities and drop unconfirmed ones (no-op if the user isn't indexed yet)"""
+        index = self._index_for(user_id, create=False)
+        if index is None:
+            return
+        with index.lock:
+            for entity in entities:
+                if entity.get('is_confirmed') is False:
+                    index.remove(entity['id'])
+                else:
+                    index.upsert(entity)
+
+    def remove_entity(self, user_id: str, entity_id: str) -> None:
+        """Remove an entity and its children"""
+        index = self._index_for(user_id, create=False)
+        if index is None:
+            return
+        with index.lock:
+            index.remove_children(entity_id)
+            index.remove(entity_id)
+
+
+# Singleton instance
+fact_index = FactIndexService()
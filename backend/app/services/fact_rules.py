@@ -0,0 +1,421 @@
+"""
+Fact Rules
+Deterministic checks that settle easy resume claims without calling Claude
+"""
+from typing import Any, Dict, List, Optional, Set, Tuple
+from datetime import date
+from itertools import combinations
+import re
+from .fact_index import entity_text, terms_of
+from .keyword_index import KeywordIndex, keyword_terms
+
+SUPPORTED = "supported"
+UNSUPPORTED = "unsupported"
+AMBIGUOUS = "ambiguous"
+
+# "$1.2M", "40%", "1,500", "3.5", "10+"
+QUANTITY_PATTERN = re.compile(
+    r"(?<![\w.])(?P<currency>[$€£])?\s?(?P<number>\d{1,3}(?:,\d{3})+|\d+(?:\.\d+)?)"
+    r"\s?(?P<suffix>%|percent\b|k\b|mm?\b|bn?\b|thousand\b|million\b|billion\b)?(?P<plus>\+)?",
+    re.IGNORECASE
+)
+
+MULTIPLIERS = {
+    "k": 1e3, "thousand": 1e3,
+    "m": 1e6, "mm": 1e6, "million": 1e6,
+    "b": 1e9, "bn": 1e9, "billion": 1e9,
+}
+
+# "team of 8", "12 engineers", "a 5-person team"
+TEAM_BEFORE = re.compile(r"\b(?:team|staff|group|department|organization|crew) of\s*$", re.IGNORECASE)
+TEAM_AFTER = re.compile(
+    r"^[\s-]*(?:person|member|people|engineers?|developers?|designers?|analysts?|"
+    r"(?:direct )?reports|employees|teachers|staff|managers|contractors|volunteers|students|"
+    r"scientists|specialists|consultants|agents|representatives)\b",
+    re.IGNORECASE
+)
+TENURE_AFTER = re.compile(r"^\s*(?:years?|yrs)\b", re.IGNORECASE)
+
+YEAR_RANGE = (1950, 2099)
+
+# Kinds whose absence from the whole knowledge base is a finding in itself;
+# plain numbers may be version numbers, counts of things etc. and go to Claude
+STRICT_KINDS = {"percent", "currency", "team"}
+
+# Ordinary resume vocabulary that claims nothing checkable by itself: generic
+# work verbs, generic nouns and connecting words. Every other word of a
+# claim (what was changed, ownership like "led" / "managed", scope like
+# "company-wide") must appear in a single evidence entry for the claim to
+# be settled locally.
+NEUTRAL_TERMS = {
+    term
+    for word in [
+        "experience", "experienced", "years", "skills", "skilled", "including", "using", "used",
+        "tools", "technologies", "built", "rebuilt", "developed", "created", "designed",
+        "implemented", "delivered", "launched", "shipped", "wrote", "maintained", "supported",
+        "worked", "helped", "contributed", "collaborated", "partnered", "deployed", "integrated",
+        "tested", "documented", "automated", "optimized", "streamlined", "handled",
+        "service", "services", "system", "systems", "application", "applications", "features",
+        "processes", "solutions", "projects", "new", "existing", "internal", "key", "multiple",
+        "various", "daily", "weekly", "monthly", "annual", "from", "into", "over", "per", "across",
+        "through", "within", "while", "via", "than", "more", "less", "up", "total", "approximately",
+        "about", "resulting", "result", "time", "users", "customers", "clients",
+    ]
+    for term in keyword_terms(word)
+}
+
+# Words that mean the same thing once stemmed terms are compared. Irregular
+# past tenses don't stem ("led" / "leading"), and figures go up or down
+# whichever verb is used ("cut latency 40%" backs "reduced latency by 40%").
+CANONICAL_TERMS = {
+    **{term: "lead" for term in ("led",)},
+    **{term: "grow" for term in ("grew", "grown")},
+    **{term: "driv" for term in ("drov",)},
+    **{term: "run" for term in ("ran",)},
+    **{term: "overs" for term in ("oversaw", "overse")},
+    **{term: "teach" for term in ("taught",)},
+    **{term: "<down>" for word in ["reduce", "reduced", "cut", "cutting", "decreased", "lowered",
+                                    "shrank", "saved", "trimmed", "eliminated"]
+       for term in keyword_terms(word)},
+    **{term: "<up>" for word in ["increased", "improved", "boosted", "raised", "grew", "growing",
+                                  "expanded", "doubled", "tripled"]
+       for term in keyword_terms(word)},
+}
+
+
+def canonical_terms(text: str) -> Set[str]:
+    """Stemmed, stopword-free, non-numeric terms with synonyms merged"""
+    return {
+        CANONICAL_TERMS.get(term, term)
+        for term in terms_of(text)
+        if not term[0].isdigit()
+    }
+
+
+class Quantity:
+    """A number in a claim and what it measures"""
+
+    def __init__(self, kind: str, value: float, text: str):
+        self.kind = kind
+        self.value = value
+        self.text = text
+
+    @property
+    def key(self) -> Tuple[str, float]:
+        """Lookup key: percentages only match percentages, amounts match amounts"""
+        group = "percent" if self.kind == "percent" else "amount"
+        return group, float(f"{self.value:.3g}")
+
+
+def extract_quantities(text: str) -> List[Quantity]:
+    """Numbers, percentages, currency amounts, team sizes, tenures and years in a text"""
+    quantities = []
+
+    for match in QUANTITY_PATTERN.finditer(text):
+        number = match.group("number")
+        suffix = (match.group("suffix") or "").lower()
+        value = float(number.replace(",", ""))
+
+        if suffix in ("%", "percent"):
+            kind = "percent"
+        elif match.group("currency"):
+            kind = "currency"
+        elif TEAM_BEFORE.search(text[max(0, match.start() - 30):match.start()]) or \
+                (not suffix and TEAM_AFTER.match(text[match.end():match.end() + 30])):
+            kind = "team"
+        elif not suffix and TENURE_AFTER.match(text[match.end():match.end() + 10]):
+            kind = "tenure"
+        elif not suffix and not match.group("plus") and len(number) == 4 and \
+                YEAR_RANGE[0] <= value <= YEAR_RANGE[1]:
+            kind = "year"
+        else:
+            kind = "number"
+
+        if suffix in MULTIPLIERS:
+            value *= MULTIPLIERS[suffix]
+
+        quantities.append(Quantity(kind, value, match.group(0).strip()))
+
+    return quantities
+
+
+def parse_year(value: Optional[str]) -> Optional[int]:
+    """Year of an ISO-ish date string ("" / "Present" -> None)"""
+    match = re.search(r"\d{4}", value or "")
+    if not match:
+        return None
+    year = int(match.group(0))
+    return year if year < 9999 else None
+
+
+class EvidenceView:
+    """Words and quantities of one set of evidence entries"""
+
+    def __init__(self, entries: List[Dict[str, Any]]):
+        texts = [entity_text(entry) for entry in entries]
+        self.is_empty = not entries
+        # Per entry: (terms, quantity keys), so a claim's words and figures
+        # can be required to come from the same accomplishment
+        self.entries = [
+            (canonical_terms(text), {q.key for q in extract_quantities(text) if q.kind != "year"})
+            for text in texts
+        ]
+        quantities = [quantity for quantity in extract_quantities("\n".join(texts)) if quantity.kind != "year"]
+        self.quantities = {quantity.key for quantity in quantities}
+        self._figures = quantities
+        self._derived: Optional[Tuple[Set[int], Set[Tuple[str, float]]]] = None
+
+    def backs(self, terms: Set[str], quantity_keys: Set[Tuple[str, float]]) -> bool:
+        """Whether one entry contains all of the terms and figures"""
+        return any(terms <= entry_terms and quantity_keys <= entry_keys for entry_terms, entry_keys in self.entries)
+
+    def derivable(self, quantity: Quantity) -> bool:
+        """
+        Whether a figure could have been computed from two evidence figures
+
+        Percentages: change or ratio between two amounts ($100k -> $60k is
+        "40%"), or the difference of two percentages. Amounts and team sizes:
+        sum or difference of two amounts.
+        """
+        if self._derived is None:
+            percents, amounts = set(), set()
+            values = [q.value for q in self._figures if q.kind != "percent" and q.value > 0]
+            for a, b in combinations(values, 2):
+                if a == b:
+                    continue
+                low, high = sorted((a, b))
+                percents.update({
+                    round((high - low) / high * 100),
+                    round((high - low) / low * 100),
+                    round(high / low * 100)
+                })
+                amounts.update({Quantity("number", high - low, "").key, Quantity("number", high + low, "").key})
+            shares = [q.value for q in self._figures if q.kind == "percent"]
+            for a, b in combinations(shares, 2):
+                percents.add(round(abs(a - b)))
+            self._derived = (percents, amounts)
+
+        percents, amounts = self._derived
+        if quantity.kind == "percent":
+            return any(round(quantity.value) + delta in percents for delta in (-1, 0, 1))
+        return quantity.key in amounts
+
+
+class FactRules:
+    """
+    Rule engine over one user's knowledge base
+
+    Built once per verification run. Each claim gets a verdict:
+
+    - supported: every number / percentage / amount / team size appears
+      in the claim's evidence, dates fit the position, and every remaining
+      word is a known skill, ordinary resume vocabulary (NEUTRAL_TERMS) or
+      found together with the others in one evidence entry
+    - unsupported: only deterministic findings (a percentage, dollar figure
+      or team size that appears nowhere in the knowledge base and can't
+      have been derived from its figures, a year outside the position);
+      flagged locally
+    - ambiguous: anything else; these go to Claude, together with any
+      local findings they have
+    """
+
+    def __init__(self, knowledge_base: List[Dict[str, Any]]):
+        self.kb = EvidenceView(knowledge_base)
+        self.views: Dict[Tuple[str, ...], EvidenceView] = {}
+
+        # Skill index: stemmed term sequences of every confirmed skill
+        self.skills = [
+            (entry.get('title', ''), keyword_terms(entry.get('title', '')))
+            for entry in knowledge_base
+            if entry.get('knowledge_type') == 'skill'
+        ]
+        self.skills = [(title, terms) for title, terms in self.skills if terms]
+
+        self.career_years = self._career_years(knowledge_base)
+
+    def _career_years(self, knowledge_base: List[Dict[str, Any]]) -> Optional[int]:
+        """Years from the earliest dated experience to the latest (or today)"""
+        starts, ends = [], []
+        current_year = date.today().year
+        for entry in knowledge_base:
+            if entry.get('knowledge_type') != 'experience' or not entry.get('date_range'):
+                continue
+            bounds = entry['date_range'].strip('[]()').split(',')
+            start = parse_year(bounds[0])
+            if start is None or start <= 1900:
+                continue
+            starts.append(start)
+            end = parse_year(bounds[1]) if len(bounds) > 1 else None
+            ends.append(min(end or current_year, current_year))
+
+        if not starts:
+            return None
+        return max(ends) - min(starts)
+
+    def view(self, entries: List[Dict[str, Any]]) -> EvidenceView:
+        """Evidence view for a set of entries (cached by entry ids)"""
+        key = tuple(str(entry.get('id')) for entry in entries)
+        if key not in self.views:
+            self.views[key] = EvidenceView(entries)
+        return self.views[key]
+
+    def _skill_terms(self, claim_index: KeywordIndex) -> set:
+        """Terms of the claim covered by known skills"""
+        covered = set()
+        for title, terms in self.skills:
+            if claim_index.find(title):
+                covered.update(terms)
+        return covered
+
+    def _words_backed(self, claim: str, evidence: EvidenceView, keys: Set[Tuple[str, float]]) -> bool:
+        """
+        Whether the claim's words outside skills and neutral vocabulary, and
+        its supported figures, all appear in one evidence entry
+        """
+        terms = canonical_terms(QUANTITY_PATTERN.sub(" ", claim))
+        terms -= self._skill_terms(KeywordIndex(claim))
+        terms -= NEUTRAL_TERMS
+        return not (terms or keys) or evidence.backs(terms, keys)
+
+    def _check_quantity(
+        self,
+        quantity: Quantity,
+        evidence: EvidenceView
+    ) -> Tuple[str, Optional[Dict[str, str]]]:
+        if quantity.key in evidence.quantities:
+            return SUPPORTED, None
+        if quantity.key in self.kb.quantities or quantity.kind not in STRICT_KINDS:
+            return AMBIGUOUS, None
+        if evidence.derivable(quantity) or self.kb.derivable(quantity):
+            # Computed from other figures; Claude checks the arithmetic and wording
+            return AMBIGUOUS, None
+
+        label = {"percent": "percentage", "currency": "dollar amount", "team": "team size"}[quantity.kind]
+        return UNSUPPORTED, {
+            "claim": quantity.text,
+            "reason": "quantification_unsupported",
+            "severity": "medium",
+            "explanation": f"The {label} '{quantity.text}' does not appear anywhere in the knowledge base",
+            "suggestion": "Add an accomplishment or metric that records this number, or remove it"
+        }
+
+    def _verdict(
+        self,
+        statuses: List[str],
+        issues: List[Dict],
+        claim: str,
+        evidence: EvidenceView,
+        keys: Set[Tuple[str, float]]
+    ) -> Dict[str, Any]:
+        # A local finding settles one part of the claim, not the rest of it
+        if AMBIGUOUS in statuses or not self._words_backed(claim, evidence, keys):
+            return {"status": AMBIGUOUS, "issues": issues}
+        if issues:
+            return {"status": UNSUPPORTED, "issues": issues}
+        return {"status": SUPPORTED, "issues": []}
+
+    def check_position(self, experience: Dict[str, Any], evidence_entries: List[Dict[str, Any]]) -> Optional[Dict[str, str]]:
+        """
+        Position-level finding: no evidence at all for the position
+
+        Returns:
+            One issue for the whole position (instead of one per bullet), or None
+        """
+        if evidence_entries:
+            return None
+        position = f"{experience.get('title', '')} at {experience.get('company', '')}"
+        return {
+            "claim": position,
+            "reason": "no_evidence",
+            "severity": "high",
+            "explanation": f"No evidence in the knowledge base for the position at {experience.get('company', '')}",
+            "suggestion": "Add accomplishments for this position or remove its bullets"
+        }
+
+    def check_bullet(
+        self,
+        bullet: str,
+        experience: Dict[str, Any],
+        evidence_entries: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """
+        Verdict for one experience bullet
+
+        Args:
+            bullet: Bullet text
+            experience: The position (title, company, start_date, end_date)
+            evidence_entries: Accomplishments/stories/metrics for the position
+
+        Returns:
+            {"status": supported|unsupported|ambiguous, "issues": [issue dicts
+            in the same shape Claude returns]}. Ambiguous verdicts can carry
+            issues too: the claim still goes to Claude for its other parts.
+        """
+        evidence = self.view(evidence_entries)
+
+        start_year = parse_year(experience.get('start_date'))
+        end_year = parse_year(experience.get('end_date')) or date.today().year
+
+        statuses, issues, keys = [], [], set()
+        for quantity in extract_quantities(bullet):
+            if quantity.kind == "year":
+                if start_year and not start_year <= quantity.value <= end_year:
+                    issues.append({
+                        "claim": quantity.text,
+                        "reason": "date_mismatch",
+                        "severity": "medium",
+                        "explanation": f"{quantity.text} falls outside this position ({start_year}-{end_year})",
+                        "suggestion": "Move the claim to the right position or correct the year"
+                    })
+                continue
+
+            status, issue = self._check_quantity(quantity, evidence)
+            statuses.append(status)
+            if status == SUPPORTED:
+                keys.add(quantity.key)
+            if issue:
+                issues.append(issue)
+
+        return self._verdict(statuses, issues, bullet, evidence, keys)
+
+    def check_sentence(self, sentence: str, evidence_entries: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Verdict for one summary sentence
+
+        Same rules as bullets, plus "N years of experience" is checked
+        against the span of dated experience in the knowledge base.
+        """
+        evidence = self.view(evidence_entries)
+
+        statuses, issues, keys = [], [], set()
+        for quantity in extract_quantities(sentence):
+            if quantity.kind == "year":
+                statuses.append(AMBIGUOUS)
+                continue
+
+            if quantity.kind == "tenure":
+                if self.career_years is None:
+                    statuses.append(AMBIGUOUS)
+                elif quantity.value > self.career_years + 1:
+                    issues.append({
+                        "claim": quantity.text + " years",
+                        "reason": "date_mismatch",
+                        "severity": "high",
+                        "explanation": f"Dated experience in the knowledge base spans about {self.career_years} years",
+                        "suggestion": f"Use at most {self.career_years}+ years or add the missing positions"
+                    })
+                continue
+
+            status, issue = self._check_quantity(quantity, evidence)
+            statuses.append(status)
+            if status == SUPPORTED:
+                keys.add(quantity.key)
+            if issue:
+                issues.append(issue)
+
+        return self._verdict(statuses, issues, sentence, evidence, keys)
+
+
+def split_sentences(text: str) -> List[str]:
+    """Sentences of a summary"""
+    return [sentence.strip() for sentence in re.split(r"(?<=[.!?])\s+", text or "") if sentence.strip()]
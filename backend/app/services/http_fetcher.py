@@ -0,0 +1,154 @@
+"""
+HTTP Fetcher
+Shared async client for fetching external pages (job postings, company sites)
+"""
+from typing import Any, Dict, Optional
+from collections import defaultdict
+from urllib.parse import urlparse
+import asyncio
+import os
+import httpx
+from dotenv import load_dotenv
+from ..utils.cache import TTLLRUCache
+
+load_dotenv()
+
+# Browser-like headers to avoid blocks
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+    'Accept-Encoding': 'gzip, deflate',
+}
+
+
+class HTTPFetcher:
+    """
+    Async page fetcher
+
+    - One keep-alive connection pool shared by all callers
+    - Per-host concurrency limit so bulk fetches don't hammer one site
+    - Conditional requests (ETag / Last-Modified) against an in-process cache
+    - Bodies are streamed and cut off at max_bytes
+    """
+
+    def __init__(
+        self,
+        timeout: Optional[float] = None,
+        max_connections: Optional[int] = None,
+        per_host_limit: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        cache_size: Optional[int] = None
+    ):
+        self.timeout = timeout or float(os.getenv("HTTP_FETCH_TIMEOUT_SECONDS", "10"))
+        self.max_connections = max_connections or int(os.getenv("HTTP_FETCH_MAX_CONNECTIONS", "20"))
+        self.per_host_limit = per_host_limit or int(os.getenv("HTTP_FETCH_PER_HOST", "4"))
+        self.max_bytes = max_bytes or int(os.getenv("HTTP_FETCH_MAX_BYTES", str(5 * 1024 * 1024)))
+
+        self.cache = TTLLRUCache(
+            maxsize=cache_size or int(os.getenv("HTTP_CACHE_MAX_ENTRIES", "256")),
+            ttl=float(os.getenv("HTTP_CACHE_TTL_SECONDS", str(24 * 3600)))
+        )
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = defaultdict(
+            lambda: asyncio.Semaphore(self.per_host_limit)
+        )
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Lazily build the pooled client"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                headers=DEFAULT_HEADERS,
+                timeout=self.timeout,
+                follow_redirects=True,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                    keepalive_expiry=30.0
+                )
+            )
+        return self._client
+
+    async def fetch(self, url: str) -> Dict[str, Any]:
+        """
+        GET a URL
+
+        Args:
+            url: Absolute http(s) URL
+
+        Returns:
+            Dict with status_code, text (None on failure), url (after
+            redirects), from_cache, truncated and error
+        """
+        result = {
+            "status_code": None,
+            "text": None,
+            "url": url,
+            "from_cache": False,
+            "truncated": False,
+            "error": None
+        }
+
+        cached = self.cache.get(url)
+        headers = {}
+        if cached:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+
+        host = urlparse(url).netloc.lower()
+
+        try:
+            async with self._host_semaphores[host]:
+                async with self.client.stream("GET", url, headers=headers) as response:
+                    result["status_code"] = response.status_code
+                    result["url"] = str(response.url)
+
+                    if response.status_code == 304 and cached:
+                        result.update(text=cached["text"], url=cached["url"], from_cache=True)
+                        return result
+
+                    if response.status_code != 200:
+                        result["error"] = f"Status {response.status_code}"
+                        return result
+
+                    body = bytearray()
+                    async for chunk in response.aiter_bytes():
+                        body.extend(chunk)
+                        if len(body) >= self.max_bytes:
+                            del body[self.max_bytes:]
+                            result["truncated"] = True
+                            break
+
+                    text = body.decode(response.encoding or "utf-8", errors="replace")
+                    result["text"] = text
+
+                    etag = response.headers.get("etag")
+                    last_modified = response.headers.get("last-modified")
+                    if (etag or last_modified) and not result["truncated"]:
+                        self.cache.set(url, {
+                            "etag": etag,
+                            "last_modified": last_modified,
+                            "text": text,
+                            "url": result["url"]
+                        })
+
+        except httpx.TimeoutException:
+            result["error"] = "Timeout"
+        except httpx.HTTPError as e:
+            result["error"] = f"Request error: {str(e)}"
+
+        return result
+
+    async def aclose(self) -> None:
+        """Close pooled connections (called on app shutdown)"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+# Singleton instance
+http_fetcher = HTTPFetcher()
@@ -1,17 +1,11 @@
 """Import Parser - Extract resume data from ChatGPT/Claude conversations"""
 
-from anthropic import Anthropic
-import os
-from dotenv import load_dotenv
 import json
-
-load_dotenv()
-
-CLAUDE_API_KEY = os.getenv("CLAUDE_API_KEY")
+from .llm_client import llm_client
 
 class ImportParser:
     def __init__(self):
-        self.client = Anthropic(api_key=CLAUDE_API_KEY)
+        self.llm = llm_client
 
     async def parse_conversation(self, conversation_text: str, source_platform: str = "unknown") -> dict:
         """Parse a conversation and extract resume-relevant data"""
@@ -79,15 +73,7 @@ Return a JSON object with this structure:
 
 Be thorough - extract EVERYTHING that could be useful for a resume."""
 
-        message = self.client.messages.create(
-            model="claude-3-5-sonnet-20241022",
-            max_tokens=4000,
-            messages=[
-                {"role": "user", "content": prompt}
-            ]
-        )
-
-        response_text = message.content[0].text
+        response_text = await self.llm.complete(prompt, max_tokens=4000)
 
         # Clean up JSON
         if response_text.startswith('```json'):
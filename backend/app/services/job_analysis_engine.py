@@ -0,0 +1,198 @@
+"""
+Job Analysis Engine
+Extracts every structured field from a job posting in a single Claude call
+"""
+from typing import Dict, Any, List, Tuple
+import json
+import re
+from .llm_client import llm_client
+
+# Job postings are truncated to this many characters before analysis. Every
+# caller uses the same limit so identical postings produce identical prompts
+# (and therefore hit the LLM response cache).
+ANALYSIS_TEXT_LIMIT = 8000
+
+KEYWORD_CATEGORIES = ["technical_skills", "soft_skills", "tools", "certifications", "other"]
+
+# field -> expected JSON type
+ANALYSIS_SCHEMA = {
+    "job_title": str,
+    "company": str,
+    "location": str,
+    "keywords": list,
+    "required_keywords": list,
+    "preferred_keywords": list,
+    "categorized_keywords": dict,
+    "requirements": dict
+}
+
+# Fields that may legitimately be null (not every posting names them)
+NULLABLE_FIELDS = {"company", "location"}
+
+FIELD_DESCRIPTIONS = {
+    "job_title": '"job_title": string, the exact position title',
+    "company": '"company": string or null, the hiring company name',
+    "location": '"location": string or null, "City, ST" / country, or "Remote"',
+    "keywords": '"keywords": array of the 15-25 most important ATS keywords (skills, tools, certifications, qualifications, industry terms)',
+    "required_keywords": '"required_keywords": array, the subset of keywords that are must-haves',
+    "preferred_keywords": '"preferred_keywords": array, the subset of keywords that are nice-to-haves',
+    "categorized_keywords": '"categorized_keywords": object with keys ' + ", ".join(KEYWORD_CATEGORIES) + ', each an array of keywords',
+    "requirements": '"requirements": object with "required" and "preferred" arrays of specific qualification statements'
+}
+
+
+class JobAnalysisEngine:
+    """
+    Consolidated job description analysis
+
+    Replaces the separate keyword / requirements / title / category /
+    company / location prompts with one JSON document. The response is
+    validated against ANALYSIS_SCHEMA and only fields that are missing or
+    malformed are re-requested.
+    """
+
+    def __init__(self):
+        self.llm = llm_client
+
+    async def analyze(self, job_description: str) -> Dict[str, Any]:
+        """
+        Analyze a job posting
+
+        Args:
+            job_description: Full text of the job posting
+
+        Returns:
+            Dictionary with every ANALYSIS_SCHEMA field (empty defaults for
+            anything the model could not provide)
+        """
+        text_sample = job_description[:ANALYSIS_TEXT_LIMIT]
+
+        analysis, missing = await self._request_fields(text_sample, list(ANALYSIS_SCHEMA))
+
+        # Fallback: re-ask only for what is missing
+        if missing:
+            print(f"Job analysis missing fields {missing}, re-requesting")
+            retry, missing = await self._request_fields(text_sample, missing)
+            analysis.update(retry)
+
+        for field in missing:
+            analysis[field] = self._default(field)
+
+        return analysis
+
+    async def _request_fields(
+        self,
+        text_sample: str,
+        fields: List[str]
+    ) -> Tuple[Dict[str, Any], List[str]]:
+        """Ask for a set of fields and return (valid fields, missing field names)"""
+        prompt = self._build_prompt(text_sample, fields)
+
+        try:
+            response_text = await self.llm.complete(prompt, max_tokens=2000, temperature=0)
+            data = self._parse_json(response_text)
+        except Exception as e:
+            print(f"Job analysis error: {str(e)}")
+            return {}, fields
+
+        valid = {}
+        missing = []
+        for field in fields:
+            value = self._validate_field(field, data.get(field))
+            if value is None and field not in NULLABLE_FIELDS:
+                missing.append(field)
+            else:
+                valid[field] = value
+
+        return valid, missing
+
+    def _build_prompt(self, text_sample: str, fields: List[str]) -> str:
+        field_lines = "\n".join(f"- {FIELD_DESCRIPTIONS[field]}" for field in fields)
+
+        return f"""Analyze this job posting for resume tailoring and ATS optimization.
+
+Job Posting:
+{text_sample}
+
+Return a single JSON object with exactly these fields:
+{field_lines}
+
+Use null for a company or location that is not stated. Extract actual requirements, not generic statements.
+Return ONLY the JSON object, nothing else."""
+
+    def _parse_json(self, response_text: str) -> Dict[str, Any]:
+        """Parse the JSON object out of a response (tolerates markdown fences)"""
+        text = response_text.strip()
+        if '```' in text:
+            text = text.split('```')[1]
+            if text.startswith('json'):
+                text = text[4:]
+
+        match = re.search(r'\{.*\}', text, re.DOTALL)
+        if not match:
+            raise ValueError("No JSON object in job analysis response")
+
+        data = json.loads(match.group(0))
+        if not isinstance(data, dict):
+            raise ValueError("Job analysis response is not a JSON object")
+        return data
+
+    def _validate_field(self, field: str, value: Any) -> Any:
+        """Coerce a field to its schema type, or return None if unusable"""
+        expected = ANALYSIS_SCHEMA[field]
+
+        if value is None or not isinstance(value, expected):
+            return None
+
+        if expected is str:
+            value = value.strip()
+            if not value or value.lower() in ("unknown", "not specified", "null", "n/a"):
+                return None
+            return value
+
+        if expected is list:
+            return self._clean_list(value)
+
+        if field == "requirements":
+            return {
+                "required": self._clean_list(value.get("required")),
+                "preferred": self._clean_list(value.get("preferred"))
+            }
+
+        if field == "categorized_keywords":
+            return {
+                category: self._clean_list(items)
+                for category, items in value.items()
+                if self._clean_list(items)
+            }
+
+        return value
+
+    def _clean_list(self, items: Any) -> List[str]:
+        """Strip, drop empties and de-duplicate while preserving order"""
+        if not isinstance(items, list):
+            return []
+
+        cleaned = []
+        seen = set()
+        for item in items:
+            if not isinstance(item, str):
+                continue
+            item = item.strip()
+            if item and item.lower() not in seen:
+                seen.add(item.lower())
+                cleaned.append(item)
+        return cleaned
+
+    def _default(self, field: str) -> Any:
+        if field == "requirements":
+            return {"required": [], "preferred": []}
+        if ANALYSIS_SCHEMA[field] is list:
+            return []
+        if ANALYSIS_SCHEMA[field] is dict:
+            return {}
+        return None
+
+
+# Singleton instance
+job_analysis_engine = JobAnalysisEngine()
@@ -3,14 +3,17 @@ Job Matcher Service
 Parses job descriptions, extracts keywords, calculates match scores
 """
 from typing import Dict, Any, List, Optional
-import anthropic
-import os
 import re
+import numpy as np
 from ..database import get_supabase
+from .llm_client import llm_client
+from .job_analysis_engine import job_analysis_engine
+from .keyword_index import get_keyword_index
 
 class JobMatcher:
     def __init__(self):
-        self.claude = anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+        self.llm = llm_client
+        self.analysis_engine = job_analysis_engine
         self.supabase = get_supabase()
 
         # Known ATS systems and their URL patterns
@@ -45,32 +48,27 @@ class JobMatcher:
         # 1. Detect ATS system from URL
         ats_system = self._detect_ats_system(job_url) if job_url else None
 
-        # 2. Extract keywords using Claude
-        keywords = await self._extract_keywords(job_description)
+        # 2. Extract title, keywords, categories and requirements in one call
+        analysis = await self.analysis_engine.analyze(job_description)
 
-        # 3. Extract requirements
-        requirements = await self._extract_requirements(job_description)
+        # 3. Prefer an explicit title line from the posting header
+        job_title = self._find_title_line(job_description) or analysis["job_title"] or ""
 
-        # 4. Extract job title
-        job_title = await self._extract_job_title(job_description)
-
-        # 5. Categorize keywords
-        categorized_keywords = await self._categorize_keywords(keywords)
-
-        # 6. Extract experience level
+        # 4. Extract experience level
         experience_level = self._extract_experience_level(job_description)
 
         return {
             "job_title": job_title,
-            "company": company_name,
+            "company": company_name or analysis["company"],
+            "location": analysis["location"],
             "ats_system": ats_system,
             "keywords": {
-                "all": keywords,
-                "categorized": categorized_keywords,
-                "required": categorized_keywords.get("required", []),
-                "preferred": categorized_keywords.get("preferred", [])
+                "all": analysis["keywords"],
+                "categorized": analysis["categorized_keywords"],
+                "required": analysis["required_keywords"],
+                "preferred": analysis["preferred_keywords"]
             },
-            "requirements": requirements,
+            "requirements": analysis["requirements"],
             "experience_level": experience_level,
             "job_url": job_url,
             "parsed_at": self._get_timestamp()
@@ -91,32 +89,26 @@ class JobMatcher:
         Returns:
             Match analysis with score and recommendations
         """
-        resume_lower = resume_text.lower()
         all_keywords = job_data['keywords']['all']
         required_keywords = job_data['keywords'].get('required', [])
         preferred_keywords = job_data['keywords'].get('preferred', [])
 
+        # Look up every keyword once against a token index of the resume
+        # (whole-word, stemmed: "Java" no longer matches "JavaScript")
+        index = get_keyword_index(resume_text)
+        occurrences = index.match(required_keywords + preferred_keywords + all_keywords)
+
+        def is_matched(keyword: str) -> bool:
+            return occurrences[keyword]["count"] > 0
+
         # Calculate keyword matches
-        matched_required = []
-        missing_required = []
-        for keyword in required_keywords:
-            if keyword.lower() in resume_lower:
-                matched_required.append(keyword)
-            else:
-                missing_required.append(keyword)
-
-        matched_preferred = []
-        for keyword in preferred_keywords:
-            if keyword.lower() in resume_lower:
-                matched_preferred.append(keyword)
-
-        matched_all = []
-        missing_all = []
-        for keyword in all_keywords:
-            if keyword.lower() in resume_lower:
-                matched_all.append(keyword)
-            else:
-                missing_all.append(keyword)
+        matched_required = [k for k in required_keywords if is_matched(k)]
+        missing_required = [k for k in required_keywords if not is_matched(k)]
+
+        matched_preferred = [k for k in preferred_keywords if is_matched(k)]
+
+        matched_all = [k for k in all_keywords if is_matched(k)]
+        missing_all = [k for k in all_keywords if not is_matched(k)]
 
         # Calculate scores
         required_score = (len(matched_required) / len(required_keywords) * 100) if required_keywords else 100
@@ -155,6 +147,66 @@ class JobMatcher:
             "ats_compatibility": self._get_ats_recommendations(job_data.get('ats_system'))
         }
 
+    def score_matrix(
+        self,
+        resume_texts: List[str],
+        job_keyword_sets: List[Dict[str, List[str]]]
+    ) -> Dict[str, np.ndarray]:
+        """
+        Score every resume against every job at once
+
+        Same formula as calculate_match_score, computed as matrix products:
+        each resume is indexed once, keywords from all jobs form one
+        vocabulary, and matched counts are presence @ weights.T.
+
+        Args:
+            resume_texts: Plain text of each resume
+            job_keyword_sets: Each job's keywords dict ("all", "required", "preferred")
+
+        Returns:
+            Dict of (resumes x jobs) arrays: match_score, required_match,
+            preferred_match, overall_match
+        """
+        # Keyword -> column, shared by all jobs
+        vocabulary: Dict[str, int] = {}
+        for keywords in job_keyword_sets:
+            for level in ('required', 'preferred', 'all'):
+                for keyword in keywords.get(level) or []:
+                    vocabulary.setdefault(keyword, len(vocabulary))
+
+        # presence[r, v] = 1 if resume r contains keyword v
+        presence = np.zeros((len(resume_texts), len(vocabulary)))
+        for row, text in enumerate(resume_texts):
+            occurrences = get_keyword_index(text).match(vocabulary)
+            presence[row] = [occurrences[keyword]["count"] > 0 for keyword in vocabulary]
+
+        def level_score(level: str, empty_score: float) -> np.ndarray:
+            # weights[j, v] = times keyword v is listed for job j at this level
+            weights = np.zeros((len(job_keyword_sets), len(vocabulary)))
+            for column, keywords in enumerate(job_keyword_sets):
+                for keyword in keywords.get(level) or []:
+                    weights[column, vocabulary[keyword]] += 1
+
+            totals = weights.sum(axis=1)
+            matched = presence @ weights.T
+            return np.divide(
+                matched * 100,
+                totals,
+                out=np.full(matched.shape, float(empty_score)),
+                where=totals > 0
+            )
+
+        required_score = level_score('required', 100)
+        preferred_score = level_score('preferred', 0)
+        overall_score = level_score('all', 0)
+
+        return {
+            "match_score": (required_score * 0.7) + (preferred_score * 0.2) + (overall_score * 0.1),
+            "required_match": required_score,
+            "preferred_match": preferred_score,
+            "overall_match": overall_score
+        }
+
     async def extract_keywords_with_ai(self, job_description: str) -> Dict[str, List[str]]:
         """
         Enhanced keyword extraction using AI
@@ -194,13 +246,7 @@ Rules:
 
 Return ONLY valid JSON, no markdown."""
 
-        message = self.claude.messages.create(
-            model="claude-3-5-sonnet-20241022",
-            max_tokens=800,
-            messages=[{"role": "user", "content": prompt}]
-        )
-
-        response_text = message.content[0].text.strip()
+        response_text = (await self.llm.complete(prompt, max_tokens=800, temperature=0)).strip()
 
         # Clean JSON
         if response_text.startswith('```json'):
@@ -262,13 +308,7 @@ Return in this EXACT JSON format:
 
 Return ONLY valid JSON, no markdown."""
 
-        message = self.claude.messages.create(
-            model="claude-3-5-sonnet-20241022",
-            max_tokens=1000,
-            messages=[{"role": "user", "content": prompt}]
-        )
-
-        response_text = message.content[0].text.strip()
+        response_text = (await self.llm.complete(prompt, max_tokens=1000, temperature=0)).strip()
 
         # Clean JSON
         if response_text.startswith('```json'):
@@ -281,90 +321,8 @@ Return ONLY valid JSON, no markdown."""
 
         return categorized_reqs
 
-    async def _extract_keywords(self, job_description: str) -> List[str]:
-        """
-        Extract key terms from job description (legacy method)
-        Use extract_keywords_with_ai() for enhanced extraction
-        """
-        prompt = f"""Extract 15-25 of the most important keywords from this job description.
-
-Focus on:
-1. Technical skills and tools
-2. Soft skills
-3. Certifications
-4. Industry terminology
-5. Job title variations
-6. Required qualifications
-
-Job Description:
-{job_description}
-
-Return ONLY a comma-separated list of keywords."""
-
-        message = self.claude.messages.create(
-            model="claude-3-5-sonnet-20241022",
-            max_tokens=500,
-            messages=[{"role": "user", "content": prompt}]
-        )
-
-        keywords_text = message.content[0].text
-        keywords = [k.strip() for k in keywords_text.split(',')]
-
-        return keywords
-
-    async def _extract_requirements(self, job_description: str) -> Dict[str, List[str]]:
-        """Extract required vs preferred qualifications"""
-        prompt = f"""Analyze this job description and separate requirements into two categories:
-
-1. REQUIRED qualifications (must-haves)
-2. PREFERRED qualifications (nice-to-haves)
-
-Job Description:
-{job_description}
-
-Return in this exact format:
-REQUIRED:
-- requirement 1
-- requirement 2
-
-PREFERRED:
-- preference 1
-- preference 2"""
-
-        message = self.claude.messages.create(
-            model="claude-3-5-sonnet-20241022",
-            max_tokens=800,
-            messages=[{"role": "user", "content": prompt}]
-        )
-
-        response = message.content[0].text
-
-        # Parse response
-        required = []
-        preferred = []
-
-        current_section = None
-        for line in response.split('\n'):
-            line = line.strip()
-            if line.startswith('REQUIRED'):
-                current_section = 'required'
-            elif line.startswith('PREFERRED'):
-                current_section = 'preferred'
-            elif line.startswith('-') or line.startswith('•'):
-                item = line.lstrip('-•').strip()
-                if current_section == 'required':
-                    required.append(item)
-                elif current_section == 'preferred':
-                    preferred.append(item)
-
-        return {
-            "required": required,
-            "preferred": preferred
-        }
-
-    async def _extract_job_title(self, job_description: str) -> str:
-        """Extract job title from description"""
-        # Try to find title in first few lines
+    def _find_title_line(self, job_description: str) -> Optional[str]:
+        """Find an explicit job title in the first few lines of the posting"""
         lines = job_description.split('\n')[:5]
 
         for line in lines:
@@ -375,53 +333,7 @@ PREFERRED:
             if len(line.split()) <= 5 and len(line) < 50:
                 return line.strip()
 
-        # Fall back to Claude if no clear title found
-        prompt = f"""What is the job title for this position? Return ONLY the job title, nothing else.
-
-{job_description[:500]}"""
-
-        message = self.claude.messages.create(
-            model="claude-3-5-sonnet-20241022",
-            max_tokens=50,
-            messages=[{"role": "user", "content": prompt}]
-        )
-
-        return message.content[0].text.strip()
-
-    async def _categorize_keywords(self, keywords: List[str]) -> Dict[str, List[str]]:
-        """Categorize keywords into technical, soft skills, etc."""
-        keywords_text = ", ".join(keywords)
-
-        prompt = f"""Categorize these keywords into: technical_skills, soft_skills, tools, certifications, other.
-
-Keywords: {keywords_text}
-
-Return in this format:
-technical_skills: keyword1, keyword2
-soft_skills: keyword3, keyword4
-tools: keyword5
-certifications: keyword6
-other: keyword7"""
-
-        message = self.claude.messages.create(
-            model="claude-3-5-sonnet-20241022",
-            max_tokens=500,
-            messages=[{"role": "user", "content": prompt}]
-        )
-
-        response = message.content[0].text
-
-        # Parse categorized keywords
-        categorized = {}
-        for line in response.split('\n'):
-            if ':' in line:
-                category, items = line.split(':', 1)
-                category = category.strip()
-                keyword_list = [k.strip() for k in items.split(',') if k.strip()]
-                if keyword_list:
-                    categorized[category] = keyword_list
-
-        return categorized
+        return None
 
     def _extract_experience_level(self, job_description: str) -> str:
         """Detect experience level from job description"""
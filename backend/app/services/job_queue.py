@@ -0,0 +1,467 @@
+"""
+Job Queue Service
+Background execution of long-running work (OCR, extraction, generation)
+with job state persisted to a local SQLite store
+"""
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+from datetime import datetime, timedelta
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import traceback
+import uuid
+from dotenv import load_dotenv
+
+load_dotenv()
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+INTERRUPTED = "interrupted"  # Was running when the server stopped
+
+TERMINAL_STATUSES = {SUCCEEDED, FAILED, CANCELLED, INTERRUPTED}
+
+# Handler signature: async handler(payload, progress) -> JSON-serializable result
+ProgressCallback = Callable[..., None]
+JobHandler = Callable[[Dict[str, Any], ProgressCallback], Awaitable[Any]]
+# Cleanup signature: cleanup(payload) -> None, run for jobs whose handler never ran
+JobCleanup = Callable[[Dict[str, Any]], None]
+
+
+class JobStore:
+    """SQLite persistence for job records (all methods are blocking)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                user_id TEXT,
+                status TEXT NOT NULL,
+                payload TEXT,
+                progress TEXT,
+                result TEXT,
+                error TEXT,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_user_idx ON jobs (user_id, created_at)")
+        self._conn.commit()
+
+    def insert(self, job: Dict[str, Any]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, kind, user_id, status, payload, progress, result, error, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    job["id"], job["kind"], job["user_id"], job["status"],
+                    _dumps(job["payload"]), _dumps(job["progress"]), None, None,
+                    job["created_at"], job["updated_at"]
+                )
+            )
+            self._conn.commit()
+
+    def update(self, job_id: str, expected_status: Optional[str] = None, **fields) -> bool:
+        """
+        Update a job's fields
+
+        Args:
+            expected_status: Only update if the job is currently in this status
+
+        Returns:
+            True if a row was changed
+        """
+        fields["updated_at"] = datetime.utcnow().isoformat()
+        for key in ("payload", "progress", "result"):
+            if key in fields:
+                fields[key] = _dumps(fields[key])
+
+        assignments = ", ".join(f"{key} = ?" for key in fields)
+        where, params = "id = ?", [job_id]
+        if expected_status is not None:
+            where += " AND status = ?"
+            params.append(expected_status)
+
+        with self._lock:
+            cursor = self._conn.execute(
+                f"UPDATE jobs SET {assignments} WHERE {where}",
+                (*fields.values(), *params)
+            )
+            self._conn.commit()
+        return cursor.rowcount == 1
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _row_to_job(row) if row else None
+
+    def list_for_user(self, user_id: str, limit: int = 50) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM jobs WHERE user_id = ? ORDER BY created_at DESC LIMIT ?",
+                (user_id, limit)
+            ).fetchall()
+        return [_row_to_job(row) for row in rows]
+
+    def list_by_status(self, status: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM jobs WHERE status = ? ORDER BY created_at", (status,)
+            ).fetchall()
+        return [_row_to_job(row) for row in rows]
+
+    def prune(self, older_than: str) -> int:
+        """Delete finished jobs last updated before the given ISO timestamp"""
+        placeholders = ", ".join("?" for _ in TERMINAL_STATUSES)
+        with self._lock:
+            cursor = self._conn.execute(
+                f"DELETE FROM jobs WHERE status IN ({placeholders}) AND updated_at < ?",
+                (*TERMINAL_STATUSES, older_than)
+            )
+            self._conn.commit()
+        return cursor.rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class JobQueue:
+    """
+    In-process worker pool fed by a persisted job table
+
+    - submit() records the job and returns immediately
+    - N worker tasks execute jobs with the handler registered for their kind
+    - Handlers report progress through a callback; subscribers (SSE) are
+      notified on every state change
+    - On startup, queued jobs are re-enqueued and jobs that were running when
+      the process stopped are marked interrupted (their side effects may be
+      partial, so they are not retried blindly)
+    - A kind can register a cleanup that releases its payload's resources
+      (e.g. temp files) when a job is cancelled or interrupted, since its
+      handler may never get to do it
+    - Status changes out of QUEUED are conditional updates, so a cancel
+      racing a worker's start is decided by whichever lands first
+
+    Single worker process only: start() takes over every running and
+    queued job in the store, so two processes sharing a store would mark
+    each other's jobs interrupted and run queued jobs twice.
+    """
+
+    def __init__(
+        self,
+        store_path: Optional[str] = None,
+        workers: Optional[int] = None,
+        retention_hours: Optional[float] = None
+    ):
+        self.store_path = store_path or os.getenv("JOB_STORE_PATH", "jobs.sqlite3")
+        self.workers = workers or int(os.getenv("JOB_WORKERS", "2"))
+        self.retention_hours = retention_hours or float(os.getenv("JOB_RETENTION_HOURS", "24"))
+
+        self.handlers: Dict[str, JobHandler] = {}
+        self.cleanups: Dict[str, JobCleanup] = {}
+        self._store: Optional[JobStore] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker_tasks: List[asyncio.Task] = []
+        # Jobs claimed by a worker; None until the handler task is created
+        self._running: Dict[str, Optional[asyncio.Task]] = {}
+        self._subscribers: Dict[str, List[asyncio.Queue]] = {}
+        self._progress_tasks: set = set()
+        self._cancel_requested: set = set()
+
+    @property
+    def store(self) -> JobStore:
+        if self._store is None:
+            self._store = JobStore(self.store_path)
+        return self._store
+
+    def register(self, kind: str, handler: JobHandler, cleanup: Optional[JobCleanup] = None) -> None:
+        """
+        Register the coroutine that executes jobs of a given kind
+
+        Args:
+            kind: Job kind name
+            handler: Executes the job
+            cleanup: Releases the payload's resources when the job is
+                     cancelled or interrupted by a restart (may run after
+                     the handler's own cleanup, so it must be idempotent)
+        """
+        self.handlers[kind] = handler
+        if cleanup is not None:
+            self.cleanups[kind] = cleanup
+
+    async def start(self) -> None:
+        """Recover persisted jobs and start the worker pool"""
+        if self._worker_tasks:
+            return
+
+        self._queue = asyncio.Queue()
+
+        cutoff = (datetime.utcnow() - timedelta(hours=self.retention_hours)).isoformat()
+        pruned = await asyncio.to_thread(self.store.prune, cutoff)
+
+        for job in await asyncio.to_thread(self.store.list_by_status, RUNNING):
+            await asyncio.to_thread(
+                self.store.update, job["id"],
+                status=INTERRUPTED, error="Server restarted while job was running"
+            )
+            await self._cleanup(job)
+
+        requeued = await asyncio.to_thread(self.store.list_by_status, QUEUED)
+        for job in requeued:
+            self._queue.put_nowait(job["id"])
+
+        self._worker_tasks = [
+            asyncio.create_task(self._worker(i)) for i in range(self.workers)
+        ]
+        print(f"Job queue started: {self.workers} workers, {len(requeued)} requeued, {pruned} pruned")
+
+    async def stop(self) -> None:
+        """Stop workers; jobs still running are left to be marked interrupted on restart"""
+        for task in self._worker_tasks:
+            task.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+
+        if self._store is not None:
+            self._store.close()
+            self._store = None
+
+    async def submit(self, kind: str, payload: Dict[str, Any], user_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Queue a job
+
+        Args:
+            kind: Registered handler name
+            payload: JSON-serializable handler arguments
+            user_id: Owner of the job
+
+        Returns:
+            The job record
+        """
+        if kind not in self.handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        if self._queue is None:
+            raise RuntimeError("Job queue is not running")
+
+        now = datetime.utcnow().isoformat()
+        job = {
+            "id": str(uuid.uuid4()),
+            "kind": kind,
+            "user_id": user_id,
+            "status": QUEUED,
+            "payload": payload,
+            "progress": {},
+            "result": None,
+            "error": None,
+            "created_at": now,
+            "updated_at": now
+        }
+
+        await asyncio.to_thread(self.store.insert, job)
+        self._queue.put_nowait(job["id"])
+        return job
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self.store.get, job_id)
+
+    async def list_for_user(self, user_id: str, limit: int = 50) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(self.store.list_for_user, user_id, limit)
+
+    async def cancel(self, job_id: str) -> bool:
+        """
+        Cancel a queued or running job
+
+        Returns:
+            True if the job was cancelled, False if it had already finished
+        """
+        job = await self.get(job_id)
+        if not job or job["status"] in TERMINAL_STATUSES:
+            return False
+
+        if job_id not in self._running:
+            # Still queued; only the side that moves it out of QUEUED (this
+            # or a worker starting it) gets to act on it
+            if await self._transition(job_id, QUEUED, CANCELLED):
+                await self._cleanup(job)
+                return True
+            if job_id not in self._running:
+                return False  # Finished in the meantime
+
+        # Claimed by a worker: it records the cancelled status (and cleans
+        # up) when it sees the request or the task unwinds
+        task = self._running[job_id]
+        if task is not None and task.done():
+            return False  # Finished; the worker is recording the result
+        self._cancel_requested.add(job_id)
+        if task is not None:
+            task.cancel()
+        return True
+
+    async def events(self, job_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield job snapshots as they change, ending with the terminal state
+
+        The current snapshot is always yielded first.
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.setdefault(job_id, []).append(queue)
+
+        try:
+            job = await self.get(job_id)
+            if job is None:
+                return
+            yield job
+
+            while job["status"] not in TERMINAL_STATUSES:
+                try:
+                    job = await asyncio.wait_for(queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    # Re-read in case a notification was missed
+                    job = await self.get(job_id)
+                    if job is None:
+                        return
+                yield job
+        finally:
+            subscribers = self._subscribers.get(job_id, [])
+            if queue in subscribers:
+                subscribers.remove(queue)
+            if not subscribers:
+                self._subscribers.pop(job_id, None)
+
+    async def _worker(self, worker_index: int) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._execute(job_id)
+            except Exception as e:
+                print(f"Job worker {worker_index} error on {job_id}: {str(e)}")
+            finally:
+                self._queue.task_done()
+
+    async def _execute(self, job_id: str) -> None:
+        # Claim the job before the first await so cancel() routes through us
+        self._running[job_id] = None
+        try:
+            job = await self.get(job_id)
+            if not job:
+                return
+
+            handler = self.handlers.get(job["kind"])
+            if handler is None:
+                await self._transition(job_id, QUEUED, FAILED, error=f"No handler for job kind {job['kind']}")
+                return
+
+            if job_id in self._cancel_requested:
+                if await self._transition(job_id, QUEUED, CANCELLED):
+                    await self._cleanup(job)
+                return
+
+            if not await self._transition(job_id, QUEUED, RUNNING):
+                return  # Cancelled while queued
+
+            if job_id in self._cancel_requested:
+                # Cancelled while the status was being written
+                await self._set_status(job_id, CANCELLED)
+                await self._cleanup(job)
+                return
+
+            def progress(stage: str, **data) -> None:
+                update = asyncio.create_task(self._set_progress(job_id, {"stage": stage, **data}))
+                self._progress_tasks.add(update)
+                update.add_done_callback(self._progress_tasks.discard)
+
+            task = asyncio.create_task(handler(job["payload"], progress))
+            self._running[job_id] = task
+            try:
+                result = await task
+                await self._set_status(job_id, SUCCEEDED, result=result)
+            except asyncio.CancelledError:
+                if job_id not in self._cancel_requested:
+                    # The worker itself is being stopped; leave the job as running
+                    # so it is marked interrupted on the next start
+                    raise
+                await self._set_status(job_id, CANCELLED)
+                # A task cancelled before its first step never runs the
+                # handler's own cleanup
+                await self._cleanup(job)
+            except Exception as e:
+                traceback.print_exc()
+                await self._set_status(job_id, FAILED, error=str(e))
+        finally:
+            self._running.pop(job_id, None)
+            self._cancel_requested.discard(job_id)
+
+    async def _cleanup(self, job: Dict[str, Any]) -> None:
+        """Run the kind's cleanup for a cancelled or interrupted job (cleanups must be idempotent)"""
+        cleanup = self.cleanups.get(job["kind"])
+        if cleanup is None:
+            return
+        try:
+            await asyncio.to_thread(cleanup, job["payload"] or {})
+        except Exception as e:
+            print(f"Job cleanup error on {job['id']}: {str(e)}")
+
+    async def _transition(self, job_id: str, from_status: str, to_status: str, **fields) -> bool:
+        """Move a job from one status to another; False if it was no longer in from_status"""
+        changed = await asyncio.to_thread(
+            self.store.update, job_id, expected_status=from_status, status=to_status, **fields
+        )
+        if changed:
+            await self._notify(job_id)
+        return changed
+
+    async def _set_status(self, job_id: str, status: str, **fields) -> None:
+        await asyncio.to_thread(self.store.update, job_id, status=status, **fields)
+        await self._notify(job_id)
+
+    async def _set_progress(self, job_id: str, progress: Dict[str, Any]) -> None:
+        await asyncio.to_thread(self.store.update, job_id, progress=progress)
+        await self._notify(job_id)
+
+    async def _notify(self, job_id: str) -> None:
+        subscribers = self._subscribers.get(job_id)
+        if not subscribers:
+            return
+        job = await self.get(job_id)
+        for queue in list(subscribers):
+            queue.put_nowait(job)
+
+
+def _dumps(value: Any) -> Optional[str]:
+    return None if value is None else json.dumps(value, default=str)
+
+
+def _row_to_job(row: sqlite3.Row) -> Dict[str, Any]:
+    job = dict(row)
+    for key in ("payload", "progress", "result"):
+        job[key] = json.loads(job[key]) if job[key] else None
+    return job
+
+
+def public_job_view(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Job fields returned by the API (payloads may hold file paths and are not exposed)"""
+    return {
+        "job_id": job["id"],
+        "kind": job["kind"],
+        "status": job["status"],
+        "progress": job["progress"] or {},
+        "error": job["error"],
+        "created_at": job["created_at"],
+        "updated_at": job["updated_at"],
+        "finished": job["status"] in TERMINAL_STATUSES
+    }
+
+
+# Singleton instance
+job_queue = JobQueue()
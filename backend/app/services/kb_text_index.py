@@ -0,0 +1,151 @@
+"""
+Knowledge Base Text Index
+Token/phrase inverted index over knowledge base entries for skill evidence lookup
+"""
+from typing import Any, Dict, List, Optional, Set, Tuple
+from collections import defaultdict
+import difflib
+from .fact_index import entity_text
+from .keyword_index import TOKEN_PATTERN, keyword_terms, tokenize
+
+# Spellings of the same skill; any member is evidence for the others
+SKILL_ALIASES = [
+    ["javascript", "js", "ecmascript"],
+    ["python", "py"],
+    ["c#", "csharp"],
+    ["c++", "cpp"],
+    ["node.js", "nodejs", "node"],
+    ["react", "react.js", "reactjs"],
+    ["vue", "vue.js", "vuejs"],
+    ["next.js", "nextjs"],
+    ["postgresql", "postgres", "psql"],
+    ["mongodb", "mongo"],
+    ["kubernetes", "k8s"],
+    ["amazon web services", "aws"],
+    ["google cloud platform", "google cloud", "gcp"],
+    ["microsoft azure", "azure"],
+    ["machine learning", "ml"],
+    ["artificial intelligence", "ai"],
+    ["natural language processing", "nlp"],
+    ["continuous integration", "ci"],
+    ["user experience", "ux"],
+    ["user interface", "ui"],
+    ["search engine optimization", "seo"],
+    ["customer relationship management", "crm"],
+    ["microsoft excel", "excel", "ms excel"],
+]
+
+# Terms shorter than this are never fuzzy-matched ("r" must not look like "c")
+FUZZY_MIN_LENGTH = 5
+FUZZY_CUTOFF = 0.85
+
+
+class KnowledgeTextIndex:
+    """
+    Inverted index over the titles and content of knowledge base entries
+
+    Built once per knowledge base snapshot. Matching is on whole stemmed
+    tokens (so "R" does not match inside "React"), multi-word skills match
+    as phrases within a single entry, and every lookup returns the ids of
+    the entries that support the skill.
+    """
+
+    def __init__(self, entries: List[Dict[str, Any]]):
+        # term -> {entry id: token positions}
+        self.postings: Dict[str, Dict[str, List[int]]] = defaultdict(dict)
+        self.titles: Dict[str, str] = {}
+        # stemmed term -> a word it came from (for messages)
+        self.surface: Dict[str, str] = {}
+
+        for entry in entries:
+            entry_id = str(entry['id'])
+            self.titles[entry_id] = entry.get('title') or ''
+            text = entity_text(entry).lower()
+            for position, (term, offset) in enumerate(tokenize(text)):
+                self.postings[term].setdefault(entry_id, []).append(position)
+                if term not in self.surface:
+                    self.surface[term] = TOKEN_PATTERN.match(text, offset).group(0)
+
+        self.vocabulary = [term for term in self.postings if len(term) >= FUZZY_MIN_LENGTH]
+        self.phrases = {
+            terms: entry_id
+            for entry_id, title in self.titles.items()
+            for terms in [keyword_terms(title)] if len(terms) > 1
+        }
+
+        # skill terms -> [(alias name, alias terms)]
+        self.aliases: Dict[Tuple[str, ...], List[Tuple[str, Tuple[str, ...]]]] = {}
+        for group in SKILL_ALIASES:
+            variants = [(name, keyword_terms(name)) for name in group]
+            for _, terms in variants:
+                self.aliases[terms] = [(name, other) for name, other in variants if other != terms]
+
+        self._lookups: Dict[str, Dict[str, Any]] = {}
+
+    def find_phrase(self, terms: Tuple[str, ...]) -> Set[str]:
+        """Ids of entries containing the terms as consecutive tokens"""
+        if not terms:
+            return set()
+
+        first = self.postings.get(terms[0], {})
+        if len(terms) == 1:
+            return set(first)
+
+        matches = set()
+        for entry_id, starts in first.items():
+            followers = [set(self.postings.get(term, {}).get(entry_id, ())) for term in terms[1:]]
+            if any(all(start + i in follower for i, follower in enumerate(followers, 1)) for start in starts):
+                matches.add(entry_id)
+        return matches
+
+    def _fuzzy(self, terms: Tuple[str, ...]) -> Tuple[Optional[str], Set[str]]:
+        """Closest indexed term / title phrase for a misspelled skill"""
+        if len(terms) == 1:
+            if len(terms[0]) < FUZZY_MIN_LENGTH:
+                return None, set()
+            close = difflib.get_close_matches(terms[0], self.vocabulary, n=1, cutoff=FUZZY_CUTOFF)
+            if close:
+                return self.surface[close[0]], set(self.postings[close[0]])
+            return None, set()
+
+        joined = " ".join(terms)
+        candidates = {" ".join(phrase): entry_id for phrase, entry_id in self.phrases.items()}
+        close = difflib.get_close_matches(joined, list(candidates), n=1, cutoff=FUZZY_CUTOFF)
+        if close:
+            return self.titles[candidates[close[0]]], {candidates[close[0]]}
+        return None, set()
+
+    def find_skill(self, skill: str) -> Dict[str, Any]:
+        """
+        Evidence for a skill
+
+        Tries an exact phrase match, then known aliases, then a fuzzy
+        match for misspellings.
+
+        Returns:
+            {"match": "exact" | "alias" | "fuzzy" | None,
+             "matched": text that matched, "entity_ids": [supporting entry ids]}
+        """
+        key = skill.strip().lower()
+        if key in self._lookups:
+            return self._lookups[key]
+
+        terms = keyword_terms(skill)
+        result = {"match": None, "matched": None, "entity_ids": []}
+
+        entity_ids = self.find_phrase(terms)
+        if entity_ids:
+            result = {"match": "exact", "matched": skill, "entity_ids": sorted(entity_ids)}
+        else:
+            for name, alias in self.aliases.get(terms, []):
+                entity_ids = self.find_phrase(alias)
+                if entity_ids:
+                    result = {"match": "alias", "matched": name, "entity_ids": sorted(entity_ids)}
+                    break
+            else:
+                matched, entity_ids = self._fuzzy(terms) if terms else (None, set())
+                if entity_ids:
+                    result = {"match": "fuzzy", "matched": matched, "entity_ids": sorted(entity_ids)}
+
+        self._lookups[key] = result
+        return result
@@ -0,0 +1,147 @@
+"""
+Keyword Index
+Tokenized, stemmed view of a resume for matching job keywords
+"""
+from typing import Any, Dict, Iterable, List, Tuple
+from collections import defaultdict
+import hashlib
+import re
+from ..utils.cache import TTLLRUCache
+
+# Words, version numbers and tech names that carry symbols:
+# "c++", "c#", ".net", "node.js", "asp.net", "3.5"
+# "-" and "/" are separators, so "CI/CD" and "front-end" become two tokens.
+TOKEN_PATTERN = re.compile(r"\.?[a-z0-9]+(?:\.[a-z0-9]+)*[+#]*")
+
+# (suffix, replacement), first match wins
+STEM_RULES = [
+    ("ies", "y"),
+    ("ied", "y"),
+    ("ing", ""),
+    ("ed", ""),
+    ("es", ""),
+    ("s", ""),
+    ("e", ""),
+]
+
+# Endings that look plural but aren't ("process", "status", "analysis");
+# short words like "apis" are real plurals
+NON_PLURAL_ENDINGS = ("ss", "us", "is")
+NON_PLURAL_MIN_LENGTH = 5
+
+MIN_STEM_LENGTH = 3
+
+
+def stem(token: str) -> str:
+    """
+    Light suffix-stripping stemmer
+
+    Only needs to map inflections of the same word to one form
+    ("manage", "managed", "manages", "managing" -> "manag"); the result
+    is never shown to users. Tokens with digits or symbols are left alone.
+    """
+    if len(token) <= MIN_STEM_LENGTH or not token.isalpha():
+        return token
+
+    for suffix, replacement in STEM_RULES:
+        if not token.endswith(suffix):
+            continue
+        if suffix == "s" and token.endswith(NON_PLURAL_ENDINGS) and len(token) >= NON_PLURAL_MIN_LENGTH:
+            return token
+        root = token[:-len(suffix)]
+        if len(root) < MIN_STEM_LENGTH:
+            continue
+        # "planning" -> "plann" -> "plan"
+        if suffix in ("ing", "ed") and len(root) > MIN_STEM_LENGTH and root[-1] == root[-2] and root[-1] not in "lsz":
+            root = root[:-1]
+        return root + replacement
+
+    return token
+
+
+def tokenize(text: str) -> List[Tuple[str, int]]:
+    """Split text into (stemmed token, character offset) pairs"""
+    return [
+        (stem(match.group(0)), match.start())
+        for match in TOKEN_PATTERN.finditer(text.lower())
+    ]
+
+
+def keyword_terms(keyword: str) -> Tuple[str, ...]:
+    """Stemmed terms of a (possibly multi-word) keyword"""
+    return tuple(term for term, _ in tokenize(keyword))
+
+
+class KeywordIndex:
+    """
+    Positional index over one text
+
+    Built once per text; keyword lookups are dictionary hits instead of
+    substring scans, and match on whole tokens so "Java" does not match
+    inside "JavaScript". Multi-word keywords match as phrases.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        tokens = tokenize(text)
+        self.token_count = len(tokens)
+        self.offsets = [offset for _, offset in tokens]
+
+        # stemmed term -> token positions (ascending)
+        self.positions: Dict[str, List[int]] = defaultdict(list)
+        for position, (term, _) in enumerate(tokens):
+            self.positions[term].append(position)
+
+    def find(self, keyword: str) -> List[int]:
+        """
+        Character offsets where a keyword occurs
+
+        Keywords with no word characters (e.g. "&") fall back to a
+        case-insensitive substring search.
+        """
+        terms = keyword_terms(keyword)
+
+        if not terms:
+            needle = keyword.strip().lower()
+            if not needle:
+                return []
+            return [m.start() for m in re.finditer(re.escape(needle), self.text.lower())]
+
+        starts = self.positions.get(terms[0], [])
+        if len(terms) > 1:
+            followers = [set(self.positions.get(term, ())) for term in terms[1:]]
+            starts = [
+                start for start in starts
+                if all(start + i in follower for i, follower in enumerate(followers, 1))
+            ]
+
+        return [self.offsets[start] for start in starts]
+
+    def match(self, keywords: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Look up every keyword once (duplicates across lists are free)
+
+        Returns:
+            {keyword: {"count": int, "positions": [character offsets]}}
+        """
+        results: Dict[str, Dict[str, Any]] = {}
+        for keyword in keywords:
+            if keyword in results:
+                continue
+            positions = self.find(keyword)
+            results[keyword] = {"count": len(positions), "positions": positions}
+        return results
+
+
+# Match scoring and density analysis usually run on the same resume text
+_index_cache = TTLLRUCache(maxsize=64, ttl=600)
+
+
+def get_keyword_index(text: str) -> KeywordIndex:
+    """Return the (cached) index for a text"""
+    key = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    index = _index_cache.get(key)
+    if index is None:
+        index = KeywordIndex(text)
+        _index_cache.set(key, index)
+    return index
@@ -1,30 +1,37 @@
 """Knowledge Extraction Service - Turns conversations/resumes into structured facts"""
 
-import anthropic
-import os
-from dotenv import load_dotenv
 from datetime import datetime
+import asyncio
 import json
+import os
 import re
-import time
-from typing import Dict, List, Optional
-
-load_dotenv()
-
-ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY")
-client = anthropic.Anthropic(api_key=ANTHROPIC_API_KEY)
+from typing import Dict, List, Optional, Tuple
+from .llm_client import llm_client
+from ..utils.async_retry import retry_async, deadline_after
+
+# Long inputs are extracted in chunks of about this many characters
+EXTRACTION_CHUNK_CHARS = int(os.getenv("EXTRACTION_CHUNK_CHARS", "12000"))
+# Longest trailing block repeated at the start of the next chunk
+EXTRACTION_CHUNK_OVERLAP_CHARS = int(os.getenv("EXTRACTION_CHUNK_OVERLAP_CHARS", "1500"))
+EXTRACTION_CHUNK_CONCURRENCY = int(os.getenv("EXTRACTION_CHUNK_CONCURRENCY", "4"))
+# Budget for one chunk, retries included; it starts when the chunk gets a
+# slot, so chunks waiting behind others aren't charged for the wait
+EXTRACTION_TIMEOUT_SECONDS = float(os.getenv("EXTRACTION_TIMEOUT_SECONDS", "300"))
 
 class KnowledgeExtractionService:
     """Extracts structured knowledge entities from unstructured text"""
 
     def __init__(self):
-        self.client = client
+        self.llm = llm_client
         self.extracted_cache = {}  # Track extracted items to avoid duplicates
 
     async def extract_from_conversation(self, conversation_history: list, user_id: str, source_reference: str = None) -> dict:
         """
         Extract structured facts from conversation history
 
+        Long conversations are split on turn boundaries and extracted in
+        parallel chunks (see _extract_chunked).
+
         Args:
             conversation_history: List of {role, content} messages
             user_id: UUID of user
@@ -34,87 +41,27 @@ class KnowledgeExtractionService:
             Dict with entities and relationships
         """
 
-        # Build conversation text
-        conversation_text = self._format_conversation(conversation_history)
-
-        # Extract using Claude
-        extraction_prompt = self._build_extraction_prompt(conversation_text, "conversation")
-
-        # Retry logic with exponential backoff
-        max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                response = self.client.messages.create(
-                    model="claude-3-5-sonnet-20241022",
-                    max_tokens=4000,
-                    temperature=0.0,  # Deterministic extraction
-                    messages=[{
-                        "role": "user",
-                        "content": extraction_prompt
-                    }]
-                )
-
-                # Parse JSON response
-                extracted_data = self._parse_and_validate_json(response.content[0].text)
-
-                if not extracted_data:
-                    raise ValueError("Invalid JSON response from extraction")
-
-                # Validate confidence scores
-                entities = extracted_data.get("entities", [])
-                validated_entities = self._validate_entities(entities)
-
-                # Deduplicate entities
-                deduplicated_entities = self._deduplicate_entities(validated_entities, user_id)
-
-                # Add metadata
-                enriched_entities = self._enrich_entities(
-                    deduplicated_entities,
-                    user_id=user_id,
-                    source="conversation",
-                    source_reference=source_reference
-                )
-
-                relationships = extracted_data.get("relationships", [])
-
-                return {
-                    "success": True,
-                    "entities": enriched_entities,
-                    "relationships": relationships,
-                    "total_extracted": len(enriched_entities),
-                    "duplicates_removed": len(validated_entities) - len(deduplicated_entities)
-                }
+        # One block per turn, so chunks never split a message
+        blocks = [self._format_conversation([msg]) for msg in conversation_history]
 
-            except json.JSONDecodeError as e:
-                print(f"JSON parsing error (attempt {attempt + 1}/{max_retries}): {str(e)}")
-                if attempt < max_retries - 1:
-                    time.sleep(2 ** attempt)  # Exponential backoff
-                    continue
-                return {
-                    "success": False,
-                    "error": f"JSON parsing failed after {max_retries} attempts",
-                    "entities": [],
-                    "relationships": []
-                }
+        return await self._extract_chunked(
+            blocks,
+            source_type="conversation",
+            user_id=user_id,
+            source="conversation",
+            source_reference=source_reference
+        )
 
-            except Exception as e:
-                print(f"Extraction error (attempt {attempt + 1}/{max_retries}): {str(e)}")
-                if attempt < max_retries - 1:
-                    time.sleep(2 ** attempt)
-                    continue
-                return {
-                    "success": False,
-                    "error": str(e),
-                    "entities": [],
-                    "relationships": []
-                }
-
-    async def extract_from_resume(self, resume_text: str, user_id: str, source_reference: str = None) -> dict:
+    async def extract_from_resume(self, resume_text, user_id: str, source_reference: str = None) -> dict:
         """
         Extract structured facts from resume text
 
+        Long resumes are split on section boundaries and extracted in
+        parallel chunks (see _extract_chunked).
+
         Args:
-            resume_text: Raw text extracted from resume
+            resume_text: Raw text extracted from resume (or the structured
+                OCR result)
             user_id: UUID of user
             source_reference: File ID for tracking
 
@@ -122,76 +69,258 @@ class KnowledgeExtractionService:
             Dict with entities and relationships
         """
 
-        extraction_prompt = self._build_extraction_prompt(resume_text, "resume")
+        return await self._extract_chunked(
+            self._split_resume(resume_text),
+            source_type="resume",
+            user_id=user_id,
+            source="resume_upload",
+            source_reference=source_reference
+        )
+
+    async def _extract_chunked(
+        self,
+        blocks: List[str],
+        source_type: str,
+        user_id: str,
+        source: str,
+        source_reference: str = None
+    ) -> dict:
+        """
+        Extract from text blocks, in parallel chunks when the input is long
+
+        Blocks (sections or conversation turns) are packed into chunks of
+        up to EXTRACTION_CHUNK_CHARS; each chunk repeats the previous
+        chunk's last block for context. Entities from all chunks are
+        validated, merged (a job split across chunks keeps the details
+        from both) and deduplicated together, and relationship indexes are
+        remapped onto the merged list. A failed chunk doesn't fail the rest;
+        the result's failed_chunks counts them, and callers pass it on so
+        the user knows to re-run the extraction.
+        """
+        chunks = self._build_chunks(blocks)
+        if len(chunks) > 1:
+            print(f"Extracting {source_type} in {len(chunks)} chunks")
+
+        semaphore = asyncio.Semaphore(EXTRACTION_CHUNK_CONCURRENCY)
+
+        async def run(index: int, chunk: str) -> dict:
+            async with semaphore:
+                deadline = deadline_after(EXTRACTION_TIMEOUT_SECONDS)
+                part = (index + 1, len(chunks)) if len(chunks) > 1 else None
+                return await self._extract_chunk(chunk, source_type, part, deadline)
+
+        results = await asyncio.gather(
+            *(run(index, chunk) for index, chunk in enumerate(chunks)),
+            return_exceptions=True
+        )
+
+        extracted = []
+        errors = []
+        for result in results:
+            if isinstance(result, BaseException):
+                if isinstance(result, asyncio.CancelledError):
+                    raise result
+                errors.append(str(result))
+            else:
+                extracted.append(result)
+
+        if not extracted:
+            return {
+                "success": False,
+                "error": errors[0] if errors else "Nothing to extract",
+                "entities": [],
+                "relationships": []
+            }
+
+        entities, relationships = self._merge_chunk_results(extracted)
+
+        # Validate confidence scores
+        validated_entities = self._validate_entities(entities)
+
+        # Deduplicate entities
+        deduplicated_entities = self._deduplicate_entities(validated_entities, user_id)
+
+        # Add metadata
+        enriched_entities = self._enrich_entities(
+            deduplicated_entities,
+            user_id=user_id,
+            source=source,
+            source_reference=source_reference
+        )
+
+        result = {
+            "success": True,
+            "entities": enriched_entities,
+            "relationships": self._remap_relationships(relationships, enriched_entities),
+            "total_extracted": len(enriched_entities),
+            "duplicates_removed": len(validated_entities) - len(deduplicated_entities),
+            "chunks": len(chunks)
+        }
+        if errors:
+            result["failed_chunks"] = len(errors)
+        return result
+
+    async def _extract_chunk(
+        self,
+        text: str,
+        source_type: str,
+        part: Optional[Tuple[int, int]] = None,
+        deadline: Optional[float] = None
+    ) -> dict:
+        """
+        Extract one chunk, retrying with jittered exponential backoff
+
+        Returns:
+            Parsed extraction JSON (entities / relationships)
+
+        Raises:
+            ValueError: No valid JSON after all retries
+        """
+        extraction_prompt = self._build_extraction_prompt(text, source_type, part)
+
+        async def attempt() -> dict:
+            response_text = await self.llm.complete(
+                extraction_prompt,
+                max_tokens=4000,
+                temperature=0.0  # Deterministic extraction
+            )
+
+            # Parse JSON response
+            extracted_data = self._parse_and_validate_json(response_text)
+
+            if not extracted_data:
+                # Don't let the retry (or the next upload) get the same bad reply from cache
+                await self.llm.evict(extraction_prompt, max_tokens=4000, temperature=0.0)
+                raise ValueError("Invalid JSON response from extraction")
+
+            return extracted_data
 
-        # Retry logic with exponential backoff
         max_retries = 3
-        for attempt in range(max_retries):
-            try:
-                response = self.client.messages.create(
-                    model="claude-3-5-sonnet-20241022",
-                    max_tokens=4000,
-                    temperature=0.0,  # Deterministic extraction
-                    messages=[{
-                        "role": "user",
-                        "content": extraction_prompt
-                    }]
-                )
-
-                # Parse JSON response
-                extracted_data = self._parse_and_validate_json(response.content[0].text)
-
-                if not extracted_data:
-                    raise ValueError("Invalid JSON response from extraction")
-
-                # Validate confidence scores
-                entities = extracted_data.get("entities", [])
-                validated_entities = self._validate_entities(entities)
-
-                # Deduplicate entities
-                deduplicated_entities = self._deduplicate_entities(validated_entities, user_id)
-
-                # Add metadata
-                enriched_entities = self._enrich_entities(
-                    deduplicated_entities,
-                    user_id=user_id,
-                    source="resume_upload",
-                    source_reference=source_reference
-                )
-
-                relationships = extracted_data.get("relationships", [])
-
-                return {
-                    "success": True,
-                    "entities": enriched_entities,
-                    "relationships": relationships,
-                    "total_extracted": len(enriched_entities),
-                    "duplicates_removed": len(validated_entities) - len(deduplicated_entities)
-                }
+        try:
+            return await retry_async(attempt, attempts=max_retries, deadline=deadline, label="Extraction")
+        except ValueError:
+            raise ValueError(f"JSON parsing failed after {max_retries} attempts")
+
+    def _split_resume(self, resume_text) -> List[str]:
+        """
+        Split a resume into blocks on section boundaries
+
+        Structured OCR output yields one block per section (and per job,
+        degree, ... within list sections); plain text is split on blank lines.
+        """
+        if isinstance(resume_text, dict):
+            blocks = []
+            for section, value in resume_text.items():
+                if isinstance(value, list) and value:
+                    blocks.extend(
+                        f"{section.upper()}:\n{json.dumps(item, indent=2)}" for item in value
+                    )
+                elif value:
+                    blocks.append(f"{section.upper()}:\n{json.dumps(value, indent=2)}")
+            return blocks
+
+        return [block for block in re.split(r"\n\s*\n", str(resume_text)) if block.strip()]
+
+    def _build_chunks(self, blocks: List[str]) -> List[str]:
+        """
+        Pack blocks into chunks of at most EXTRACTION_CHUNK_CHARS
 
-            except json.JSONDecodeError as e:
-                print(f"JSON parsing error (attempt {attempt + 1}/{max_retries}): {str(e)}")
-                if attempt < max_retries - 1:
-                    time.sleep(2 ** attempt)
+        Each chunk after the first starts with the previous chunk's last
+        block (when it is no longer than EXTRACTION_CHUNK_OVERLAP_CHARS) so
+        details keep their job header. Oversized blocks are split by line.
+        """
+        pieces = []
+        for block in blocks:
+            if len(block) <= EXTRACTION_CHUNK_CHARS:
+                pieces.append(block)
+                continue
+            current = ""
+            for line in block.splitlines():
+                if current and len(current) + len(line) + 1 > EXTRACTION_CHUNK_CHARS:
+                    pieces.append(current)
+                    current = ""
+                current = f"{current}\n{line}" if current else line
+            if current:
+                pieces.append(current)
+
+        chunks = []
+        current = []
+        size = 0
+        for piece in pieces:
+            if current and size + len(piece) + 2 > EXTRACTION_CHUNK_CHARS:
+                chunks.append("\n\n".join(current))
+                overlap = current[-1]
+                current = [overlap] if len(overlap) <= EXTRACTION_CHUNK_OVERLAP_CHARS else []
+                size = sum(len(item) + 2 for item in current)
+            current.append(piece)
+            size += len(piece) + 2
+
+        if current:
+            chunks.append("\n\n".join(current))
+        return chunks
+
+    def _entity_key(self, entity: dict) -> str:
+        """Same key _deduplicate_entities uses"""
+        return f"{entity.get('entity_type', '')}:{str(entity.get('title', '')).strip().lower()}"
+
+    def _merge_chunk_results(self, extracted: List[dict]) -> Tuple[List[dict], List[dict]]:
+        """
+        Combine entities from all chunks
+
+        An entity seen in several chunks (usually via the overlap) is kept
+        once, with the union of its details. Relationships are returned
+        with entity keys instead of chunk-local indexes.
+        """
+        merged = {}
+        relationships = []
+
+        for data in extracted:
+            entities = [entity for entity in data.get("entities", []) if isinstance(entity, dict)]
+            keys = [self._entity_key(entity) for entity in entities]
+
+            for key, entity in zip(keys, entities):
+                if key not in merged:
+                    merged[key] = entity
                     continue
-                return {
-                    "success": False,
-                    "error": f"JSON parsing failed after {max_retries} attempts",
-                    "entities": [],
-                    "relationships": []
+                # Same entity from another chunk: keep details from both
+                existing = merged[key]
+                detail_titles = {
+                    str(detail.get("title", "")).strip().lower()
+                    for detail in existing.get("details", [])
                 }
+                for detail in entity.get("details", []):
+                    if str(detail.get("title", "")).strip().lower() not in detail_titles:
+                        existing.setdefault("details", []).append(detail)
 
-            except Exception as e:
-                print(f"Extraction error (attempt {attempt + 1}/{max_retries}): {str(e)}")
-                if attempt < max_retries - 1:
-                    time.sleep(2 ** attempt)
+            for rel in data.get("relationships", []):
+                from_index = rel.get("from_entity_index")
+                to_index = rel.get("to_entity_index")
+                if not isinstance(from_index, int) or not isinstance(to_index, int):
                     continue
-                return {
-                    "success": False,
-                    "error": str(e),
-                    "entities": [],
-                    "relationships": []
-                }
+                if not (0 <= from_index < len(keys) and 0 <= to_index < len(keys)):
+                    continue
+                relationships.append({**rel, "from_entity_key": keys[from_index], "to_entity_key": keys[to_index]})
+
+        return list(merged.values()), relationships
+
+    def _remap_relationships(self, relationships: List[dict], entities: List[dict]) -> List[dict]:
+        """Point relationships at indexes in the final entity list (dropping ones whose entities were removed)"""
+        positions = {self._entity_key(entity): index for index, entity in enumerate(entities)}
+
+        remapped = []
+        seen = set()
+        for rel in relationships:
+            from_key = rel.pop("from_entity_key")
+            to_key = rel.pop("to_entity_key")
+            if from_key not in positions or to_key not in positions:
+                continue
+            pair = (positions[from_key], positions[to_key], rel.get("relationship_type"))
+            if pair in seen:
+                continue
+            seen.add(pair)
+            remapped.append({**rel, "from_entity_index": pair[0], "to_entity_index": pair[1]})
+
+        return remapped
 
     def _format_conversation(self, conversation_history: list) -> str:
         """Format conversation messages into readable text"""
@@ -202,17 +331,25 @@ class KnowledgeExtractionService:
             formatted.append(f"{role}: {content}")
         return "\n\n".join(formatted)
 
-    def _build_extraction_prompt(self, input_text: str, source_type: str) -> str:
+    def _build_extraction_prompt(self, input_text: str, source_type: str, part: Optional[Tuple[int, int]] = None) -> str:
         """Build the extraction prompt for Claude with few-shot examples"""
 
         # Few-shot examples based on source type
         examples = self._get_few_shot_examples(source_type)
 
+        part_note = ""
+        if part:
+            part_note = (
+                f"\n\nThis input is part {part[0]} of {part[1]} of a longer {source_type}. "
+                "Its first section may repeat the end of the previous part. "
+                "Extract only facts that appear in this part."
+            )
+
         return f"""You are a fact extraction engine for a resume builder. Extract discrete, verifiable facts from the user's {source_type}.
 
 {examples}
 
-NOW EXTRACT FROM THIS INPUT:
+NOW EXTRACT FROM THIS INPUT:{part_note}
 {input_text}
 
 Extract facts in this EXACT JSON structure:
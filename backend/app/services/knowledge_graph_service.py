@@ -1,16 +1,25 @@
 """Knowledge Graph Service - Stores and manages user's knowledge entities"""
 
 from app.database import get_supabase
+from app.services.fact_index import fact_index
+from app.services.knowledge_snapshot import knowledge_snapshot
 from datetime import datetime
 import uuid
 
 class KnowledgeGraphService:
     """Manages user knowledge graph (facts and relationships)"""
 
+    # Rows per bulk insert request (keeps PostgREST payloads bounded)
+    INSERT_BATCH_SIZE = 500
+
     async def store_entities(self, entities: list, user_id: str) -> dict:
         """
         Store extracted entities in database
 
+        IDs are generated client-side so parent/child links can be resolved
+        locally; parents and children are then written in two bulk inserts
+        instead of one request per entity.
+
         Args:
             entities: List of entity dicts from extraction service
             user_id: UUID of user
@@ -18,30 +27,38 @@ class KnowledgeGraphService:
         Returns:
             Dict with stored entity IDs and stats
         """
-        supabase = get_supabase()
         stored_ids = []
+        stored_count = 0
         parent_map = {}  # Track parent-child relationships
+        parent_rows = []
+        child_rows = []
 
         try:
             for entity in entities:
                 # Extract nested details before storing parent
                 details = entity.pop("details", [])
 
-                # Store parent entity
-                entity_id = await self._store_single_entity(entity, user_id)
+                parent_row = self._build_entity_row(entity, user_id)
+                entity_id = parent_row["id"]
+                parent_rows.append(parent_row)
                 stored_ids.append(entity_id)
 
-                # Store details with parent reference
-                if details:
-                    for detail in details:
-                        detail["parent_id"] = entity_id
-                        detail_id = await self._store_single_entity(detail, user_id)
-                        stored_ids.append(detail_id)
+                # Link details to their parent
+                for detail in details or []:
+                    detail["parent_id"] = entity_id
+                    child_row = self._build_entity_row(detail, user_id)
+                    child_rows.append(child_row)
+                    stored_ids.append(child_row["id"])
+
+                    # Track for relationship creation
+                    parent_map.setdefault(entity_id, []).append(child_row["id"])
+
+            # Parents first so children's parent_id foreign keys resolve
+            stored_count += self._bulk_insert("knowledge_entities", parent_rows)
+            stored_count += self._bulk_insert("knowledge_entities", child_rows)
 
-                        # Track for relationship creation
-                        if entity_id not in parent_map:
-                            parent_map[entity_id] = []
-                        parent_map[entity_id].append(detail_id)
+            # Imported entities may arrive already confirmed
+            knowledge_snapshot.invalidate(user_id)
 
             return {
                 "success": True,
@@ -55,19 +72,15 @@ class KnowledgeGraphService:
             return {
                 "success": False,
                 "error": str(e),
-                "stored_count": len(stored_ids)
+                "stored_count": stored_count
             }
 
-    async def _store_single_entity(self, entity: dict, user_id: str) -> str:
-        """Store a single entity and return its ID"""
-        supabase = get_supabase()
-
-        # Generate ID if not present
-        entity_id = entity.get("id") or str(uuid.uuid4())
+    def _build_entity_row(self, entity: dict, user_id: str) -> dict:
+        """Build the database row for an entity (generates its ID if missing)"""
+        now = datetime.now().isoformat()
 
-        # Prepare data for database
-        db_entity = {
-            "id": entity_id,
+        return {
+            "id": entity.get("id") or str(uuid.uuid4()),
             "user_id": user_id,
             "entity_type": entity.get("entity_type"),
             "parent_id": entity.get("parent_id"),
@@ -81,14 +94,21 @@ class KnowledgeGraphService:
             "end_date": entity.get("end_date"),
             "is_current": entity.get("is_current", False),
             "structured_data": entity.get("structured_data", {}),
-            "created_at": datetime.now().isoformat(),
-            "updated_at": datetime.now().isoformat()
+            "created_at": now,
+            "updated_at": now
         }
 
-        # Insert into database
-        result = supabase.table("knowledge_entities").insert(db_entity).execute()
+    def _bulk_insert(self, table: str, rows: list) -> int:
+        """Insert rows in batches of INSERT_BATCH_SIZE, returning how many were written"""
+        supabase = get_supabase()
+        written = 0
+
+        for start in range(0, len(rows), self.INSERT_BATCH_SIZE):
+            batch = rows[start:start + self.INSERT_BATCH_SIZE]
+            supabase.table(table).insert(batch).execute()
+            written += len(batch)
 
-        return entity_id
+        return written
 
     async def create_relationships(self, relationships: list, entity_ids: list) -> dict:
         """
@@ -101,8 +121,8 @@ class KnowledgeGraphService:
         Returns:
             Dict with created relationship IDs
         """
-        supabase = get_supabase()
-        created_ids = []
+        rows = []
+        now = datetime.now().isoformat()
 
         try:
             for rel in relationships:
@@ -116,21 +136,18 @@ class KnowledgeGraphService:
                 if from_index >= len(entity_ids) or to_index >= len(entity_ids):
                     continue
 
-                from_id = entity_ids[from_index]
-                to_id = entity_ids[to_index]
-
-                # Create relationship
-                rel_data = {
+                rows.append({
                     "id": str(uuid.uuid4()),
-                    "from_entity_id": from_id,
-                    "to_entity_id": to_id,
+                    "from_entity_id": entity_ids[from_index],
+                    "to_entity_id": entity_ids[to_index],
                     "relationship_type": rel.get("relationship_type", "related_to"),
                     "strength": rel.get("strength", 0.80),
-                    "created_at": datetime.now().isoformat()
-                }
+                    "created_at": now
+                })
 
-                result = supabase.table("knowledge_relationships").insert(rel_data).execute()
-                created_ids.append(rel_data["id"])
+            # Single batched write for all relationships
+            self._bulk_insert("knowledge_relationships", rows)
+            created_ids = [row["id"] for row in rows]
 
             return {
                 "success": True,
@@ -143,7 +160,7 @@ class KnowledgeGraphService:
             return {
                 "success": False,
                 "error": str(e),
-                "created_count": len(created_ids)
+                "created_count": 0
             }
 
     async def get_pending_entities(self, user_id: str) -> dict:
@@ -205,16 +222,15 @@ class KnowledgeGraphService:
         supabase = get_supabase()
 
         try:
-            # Get entities
-            query = supabase.table("knowledge_entities")\
-                .select("*")\
-                .eq("user_id", user_id)
-
+            # Get entities (confirmed ones come from the shared snapshot)
             if confirmed_only:
-                query = query.eq("is_confirmed", True)
-
-            entities_result = query.order("created_at", desc=True).execute()
-            entities = entities_result.data
+                entities = await knowledge_snapshot.get_entities(user_id)
+            else:
+                entities = supabase.table("knowledge_entities")\
+                    .select("*")\
+                    .eq("user_id", user_id)\
+                    .order("created_at", desc=True)\
+                    .execute().data
 
             # Get relationships for these entities
             entity_ids = [e["id"] for e in entities]
@@ -274,6 +290,10 @@ class KnowledgeGraphService:
                 .eq("user_id", user_id)\
                 .execute()
 
+            # Newly confirmed facts become searchable for resume generation
+            knowledge_snapshot.invalidate(user_id)
+            fact_index.upsert_entities(user_id, result.data)
+
             return {
                 "success": True,
                 "confirmed_count": len(result.data)
@@ -310,6 +330,9 @@ class KnowledgeGraphService:
                 .eq("user_id", user_id)\
                 .execute()
 
+            knowledge_snapshot.invalidate(user_id)
+            fact_index.upsert_entities(user_id, result.data)
+
             return {
                 "success": True,
                 "entity": result.data[0] if result.data else None
@@ -343,6 +366,9 @@ class KnowledgeGraphService:
                 .eq("user_id", user_id)\
                 .execute()
 
+            knowledge_snapshot.invalidate(user_id)
+            fact_index.remove_entity(user_id, entity_id)
+
             return {
                 "success": True,
                 "deleted": True
@@ -0,0 +1,167 @@
+"""
+Knowledge Snapshot
+Versioned, normalized per-user cache of confirmed knowledge entities
+"""
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import os
+import time
+from dotenv import load_dotenv
+from ..database import get_supabase
+from ..utils.cache import TTLLRUCache
+from .kb_text_index import KnowledgeTextIndex
+
+load_dotenv()
+
+# knowledge_entities.entity_type -> knowledge base knowledge_type
+ENTITY_TYPE_TO_KNOWLEDGE_TYPE = {
+    'job': 'experience',
+    'work_experience': 'experience',
+    'job_experience': 'experience',
+    'job_detail': 'accomplishment',
+    'education': 'education',
+    'skill': 'skill',
+    'achievement': 'accomplishment',
+    'accomplishment': 'accomplishment',
+    'certification': 'certification',
+    'project': 'project',
+    'metric': 'metric',
+    'story': 'story'
+}
+
+
+def map_entity_type_to_knowledge_type(entity_type: Optional[str]) -> str:
+    """Map knowledge_entities.entity_type to knowledge_type"""
+    return ENTITY_TYPE_TO_KNOWLEDGE_TYPE.get((entity_type or 'experience').lower(), 'experience')
+
+
+def build_date_range(start_date, end_date) -> Optional[str]:
+    """Build PostgreSQL date range format from start/end dates"""
+    if not start_date and not end_date:
+        return None
+
+    start = start_date or '1900-01-01'
+    end = end_date or '9999-12-31'
+    return f"[{start},{end})"
+
+
+def to_knowledge_entry(entity: Dict[str, Any]) -> Dict[str, Any]:
+    """Transform a knowledge_entities row into the knowledge base entry format"""
+    return {
+        'id': entity['id'],
+        'user_id': entity['user_id'],
+        'parent_id': entity.get('parent_id'),  # Preserve parent-child relationships
+        'entity_type': entity.get('entity_type'),  # Keep original type for reference
+        'title': entity.get('title', ''),
+        'content': entity.get('structured_data', {}) or {'description': entity.get('description', '')},
+        'knowledge_type': map_entity_type_to_knowledge_type(entity.get('entity_type')),
+        'tags': entity.get('tags', []),
+        'date_range': build_date_range(entity.get('start_date'), entity.get('end_date')),
+        'created_at': entity.get('created_at', '')
+    }
+
+
+class KnowledgeSnapshot:
+    """A user's confirmed entities at one version, raw and normalized"""
+
+    def __init__(self, user_id: str, version: int, entities: List[Dict[str, Any]]):
+        self.user_id = user_id
+        self.version = version
+        self.entities = entities
+        self.knowledge_base = [to_knowledge_entry(entity) for entity in entities]
+        self.created_at = time.time()
+        self._text_index: Optional[KnowledgeTextIndex] = None
+
+    @property
+    def text_index(self) -> KnowledgeTextIndex:
+        """Token/phrase index over the knowledge base (built on first use)"""
+        if self._text_index is None:
+            self._text_index = KnowledgeTextIndex(self.knowledge_base)
+        return self._text_index
+
+
+class KnowledgeSnapshotService:
+    """
+    Shared read path for a user's confirmed knowledge base
+
+    ResumeGenerator, FactChecker, generate-generic and the knowledge graph
+    endpoint all read the same snapshot, so a generate-then-verify cycle
+    queries knowledge_entities once. KnowledgeGraphService invalidates a
+    user's snapshot on store / confirm / update / delete; the TTL bounds
+    staleness from writes made by other worker processes.
+    """
+
+    def __init__(self, ttl: Optional[float] = None, max_users: int = 256):
+        self.supabase = get_supabase()
+        self.snapshots = TTLLRUCache(
+            maxsize=max_users,
+            ttl=ttl or float(os.getenv("KB_SNAPSHOT_TTL_SECONDS", "300"))
+        )
+        self.versions: Dict[str, int] = {}
+        self._inflight: Dict[str, Tuple[int, asyncio.Task]] = {}
+
+    async def get(self, user_id: str) -> KnowledgeSnapshot:
+        """
+        Current snapshot for a user (one query per version, concurrent callers share it)
+
+        The query runs in its own task and every caller awaits it through
+        asyncio.shield, so a caller that is cancelled (e.g. its SSE client
+        disconnected) only stops waiting; the read and the other callers
+        carry on.
+        """
+        snapshot = self.snapshots.get(user_id)
+        if snapshot is not None:
+            return snapshot
+
+        version = self.versions.get(user_id, 0)
+
+        # Join a read already in progress for the same version
+        inflight = self._inflight.get(user_id)
+        if inflight is None or inflight[0] != version:
+            task = asyncio.create_task(self._read(user_id, version))
+            self._inflight[user_id] = (version, task)
+            task.add_done_callback(lambda done: self._read_finished(user_id, done))
+            inflight = (version, task)
+
+        return await asyncio.shield(inflight[1])
+
+    async def _read(self, user_id: str, version: int) -> KnowledgeSnapshot:
+        result = await asyncio.to_thread(
+            lambda: self.supabase.table("knowledge_entities")
+            .select("*")
+            .eq("user_id", user_id)
+            .eq("is_confirmed", True)
+            .order("created_at", desc=True)
+            .execute()
+        )
+        snapshot = KnowledgeSnapshot(user_id, version, result.data)
+
+        # Don't cache if the KB changed while we were reading it
+        if self.versions.get(user_id, 0) == version:
+            self.snapshots.set(user_id, snapshot)
+
+        return snapshot
+
+    def _read_finished(self, user_id: str, task: asyncio.Task) -> None:
+        if self._inflight.get(user_id, (None, None))[1] is task:
+            del self._inflight[user_id]
+        # Mark the error retrieved in case every caller stopped waiting
+        if not task.cancelled():
+            task.exception()
+
+    async def get_knowledge_base(self, user_id: str) -> List[Dict[str, Any]]:
+        """Normalized knowledge base entries, newest first"""
+        return list((await self.get(user_id)).knowledge_base)
+
+    async def get_entities(self, user_id: str) -> List[Dict[str, Any]]:
+        """Raw confirmed knowledge_entities rows, newest first"""
+        return list((await self.get(user_id)).entities)
+
+    def invalidate(self, user_id: str) -> None:
+        """Drop a user's snapshot after their knowledge base changed"""
+        self.versions[user_id] = self.versions.get(user_id, 0) + 1
+        self.snapshots.pop(user_id)
+
+
+# Singleton instance
+knowledge_snapshot = KnowledgeSnapshotService()
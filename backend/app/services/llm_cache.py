@@ -0,0 +1,148 @@
+"""
+LLM Response Cache
+Content-addressed cache for deterministic Claude calls
+"""
+from typing import Any, Dict, Optional
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from dotenv import load_dotenv
+from ..utils.cache import TTLLRUCache
+
+load_dotenv()
+
+
+class LLMResponseCache:
+    """
+    Two-tier cache of prompt -> response text
+
+    - Memory tier: TTL + LRU, per process
+    - Disk tier (optional): SQLite file shared across restarts and workers,
+      enabled by setting LLM_CACHE_SQLITE_PATH
+
+    Entries are keyed on (model, prompt hash, max_tokens, temperature), so only
+    byte-identical requests are ever served from cache.
+    """
+
+    def __init__(
+        self,
+        maxsize: Optional[int] = None,
+        ttl: Optional[float] = None,
+        sqlite_path: Optional[str] = None
+    ):
+        if ttl is None:
+            ttl = float(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+        self.ttl = ttl
+        self.memory = TTLLRUCache(
+            maxsize=maxsize or int(os.getenv("LLM_CACHE_MAX_ENTRIES", "2048")),
+            ttl=self.ttl
+        )
+        self.sqlite_path = sqlite_path or os.getenv("LLM_CACHE_SQLITE_PATH")
+
+        self._conn: Optional[sqlite3.Connection] = None
+        self._conn_lock = threading.Lock()
+        self.disk_hits = 0
+        self.disk_misses = 0
+
+    @staticmethod
+    def make_key(model: str, prompt: str, max_tokens: int, temperature: Optional[float]) -> str:
+        """Build the content address for a request"""
+        prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        raw = json.dumps([model, prompt_hash, max_tokens, temperature])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    async def get(self, key: str) -> Optional[str]:
+        """Look up a response, checking memory first and then disk"""
+        value = self.memory.get(key)
+        if value is not None:
+            return value
+
+        if not self.sqlite_path:
+            return None
+
+        value = await asyncio.to_thread(self._disk_get, key)
+        if value is None:
+            self.disk_misses += 1
+            return None
+
+        self.disk_hits += 1
+        self.memory.set(key, value)
+        return value
+
+    async def set(self, key: str, value: str) -> None:
+        """Store a response in both tiers"""
+        self.memory.set(key, value)
+        if self.sqlite_path:
+            await asyncio.to_thread(self._disk_set, key, value)
+
+    async def delete(self, key: str) -> None:
+        """Drop a response from both tiers"""
+        self.memory.pop(key)
+        if self.sqlite_path:
+            await asyncio.to_thread(self._disk_delete, key)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss metrics for both tiers"""
+        return {
+            "memory": self.memory.stats(),
+            "disk": {
+                "enabled": bool(self.sqlite_path),
+                "hits": self.disk_hits,
+                "misses": self.disk_misses
+            }
+        }
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.sqlite_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _disk_get(self, key: str) -> Optional[str]:
+        try:
+            with self._conn_lock:
+                row = self._connection().execute(
+                    "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+                ).fetchone()
+        except sqlite3.Error as e:
+            print(f"LLM cache read error: {e}")
+            return None
+
+        if row is None or row[1] <= time.time():
+            return None
+        return row[0]
+
+    def _disk_set(self, key: str, value: str) -> None:
+        try:
+            with self._conn_lock:
+                conn = self._connection()
+                conn.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, value, time.time() + self.ttl)
+                )
+                conn.commit()
+        except sqlite3.Error as e:
+            print(f"LLM cache write error: {e}")
+
+    def _disk_delete(self, key: str) -> None:
+        try:
+            with self._conn_lock:
+                conn = self._connection()
+                conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                conn.commit()
+        except sqlite3.Error as e:
+            print(f"LLM cache delete error: {e}")
+
+
+# Singleton instance
+llm_cache = LLMResponseCache()
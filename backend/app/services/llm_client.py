@@ -0,0 +1,230 @@
+"""
+LLM Client
+Shared async gateway for every Claude call made by the backend
+"""
+from typing import Callable, Optional
+import asyncio
+import os
+import anthropic
+import httpx
+from dotenv import load_dotenv
+from .llm_cache import llm_cache
+
+load_dotenv()
+
+DEFAULT_MODEL = "claude-3-5-sonnet-20241022"
+
+
+class LLMClient:
+    """
+    Async wrapper around the Anthropic Messages API
+
+    One instance is shared by all services so that:
+    - HTTP connections are pooled and kept alive between calls
+    - Every call has a hard deadline (per-call timeout)
+    - Awaiting callers can be cancelled without leaking the request
+    - The number of in-flight requests is bounded process-wide
+    - Deterministic (temperature 0) completions are served from llm_cache
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        timeout: Optional[float] = None,
+        max_concurrency: Optional[int] = None,
+        max_connections: Optional[int] = None
+    ):
+        self.api_key = api_key or os.getenv("ANTHROPIC_API_KEY") or os.getenv("CLAUDE_API_KEY")
+        self.timeout = timeout or float(os.getenv("LLM_TIMEOUT_SECONDS", "90"))
+        self.max_concurrency = max_concurrency or int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+        self.max_connections = max_connections or int(os.getenv("LLM_MAX_CONNECTIONS", "32"))
+
+        self.cache = llm_cache
+        self.cache_enabled = os.getenv("LLM_CACHE_ENABLED", "true").lower() != "false"
+
+        self._client: Optional[anthropic.AsyncAnthropic] = None
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    @property
+    def client(self) -> anthropic.AsyncAnthropic:
+        """Lazily build the pooled async client (one connection pool per process)"""
+        if self._client is None:
+            http_client = anthropic.DefaultAsyncHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                    keepalive_expiry=60.0
+                )
+            )
+            self._client = anthropic.AsyncAnthropic(
+                api_key=self.api_key,
+                http_client=http_client,
+                timeout=self.timeout,
+                max_retries=2
+            )
+        return self._client
+
+    async def create(
+        self,
+        messages: list,
+        max_tokens: int,
+        model: str = DEFAULT_MODEL,
+        temperature: Optional[float] = None,
+        timeout: Optional[float] = None,
+        **kwargs
+    ):
+        """
+        Send a Messages API request and return the raw response
+
+        Args:
+            messages: Anthropic-format message list
+            max_tokens: Maximum tokens to generate
+            model: Claude model name
+            temperature: Sampling temperature (None = API default)
+            timeout: Per-call deadline in seconds (defaults to client timeout)
+
+        Returns:
+            anthropic Message object
+
+        Raises:
+            asyncio.TimeoutError: If the call exceeds its deadline
+        """
+        deadline = timeout or self.timeout
+
+        params = {
+            "model": model,
+            "max_tokens": max_tokens,
+            "messages": messages,
+            **kwargs
+        }
+        if temperature is not None:
+            params["temperature"] = temperature
+
+        async with self._semaphore:
+            # wait_for cancels the underlying HTTP request if the deadline passes,
+            # and a cancelled caller propagates straight through to httpx
+            return await asyncio.wait_for(
+                self.client.messages.create(timeout=deadline, **params),
+                timeout=deadline
+            )
+
+    async def complete(
+        self,
+        prompt: str,
+        max_tokens: int,
+        model: str = DEFAULT_MODEL,
+        temperature: Optional[float] = None,
+        timeout: Optional[float] = None,
+        cache: Optional[bool] = None
+    ) -> str:
+        """
+        Send a single user prompt and return the text of the first content block
+
+        Args:
+            prompt: User prompt text
+            max_tokens: Maximum tokens to generate
+            model: Claude model name
+            temperature: Sampling temperature (None = API default)
+            timeout: Per-call deadline in seconds
+            cache: Serve/store the response in llm_cache
+                   (None = only when temperature is 0). Only replies that
+                   finished normally (stop_reason "end_turn") are stored;
+                   truncated replies are never cached.
+
+        Returns:
+            Response text
+        """
+        if cache is None:
+            cache = temperature == 0
+        cache = cache and self.cache_enabled
+
+        cache_key = None
+        if cache:
+            cache_key = self.cache.make_key(model, prompt, max_tokens, temperature)
+            cached = await self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        message = await self.create(
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=max_tokens,
+            model=model,
+            temperature=temperature,
+            timeout=timeout
+        )
+        text = message.content[0].text
+
+        if cache_key is not None and message.stop_reason == "end_turn":
+            await self.cache.set(cache_key, text)
+
+        return text
+
+    async def evict(
+        self,
+        prompt: str,
+        max_tokens: int,
+        model: str = DEFAULT_MODEL,
+        temperature: Optional[float] = None
+    ) -> None:
+        """
+        Drop a cached response, e.g. one the caller could not parse, so the
+        next identical complete() call goes to the API
+
+        Args are the ones the response was requested with.
+        """
+        await self.cache.delete(self.cache.make_key(model, prompt, max_tokens, temperature))
+
+    async def stream(
+        self,
+        prompt: str,
+        max_tokens: int,
+        model: str = DEFAULT_MODEL,
+        temperature: Optional[float] = None,
+        timeout: Optional[float] = None,
+        on_text: Optional[Callable[[str], None]] = None
+    ) -> str:
+        """
+        Stream a single user prompt, reporting text deltas as they arrive
+
+        Args:
+            prompt: User prompt text
+            max_tokens: Maximum tokens to generate
+            model: Claude model name
+            temperature: Sampling temperature (None = API default)
+            timeout: Deadline in seconds for the whole stream
+            on_text: Called with each text delta
+
+        Returns:
+            Full response text
+        """
+        deadline = timeout or self.timeout
+
+        params = {
+            "model": model,
+            "max_tokens": max_tokens,
+            "messages": [{"role": "user", "content": prompt}]
+        }
+        if temperature is not None:
+            params["temperature"] = temperature
+
+        async def consume() -> str:
+            chunks = []
+            async with self.client.messages.stream(timeout=deadline, **params) as stream:
+                async for text in stream.text_stream:
+                    chunks.append(text)
+                    if on_text is not None:
+                        on_text(text)
+            return "".join(chunks)
+
+        async with self._semaphore:
+            return await asyncio.wait_for(consume(), timeout=deadline)
+
+    async def aclose(self) -> None:
+        """Close the pooled HTTP connections (called on app shutdown)"""
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+
+# Singleton instance
+llm_client = LLMClient()
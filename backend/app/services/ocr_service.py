@@ -1,16 +1,87 @@
 """OCR Service - Resume text extraction using Gemini"""
 
 import google.generativeai as genai
-import base64
 from pathlib import Path
+import asyncio
 import os
+import re
+import tempfile
+from typing import Optional
 from dotenv import load_dotenv
+from ..utils.async_retry import retry_async, poll_until, deadline_after, to_thread_detached
 
 load_dotenv()
 
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 genai.configure(api_key=GEMINI_API_KEY)
 
+# Files up to this size are sent inline with the request; larger ones are
+# streamed from disk through the Gemini Files API
+GEMINI_INLINE_MAX_BYTES = int(os.getenv("GEMINI_INLINE_MAX_MB", "4")) * 1024 * 1024
+GEMINI_FILE_POLL_SECONDS = 1.0
+GEMINI_FILE_TIMEOUT_SECONDS = float(os.getenv("GEMINI_FILE_TIMEOUT_SECONDS", "120"))
+
+# PDF pages whose text layer scores below this are sent to vision OCR
+PDF_TEXT_MIN_QUALITY = float(os.getenv("PDF_TEXT_MIN_QUALITY", "0.6"))
+# Fewer characters than this means the page has no usable text layer
+PDF_PAGE_MIN_CHARS = 40
+
+# Scanned PDFs with at least this many pages are OCR'd page by page, in
+# parallel, instead of as one document
+OCR_PAGE_SPLIT_MIN_PAGES = int(os.getenv("OCR_PAGE_SPLIT_MIN_PAGES", "3"))
+OCR_PAGE_CONCURRENCY = int(os.getenv("OCR_PAGE_CONCURRENCY", "4"))
+OCR_PAGE_RETRIES = int(os.getenv("OCR_PAGE_RETRIES", "2"))
+# Budget for OCR of one page, retries included; it starts when the page's
+# turn comes, so pages waiting for a slot aren't charged for the wait
+OCR_TIMEOUT_SECONDS = float(os.getenv("OCR_TIMEOUT_SECONDS", "180"))
+
+# Output budget for structuring text with Claude: the JSON repeats the whole
+# resume, so it grows with the input (about 3 characters per token, plus
+# room for keys), capped at the model's output limit
+STRUCTURE_MIN_TOKENS = 2000
+STRUCTURE_MAX_TOKENS = 8192
+
+MIME_TYPES = {
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.png': 'image/png',
+    '.pdf': 'application/pdf'
+}
+
+PAGE_OCR_PROMPT = """Transcribe ALL text on this resume page exactly as written.
+Keep the reading order and line breaks. Return ONLY the text, no commentary or formatting."""
+
+
+def score_text_quality(text: str) -> float:
+    """
+    How usable an extracted text layer is, from 0 (nothing / garbage) to 1
+
+    Born-digital pages score close to 1. Scanned pages have no text (0),
+    and broken font encodings show up as "(cid:NN)" runs, replacement
+    characters or tokens without a single letter or digit.
+    """
+    stripped = text.strip()
+    if len(stripped) < PDF_PAGE_MIN_CHARS:
+        return 0.0
+
+    garbage = len(re.findall(r"\(cid:\d+\)", stripped)) * 8 + stripped.count("\ufffd")
+    printable = sum(1 for char in stripped if char.isprintable() or char in "\n\t")
+    char_score = max(0.0, (printable - garbage) / len(stripped))
+
+    tokens = stripped.split()
+    wordlike = sum(1 for token in tokens if len(token) <= 30 and any(char.isalnum() for char in token))
+    word_score = wordlike / len(tokens)
+
+    return char_score * word_score
+
+def _delete_gemini_file(uploaded) -> None:
+    """Delete an uploaded file nobody is waiting for any more"""
+    try:
+        genai.delete_file(uploaded.name)
+    except Exception as e:
+        print(f"Could not delete Gemini file {uploaded.name}: {str(e)}")
+
+
 class OCRService:
     def __init__(self):
         self.model = genai.GenerativeModel('gemini-2.0-flash-exp')
@@ -28,27 +99,70 @@ class OCRService:
         elif file_ext == '.doc':
             return await self._extract_from_doc(file_path)
 
-        # Handle PDF and images with Gemini OCR
-        return await self._extract_with_gemini(file_path)
+        elif file_ext == '.pdf':
+            return await self._extract_from_pdf(file_path)
 
-    async def _extract_with_gemini(self, file_path: str) -> dict:
-        """Extract using Gemini OCR (for PDF/images)"""
+        # Handle images with Gemini OCR
+        return await self._extract_with_gemini(file_path)
 
-        # Read file and convert to base64
-        with open(file_path, 'rb') as f:
-            file_data = f.read()
+    async def _upload_to_gemini(self, file_path: str, mime_type: str, deadline: Optional[float] = None):
+        """Stream a file to the Gemini Files API and wait until it's ready"""
+        # Callers may time out mid-upload; the file is then deleted once the upload lands
+        uploaded = await to_thread_detached(
+            genai.upload_file, path=file_path, mime_type=mime_type,
+            on_abandoned=_delete_gemini_file
+        )
 
-        base64_data = base64.b64encode(file_data).decode('utf-8')
+        if uploaded.state.name == "PROCESSING":
+            file_deadline = deadline_after(GEMINI_FILE_TIMEOUT_SECONDS)
+            name = uploaded.name
+            try:
+                uploaded = await poll_until(
+                    lambda: asyncio.to_thread(genai.get_file, name),
+                    lambda f: f.state.name != "PROCESSING",
+                    interval=GEMINI_FILE_POLL_SECONDS,
+                    deadline=min(deadline, file_deadline) if deadline else file_deadline,
+                    label="Gemini file processing"
+                )
+            except asyncio.TimeoutError:
+                await asyncio.to_thread(genai.delete_file, name)
+                raise Exception("Gemini file processing timed out")
+
+        if uploaded.state.name == "FAILED":
+            await asyncio.to_thread(genai.delete_file, uploaded.name)
+            raise Exception("Gemini file processing failed")
+
+        return uploaded
+
+    async def _generate_with_gemini(self, file_path: str, prompt: str, deadline: Optional[float] = None) -> str:
+        """Run a prompt against a PDF/image with Gemini and return the response text"""
 
         # Determine MIME type
         file_ext = Path(file_path).suffix.lower()
-        mime_type_map = {
-            '.jpg': 'image/jpeg',
-            '.jpeg': 'image/jpeg',
-            '.png': 'image/png',
-            '.pdf': 'application/pdf'
-        }
-        mime_type = mime_type_map.get(file_ext, 'application/octet-stream')
+        mime_type = MIME_TYPES.get(file_ext, 'application/octet-stream')
+
+        # Small files go inline as raw bytes (no base64 copy); large ones are
+        # uploaded from disk so they are never held in memory
+        uploaded = None
+        if os.path.getsize(file_path) <= GEMINI_INLINE_MAX_BYTES:
+            with open(file_path, 'rb') as f:
+                document = {"mime_type": mime_type, "data": f.read()}
+        else:
+            print(f"Uploading {file_path} to Gemini Files API")
+            uploaded = await self._upload_to_gemini(file_path, mime_type, deadline)
+            document = uploaded
+
+        # Generate content
+        try:
+            result = await asyncio.to_thread(self.model.generate_content, [document, prompt])
+        finally:
+            if uploaded is not None:
+                await asyncio.to_thread(genai.delete_file, uploaded.name)
+
+        return result.text
+
+    async def _extract_with_gemini(self, file_path: str) -> dict:
+        """Extract using Gemini OCR (for PDF/images)"""
 
         prompt = """Extract ALL information from this resume with 100% accuracy.
 
@@ -106,18 +220,7 @@ Return ONLY a JSON object with this structure:
 
 Extract EVERYTHING you see. Do not summarize or interpret - extract exactly as written."""
 
-        # Generate content
-        result = self.model.generate_content([
-            {
-                "inline_data": {
-                    "mime_type": mime_type,
-                    "data": base64_data
-                }
-            },
-            prompt
-        ])
-
-        response_text = result.text
+        response_text = await self._generate_with_gemini(file_path, prompt)
 
         # Clean up JSON (remove markdown code blocks if present)
         if response_text.startswith('```json'):
@@ -128,6 +231,135 @@ Extract EVERYTHING you see. Do not summarize or interpret - extract exactly as w
         import json
         return json.loads(response_text)
 
+    async def _extract_from_pdf(self, file_path: str) -> dict:
+        """
+        Extract a PDF, using its text layer where it is good enough
+
+        Born-digital PDFs are read locally and only structured by Claude.
+        Pages without a usable text layer (scans, images, broken font
+        encodings) are transcribed by Gemini page by page, concurrently,
+        and merged back in page order. Short scans (fewer than
+        OCR_PAGE_SPLIT_MIN_PAGES pages) go to full-document Gemini OCR.
+        """
+        pages = await asyncio.to_thread(self._read_pdf_text_layer, file_path)
+        if not pages:
+            return await self._extract_with_gemini(file_path)
+
+        scores = [score_text_quality(text) for text in pages]
+        bad_pages = [index for index, score in enumerate(scores) if score < PDF_TEXT_MIN_QUALITY]
+        print(f"PDF text layer: {len(pages) - len(bad_pages)}/{len(pages)} pages usable")
+
+        if len(bad_pages) == len(pages) and len(pages) < OCR_PAGE_SPLIT_MIN_PAGES:
+            return await self._extract_with_gemini(file_path)
+
+        texts, failed_pages = await self._ocr_pdf_pages(file_path, bad_pages)
+        if failed_pages and len(failed_pages) == len(pages):
+            raise Exception(f"OCR failed for all {len(pages)} pages")
+
+        for index, text in texts.items():
+            pages[index] = text
+        for index in failed_pages:
+            pages[index] = f"[Page {index + 1} could not be read]"
+
+        try:
+            result = await self._structure_text_with_claude("\n\n".join(page.strip() for page in pages))
+        except ValueError as e:
+            # Truncated or malformed JSON (e.g. a very long CV); Gemini reads the whole file instead
+            print(f"Structuring PDF text failed, falling back to Gemini: {str(e)}")
+            return await self._extract_with_gemini(file_path)
+
+        if failed_pages:
+            result["ocr_failed_pages"] = [index + 1 for index in failed_pages]
+        return result
+
+    def _read_pdf_text_layer(self, file_path: str) -> list:
+        """Text of each PDF page (empty list if pypdf is missing or the PDF can't be read)"""
+        try:
+            from pypdf import PdfReader
+        except ImportError:
+            print("pypdf not installed, using Gemini OCR for PDFs. Install with: pip install pypdf")
+            return []
+
+        try:
+            reader = PdfReader(file_path)
+            return [page.extract_text() or "" for page in reader.pages]
+        except Exception as e:
+            print(f"Could not read PDF text layer: {str(e)}")
+            return []
+
+    def _split_pdf_pages(self, file_path: str, page_indexes: list) -> dict:
+        """Copy PDF pages into temporary single-page PDFs, returning {page index: path}"""
+        from pypdf import PdfReader, PdfWriter
+
+        reader = PdfReader(file_path)
+        page_paths = {}
+        try:
+            for page_index in page_indexes:
+                writer = PdfWriter()
+                writer.add_page(reader.pages[page_index])
+
+                fd, page_path = tempfile.mkstemp(suffix='.pdf')
+                page_paths[page_index] = page_path
+                with os.fdopen(fd, 'wb') as f:
+                    writer.write(f)
+        except Exception:
+            for page_path in page_paths.values():
+                os.remove(page_path)
+            raise
+        return page_paths
+
+    async def _ocr_page(self, page_path: str, page_index: int, deadline: Optional[float] = None) -> str:
+        """Transcribe one single-page PDF, retrying with jittered backoff"""
+        text = await retry_async(
+            lambda: self._generate_with_gemini(page_path, PAGE_OCR_PROMPT, deadline),
+            attempts=OCR_PAGE_RETRIES + 1,
+            deadline=deadline,
+            label=f"OCR of page {page_index + 1}"
+        )
+        return text.strip()
+
+    async def _ocr_pdf_pages(self, file_path: str, page_indexes: list) -> tuple:
+        """
+        Transcribe PDF pages with Gemini, OCR_PAGE_CONCURRENCY at a time
+
+        A page that still fails after its retries doesn't fail the others.
+
+        Returns:
+            Tuple of ({page index: text}, [indexes of pages that failed])
+        """
+        if not page_indexes:
+            return {}, []
+
+        page_paths = await asyncio.to_thread(self._split_pdf_pages, file_path, page_indexes)
+        semaphore = asyncio.Semaphore(OCR_PAGE_CONCURRENCY)
+
+        async def run(page_index: int) -> str:
+            async with semaphore:
+                deadline = deadline_after(OCR_TIMEOUT_SECONDS)
+                return await self._ocr_page(page_paths[page_index], page_index, deadline)
+
+        try:
+            results = await asyncio.gather(
+                *(run(page_index) for page_index in page_indexes),
+                return_exceptions=True
+            )
+        finally:
+            for page_path in page_paths.values():
+                os.remove(page_path)
+
+        texts = {}
+        failed_pages = []
+        for page_index, result in zip(page_indexes, results):
+            if isinstance(result, BaseException):
+                if isinstance(result, asyncio.CancelledError):
+                    raise result
+                print(f"OCR of page {page_index + 1} failed: {str(result)}")
+                failed_pages.append(page_index)
+            else:
+                texts[page_index] = result
+
+        return texts, failed_pages
+
     async def _extract_from_txt(self, file_path: str) -> dict:
         """Extract text from plain text file"""
         with open(file_path, 'r', encoding='utf-8') as f:
@@ -189,10 +421,16 @@ Extract EVERYTHING you see. Do not summarize or interpret - extract exactly as w
             raise Exception(f"Failed to extract .doc file: {str(e)}")
 
     async def _structure_text_with_claude(self, raw_text: str) -> dict:
-        """Use Claude to structure raw text into resume format"""
-        import anthropic
+        """
+        Use Claude to structure raw text into resume format
 
-        claude = anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY") or os.getenv("CLAUDE_API_KEY"))
+        Raises:
+            ValueError: The response is not valid JSON (json.JSONDecodeError),
+            e.g. because a very long resume hit the output limit
+        """
+        from .llm_client import llm_client
+
+        max_tokens = min(STRUCTURE_MAX_TOKENS, max(STRUCTURE_MIN_TOKENS, len(raw_text) // 3 + 1000))
 
         prompt = f"""Extract ALL information from this resume text and structure it properly.
 
@@ -243,13 +481,7 @@ Return ONLY a JSON object with this structure:
 
 Extract EVERYTHING you see. Do not summarize - extract exactly as written."""
 
-        message = claude.messages.create(
-            model="claude-3-5-sonnet-20241022",
-            max_tokens=2000,
-            messages=[{"role": "user", "content": prompt}]
-        )
-
-        response_text = message.content[0].text.strip()
+        response_text = (await llm_client.complete(prompt, max_tokens=max_tokens)).strip()
 
         # Clean up JSON
         if response_text.startswith('```json'):
@@ -3,74 +3,197 @@ PDF Export Service
 Converts HTML resumes to ATS-compatible PDF files using WeasyPrint
 """
 from weasyprint import HTML, CSS
-from typing import Optional
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Tuple
+import asyncio
+import hashlib
 import io
+import multiprocessing
+import os
+from ..utils.cache import TTLLRUCache
+
+# ATS-safe CSS for PDF generation
+BASE_CSS = """
+    @page {
+        size: Letter;
+        margin: 0.5in;
+    }
+
+    body {
+        font-family: Arial, sans-serif;
+        font-size: 11pt;
+        line-height: 1.15;
+        color: #000000;
+    }
+
+    h1 {
+        font-size: 18pt;
+        margin: 0 0 5px 0;
+        font-weight: bold;
+        color: #000000;
+    }
+
+    h2 {
+        font-size: 12pt;
+        margin: 15px 0 5px 0;
+        font-weight: bold;
+        text-transform: uppercase;
+        border-bottom: 1px solid #000000;
+        color: #000000;
+    }
+
+    h3 {
+        font-size: 11pt;
+        margin: 10px 0 3px 0;
+        font-weight: bold;
+        color: #000000;
+    }
+
+    p {
+        margin: 2px 0;
+    }
+
+    ul {
+        margin: 5px 0;
+        padding-left: 20px;
+    }
+
+    li {
+        margin-bottom: 3px;
+    }
+
+    /* Ensure print-friendly */
+    * {
+        -webkit-print-color-adjust: exact;
+        print-color-adjust: exact;
+    }
+
+    /* No page breaks inside important sections */
+    .experience-item, .education-item {
+        page-break-inside: avoid;
+    }
+"""
+
+# Extra ATS-safe rules for generate_ats_safe_pdf
+ATS_CSS = """
+    /* Remove any colors that might not print well */
+    * {
+        color: #000000 !important;
+        background-color: #ffffff !important;
+    }
+
+    /* Ensure standard margins */
+    @page {
+        margin: 0.75in;
+    }
+
+    /* Remove any borders except for section headers */
+    * {
+        border: none !important;
+    }
+
+    h2 {
+        border-bottom: 1px solid #000000 !important;
+    }
+
+    /* Ensure readable line height */
+    body {
+        line-height: 1.2 !important;
+    }
+"""
+
+
+def _render_pdf(html_content: str, stylesheets: Tuple[str, ...]) -> bytes:
+    """Render HTML to PDF bytes (runs inside a render worker process)"""
+    html = HTML(string=html_content)
+    return html.write_pdf(stylesheets=[CSS(string=css) for css in stylesheets])
+
 
 class PDFExporter:
     """Generate ATS-compatible PDF resumes from HTML"""
 
-    def __init__(self):
-        # ATS-safe CSS for PDF generation
-        self.base_css = CSS(string="""
-            @page {
-                size: Letter;
-                margin: 0.5in;
-            }
-
-            body {
-                font-family: Arial, sans-serif;
-                font-size: 11pt;
-                line-height: 1.15;
-                color: #000000;
-            }
-
-            h1 {
-                font-size: 18pt;
-                margin: 0 0 5px 0;
-                font-weight: bold;
-                color: #000000;
-            }
-
-            h2 {
-                font-size: 12pt;
-                margin: 15px 0 5px 0;
-                font-weight: bold;
-                text-transform: uppercase;
-                border-bottom: 1px solid #000000;
-                color: #000000;
-            }
-
-            h3 {
-                font-size: 11pt;
-                margin: 10px 0 3px 0;
-                font-weight: bold;
-                color: #000000;
-            }
-
-            p {
-                margin: 2px 0;
-            }
-
-            ul {
-                margin: 5px 0;
-                padding-left: 20px;
-            }
-
-            li {
-                margin-bottom: 3px;
-            }
-
-            /* Ensure print-friendly */
-            * {
-                -webkit-print-color-adjust: exact;
-                print-color-adjust: exact;
-            }
-
-            /* No page breaks inside important sections */
-            .experience-item, .education-item {
-                page-break-inside: avoid;
-            }
-        """)
+    def __init__(self, max_workers: Optional[int] = None):
+        self.base_css = CSS(string=BASE_CSS)
+
+        # WeasyPrint is CPU-bound, so async renders run in worker processes
+        # and their output is cached by content hash
+        self.max_workers = max_workers or int(os.getenv("PDF_RENDER_WORKERS", "2"))
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self.cache = TTLLRUCache(
+            maxsize=int(os.getenv("PDF_CACHE_MAX_ENTRIES", "128")),
+            ttl=float(os.getenv("PDF_CACHE_TTL_SECONDS", str(24 * 3600)))
+        )
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        """Lazily start the render worker pool"""
+        if self._executor is None:
+            # spawn: forking a process that runs the event loop and client
+            # threads can deadlock the child
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    async def render_pdf(self, html_content: str, optimize_for_ats: bool = False) -> bytes:
+        """
+        Render HTML to PDF bytes off the event loop
+
+        Identical (HTML, CSS) inputs are rendered once: repeat calls are served
+        from the cache and concurrent calls share the same render.
+
+        Args:
+            html_content: HTML string of resume
+            optimize_for_ats: Apply extra ATS-safe styling
+
+        Returns:
+            PDF file as bytes
+        """
+        stylesheets = (BASE_CSS, ATS_CSS) if optimize_for_ats else (BASE_CSS,)
+        digest = hashlib.sha256()
+        for part in (html_content,) + stylesheets:
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        key = digest.hexdigest()
+
+        pdf_bytes = self.cache.get(key)
+        if pdf_bytes is not None:
+            return pdf_bytes
+
+        future = self._in_flight.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self.executor, _render_pdf, html_content, stylesheets)
+            self._in_flight[key] = future
+            future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+
+        # shield: one cancelled download must not cancel a render others await
+        pdf_bytes = await asyncio.shield(future)
+        self.cache.set(key, pdf_bytes)
+        return pdf_bytes
+
+    async def get_pdf_stream_async(self, html_content: str) -> io.BytesIO:
+        """
+        Async variant of get_pdf_stream backed by the render pool and cache
+
+        Args:
+            html_content: HTML string of resume
+
+        Returns:
+            BytesIO stream containing PDF
+        """
+        pdf_stream = io.BytesIO(await self.render_pdf(html_content))
+        pdf_stream.seek(0)
+
+        return pdf_stream
+
+    def shutdown(self) -> None:
+        """Stop the render worker pool (called on app shutdown)"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
 
     def html_to_pdf(self, html_content: str) -> bytes:
         """
@@ -118,32 +241,7 @@ class PDFExporter:
         """
         if optimize_for_ats:
             # Add extra ATS-safe CSS rules
-            ats_css = CSS(string="""
-                /* Remove any colors that might not print well */
-                * {
-                    color: #000000 !important;
-                    background-color: #ffffff !important;
-                }
-
-                /* Ensure standard margins */
-                @page {
-                    margin: 0.75in;
-                }
-
-                /* Remove any borders except for section headers */
-                * {
-                    border: none !important;
-                }
-
-                h2 {
-                    border-bottom: 1px solid #000000 !important;
-                }
-
-                /* Ensure readable line height */
-                body {
-                    line-height: 1.2 !important;
-                }
-            """)
+            ats_css = CSS(string=ATS_CSS)
 
             html = HTML(string=html_content)
             pdf_bytes = html.write_pdf(stylesheets=[self.base_css, ats_css])
@@ -167,3 +265,7 @@ class PDFExporter:
         pdf_stream.seek(0)
 
         return pdf_stream
+
+
+# Singleton instance
+pdf_exporter = PDFExporter()
@@ -73,8 +73,7 @@ Thanks so much!
         """Parse reference response and extract structured data"""
 
         # Use Claude to parse the response
-        from anthropic import Anthropic
-        client = Anthropic(api_key=os.getenv("CLAUDE_API_KEY"))
+        from .llm_client import llm_client
 
         prompt = f"""Parse this reference response and extract resume-relevant information.
 
@@ -90,13 +89,7 @@ Return JSON:
   "strengths": ["key strengths identified"]
 }}"""
 
-        message = client.messages.create(
-            model="claude-3-5-sonnet-20241022",
-            max_tokens=2000,
-            messages=[{"role": "user", "content": prompt}]
-        )
-
-        response = message.content[0].text
+        response = await llm_client.complete(prompt, max_tokens=2000)
         if response.startswith('```json'):
             response = response.split('```json')[1].split('```')[0].strip()
 
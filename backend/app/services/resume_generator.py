@@ -2,17 +2,22 @@
 Resume Generator Service
 Compiles knowledge base entries into ATS-optimized resumes
 """
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, AsyncIterator, Callable
 from datetime import datetime
-import anthropic
+import asyncio
 import os
 from ..database import get_supabase
 from ..utils.user_utils import ensure_user_profile
+from .llm_client import llm_client
+from .fact_index import fact_index
+from .knowledge_snapshot import knowledge_snapshot
 
 class ResumeGenerator:
     def __init__(self):
-        self.claude = anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+        self.llm = llm_client
         self.supabase = get_supabase()
+        self.fact_index = fact_index
+        self.knowledge_snapshot = knowledge_snapshot
 
         # Load ATS guide
         ats_guide_path = os.path.join(os.path.dirname(__file__), "../../data/ATS_Resume_Optimization_Guide_2025.md")
@@ -39,47 +44,176 @@ class ResumeGenerator:
         Returns:
             Dictionary with resume structure and content
         """
+        context = await self._prepare_generation(user_id, job_description, user_prompt)
+        organized_knowledge = context['organized_knowledge']
+        target_keywords = context['target_keywords']
+
+        # 5-8. Summary, experience (one bullet call per position) and skills
+        #      only depend on the keywords, so they are generated concurrently
+        summary, experience, skills = await asyncio.gather(
+            self._generate_summary(
+                profile=context['profile'],
+                knowledge=organized_knowledge,
+                target_role=target_role or user_prompt,
+                keywords=target_keywords
+            ),
+            self._generate_experience(
+                knowledge=organized_knowledge,
+                keywords=target_keywords
+            ),
+            self._generate_skills(
+                knowledge=organized_knowledge,
+                keywords=target_keywords
+            )
+        )
+
+        return self._assemble_resume(
+            context, summary, experience, skills,
+            job_description=job_description,
+            target_role=target_role,
+            user_prompt=user_prompt
+        )
+
+    async def generate_resume_stream(
+        self,
+        user_id: str,
+        job_description: Optional[str] = None,
+        target_role: Optional[str] = None,
+        user_prompt: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Generate a resume, yielding each section as soon as it is ready
+
+        Same inputs and final structure as generate_resume. Yields events:
+            {"event": "status", "stage": ...}
+            {"event": "delta", "section": ..., "index": ..., "text": ...}   (streamed tokens)
+            {"event": "section", "section": ..., "index": ..., "content": ...}
+            {"event": "resume", "resume": {...}}                           (last event)
+
+        "index" is the position number for experience sections, None otherwise.
+        """
+        yield {"event": "status", "stage": "preparing"}
+
+        context = await self._prepare_generation(user_id, job_description, user_prompt)
+        organized_knowledge = context['organized_knowledge']
+        target_keywords = context['target_keywords']
+        positions = self._plan_experience(organized_knowledge)
+
+        yield {"event": "status", "stage": "generating", "positions": len(positions)}
+
+        events: asyncio.Queue = asyncio.Queue()
+
+        def on_delta(section: str, index: Optional[int] = None) -> Callable[[str], None]:
+            return lambda text: events.put_nowait(
+                {"event": "delta", "section": section, "index": index, "text": text}
+            )
+
+        async def run_section(section: str, index: Optional[int], call):
+            try:
+                result = await call
+            except Exception as e:
+                events.put_nowait({"event": "failed", "section": section, "index": index, "error": e})
+                raise
+            content = self._build_experience_item(positions[index][0], result) if section == "experience" else result
+            events.put_nowait({"event": "section", "section": section, "index": index, "content": content})
+            return content
+
+        tasks = [
+            asyncio.create_task(run_section("summary", None, self._generate_summary(
+                profile=context['profile'],
+                knowledge=organized_knowledge,
+                target_role=target_role or user_prompt,
+                keywords=target_keywords,
+                on_delta=on_delta("summary")
+            ))),
+            asyncio.create_task(run_section("skills", None, self._generate_skills(
+                knowledge=organized_knowledge,
+                keywords=target_keywords,
+                on_delta=on_delta("skills")
+            )))
+        ]
+        for index, (exp_entry, accomplishments, stories) in enumerate(positions):
+            tasks.append(asyncio.create_task(run_section("experience", index, self._generate_bullets(
+                experience=exp_entry,
+                accomplishments=accomplishments,
+                stories=stories,
+                keywords=target_keywords,
+                on_delta=on_delta("experience", index)
+            ))))
+
+        try:
+            remaining = len(tasks)
+            while remaining:
+                event = await events.get()
+                if event["event"] == "failed":
+                    raise event["error"]
+                if event["event"] == "section":
+                    remaining -= 1
+                yield event
+        finally:
+            # Stop outstanding calls if the consumer disconnects or a section fails
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        summary, skills = tasks[0].result(), tasks[1].result()
+        experience = self._sort_experience([task.result() for task in tasks[2:]])
+
+        yield {
+            "event": "resume",
+            "resume": self._assemble_resume(
+                context, summary, experience, skills,
+                job_description=job_description,
+                target_role=target_role,
+                user_prompt=user_prompt
+            )
+        }
+
+    async def _prepare_generation(
+        self,
+        user_id: str,
+        job_description: Optional[str],
+        user_prompt: Optional[str]
+    ) -> Dict[str, Any]:
+        """Fetch and organize the knowledge base and extract target keywords"""
         # 1. Fetch all knowledge base entries
         knowledge_base = await self._fetch_knowledge_base(user_id)
 
         # 2. Fetch user profile
         profile = await self._fetch_user_profile(user_id)
 
-        # 3. If user_prompt provided, filter relevant facts FIRST
+        # 3. Extract target keywords, then (generic mode) select relevant facts.
+        #    The prompt keywords expand the retrieval query ("concession stand"
+        #    -> customer service, cash handling) before the fact shortlist is built.
+        target_keywords = await self._extract_target_keywords(job_description, user_prompt)
         if user_prompt and not job_description:
-            # Generic mode: Select relevant facts based on prompt
-            knowledge_base = await self.select_relevant_facts(user_prompt, knowledge_base)
+            knowledge_base = await self.select_relevant_facts(
+                user_prompt, knowledge_base, user_id=user_id, query_keywords=target_keywords
+            )
 
         # 4. Organize knowledge by type
         organized_knowledge = self._organize_knowledge(knowledge_base)
 
-        # 5. Extract keywords from job description if provided
-        target_keywords = []
-        if job_description:
-            target_keywords = await self._extract_keywords(job_description)
-        elif user_prompt:
-            # Extract keywords from user prompt for generic mode
-            target_keywords = await self._extract_keywords_from_prompt(user_prompt)
-
-        # 6. Generate professional summary
-        summary = await self._generate_summary(
-            profile=profile,
-            knowledge=organized_knowledge,
-            target_role=target_role or user_prompt,
-            keywords=target_keywords
-        )
-
-        # 7. Generate work experience section
-        experience = await self._generate_experience(
-            knowledge=organized_knowledge,
-            keywords=target_keywords
-        )
+        return {
+            "profile": profile,
+            "knowledge_base": knowledge_base,
+            "organized_knowledge": organized_knowledge,
+            "target_keywords": target_keywords
+        }
 
-        # 8. Generate skills section
-        skills = await self._generate_skills(
-            knowledge=organized_knowledge,
-            keywords=target_keywords
-        )
+    def _assemble_resume(
+        self,
+        context: Dict[str, Any],
+        summary: str,
+        experience: List[Dict],
+        skills: Dict[str, List[str]],
+        job_description: Optional[str],
+        target_role: Optional[str],
+        user_prompt: Optional[str]
+    ) -> Dict[str, Any]:
+        """Combine generated sections with the knowledge-derived ones"""
+        profile = context['profile']
+        organized_knowledge = context['organized_knowledge']
 
         # 9. Generate education section
         education = self._generate_education(organized_knowledge)
@@ -88,7 +222,7 @@ class ResumeGenerator:
         certifications = self._generate_certifications(organized_knowledge)
 
         # 11. Assemble complete resume
-        resume_structure = {
+        return {
             "contact_info": {
                 "name": profile.get("full_name", ""),
                 "email": profile.get("email", ""),
@@ -104,23 +238,39 @@ class ResumeGenerator:
             "certifications": certifications,
             "metadata": {
                 "generated_at": datetime.utcnow().isoformat(),
-                "knowledge_base_entries_used": len(knowledge_base),
+                "knowledge_base_entries_used": len(context['knowledge_base']),
                 "target_role": target_role or user_prompt,
                 "job_targeted": bool(job_description),
                 "generic_mode": bool(user_prompt and not job_description)
             }
         }
 
-        return resume_structure
+    async def _extract_target_keywords(
+        self,
+        job_description: Optional[str],
+        user_prompt: Optional[str]
+    ) -> List[str]:
+        """Extract keywords from the job description, or from the prompt in generic mode"""
+        if job_description:
+            return await self._extract_keywords(job_description)
+        if user_prompt:
+            return await self._extract_keywords_from_prompt(user_prompt)
+        return []
 
     async def select_relevant_facts(
         self,
         user_prompt: str,
-        all_entities: List[Dict]
+        all_entities: List[Dict],
+        user_id: Optional[str] = None,
+        query_keywords: Optional[List[str]] = None
     ) -> List[Dict]:
         """
         Use Claude to select relevant facts based on user's prompt
 
+        The knowledge base is first narrowed to a shortlist with the user's
+        local fact index (TF-IDF, no API call), so Claude only sees the
+        FACT_SHORTLIST_SIZE most relevant facts however large the KB grows.
+
         Example:
             Prompt: "applying for concession stand position"
             Picks: customer service skills, cash handling, NOT programming
@@ -128,21 +278,29 @@ class ResumeGenerator:
         Args:
             user_prompt: User's description of what they're applying for
             all_entities: All knowledge base entries
+            user_id: Owner of the entries (defaults to the entries' user_id)
+            query_keywords: Extra retrieval terms, e.g. keywords extracted from the prompt
 
         Returns:
             Filtered list of relevant entities
         """
+        if not all_entities:
+            return all_entities
+
+        user_id = user_id or all_entities[0].get('user_id')
+        query = " ".join([user_prompt] + list(query_keywords or []))
+        candidates = self.fact_index.shortlist(user_id, query, all_entities)
 
-        # Build summary of all facts
+        # Build summary of shortlisted facts
         facts_summary = []
-        for idx, entity in enumerate(all_entities):
+        for idx, entity in enumerate(candidates):
             fact_type = entity.get('knowledge_type', 'unknown')
             title = entity.get('title', 'Untitled')
             content_preview = str(entity.get('content', ''))[:100]
 
             facts_summary.append(f"{idx}. [{fact_type}] {title}: {content_preview}")
 
-        facts_text = "\n".join(facts_summary[:100])  # Limit to 100 facts
+        facts_text = "\n".join(facts_summary)
 
         prompt = f"""A user is creating a resume for: "{user_prompt}"
 
@@ -168,13 +326,7 @@ Return ONLY a JSON array of fact IDs:
 Return ONLY the JSON array, no explanation."""
 
         try:
-            message = self.claude.messages.create(
-                model="claude-3-5-sonnet-20241022",
-                max_tokens=300,
-                messages=[{"role": "user", "content": prompt}]
-            )
-
-            response_text = message.content[0].text.strip()
+            response_text = (await self.llm.complete(prompt, max_tokens=300)).strip()
 
             # Parse JSON array
             import json
@@ -182,19 +334,19 @@ Return ONLY the JSON array, no explanation."""
 
             # Filter entities
             relevant_entities = [
-                all_entities[idx]
+                candidates[idx]
                 for idx in selected_ids
-                if idx < len(all_entities)
+                if isinstance(idx, int) and 0 <= idx < len(candidates)
             ]
 
-            print(f"Selected {len(relevant_entities)} relevant facts from {len(all_entities)} total")
+            print(f"Selected {len(relevant_entities)} relevant facts from {len(candidates)} shortlisted ({len(all_entities)} total)")
 
             return relevant_entities
 
         except Exception as e:
             print(f"Error selecting relevant facts: {str(e)}")
-            # Fallback: return all entities
-            return all_entities
+            # Fallback: return the shortlist
+            return candidates
 
     async def _extract_keywords_from_prompt(self, user_prompt: str) -> List[str]:
         """
@@ -222,13 +374,7 @@ Prompt: {user_prompt}
 Keywords:"""
 
         try:
-            message = self.claude.messages.create(
-                model="claude-3-5-sonnet-20241022",
-                max_tokens=150,
-                messages=[{"role": "user", "content": prompt_text}]
-            )
-
-            keywords_text = message.content[0].text.strip()
+            keywords_text = (await self.llm.complete(prompt_text, max_tokens=150)).strip()
             keywords = [k.strip() for k in keywords_text.split(',')]
 
             return keywords
@@ -238,62 +384,8 @@ Keywords:"""
             return []
 
     async def _fetch_knowledge_base(self, user_id: str) -> List[Dict]:
-        """Fetch all confirmed knowledge entities for user"""
-        # FIXED: Was querying user_knowledge_base (empty), now queries knowledge_entities (has data)
-        result = self.supabase.table("knowledge_entities")\
-            .select("*")\
-            .eq("user_id", user_id)\
-            .eq("is_confirmed", True)\
-            .order("created_at", desc=True)\
-            .execute()
-
-        # Transform knowledge_entities schema to match expected format
-        transformed_data = []
-        for entity in result.data:
-            # Map entity_type to knowledge_type
-            knowledge_type = self._map_entity_type_to_knowledge_type(entity.get('entity_type', 'experience'))
-
-            transformed_data.append({
-                'id': entity['id'],
-                'user_id': entity['user_id'],
-                'parent_id': entity.get('parent_id'),  # 🎯 Preserve parent-child relationships
-                'entity_type': entity.get('entity_type'),  # Keep original type for reference
-                'title': entity.get('title', ''),
-                'content': entity.get('structured_data', {}) or {'description': entity.get('description', '')},
-                'knowledge_type': knowledge_type,
-                'tags': entity.get('tags', []),
-                'date_range': self._build_date_range(entity.get('start_date'), entity.get('end_date')),
-                'created_at': entity.get('created_at', '')
-            })
-
-        return transformed_data
-
-    def _map_entity_type_to_knowledge_type(self, entity_type: str) -> str:
-        """Map knowledge_entities.entity_type to knowledge_type"""
-        mapping = {
-            'job': 'experience',
-            'work_experience': 'experience',
-            'job_experience': 'experience',
-            'job_detail': 'accomplishment',
-            'education': 'education',
-            'skill': 'skill',
-            'achievement': 'accomplishment',
-            'accomplishment': 'accomplishment',
-            'certification': 'certification',
-            'project': 'project',
-            'metric': 'metric',
-            'story': 'story'
-        }
-        return mapping.get(entity_type.lower(), 'experience')
-
-    def _build_date_range(self, start_date, end_date) -> Optional[str]:
-        """Build PostgreSQL date range format from start/end dates"""
-        if not start_date and not end_date:
-            return None
-
-        start = start_date or '1900-01-01'
-        end = end_date or '9999-12-31'
-        return f"[{start},{end})"
+        """Fetch all confirmed knowledge entities for user (shared snapshot)"""
+        return await self.knowledge_snapshot.get_knowledge_base(user_id)
 
     async def _fetch_user_profile(self, user_id: str) -> Dict:
         """Fetch user profile information, creating default if missing"""
@@ -349,13 +441,7 @@ Job Description:
 
 Return ONLY a comma-separated list of keywords, no explanations."""
 
-        message = self.claude.messages.create(
-            model="claude-3-5-sonnet-20241022",
-            max_tokens=500,
-            messages=[{"role": "user", "content": prompt}]
-        )
-
-        keywords_text = message.content[0].text
+        keywords_text = await self.llm.complete(prompt, max_tokens=500, temperature=0)
         keywords = [k.strip() for k in keywords_text.split(',')]
 
         return keywords
@@ -365,7 +451,8 @@ Return ONLY a comma-separated list of keywords, no explanations."""
         profile: Dict,
         knowledge: Dict,
         target_role: Optional[str],
-        keywords: List[str]
+        keywords: List[str],
+        on_delta: Optional[Callable[[str], None]] = None
     ) -> str:
         """Generate professional summary using Claude with ATS optimization"""
 
@@ -425,13 +512,9 @@ ATS OPTIMIZATION RULES:
 
 Return ONLY the summary text, no formatting or explanations."""
 
-        message = self.claude.messages.create(
-            model="claude-3-5-sonnet-20241022",
-            max_tokens=300,
-            messages=[{"role": "user", "content": prompt}]
-        )
+        summary = await self._complete(prompt, max_tokens=300, on_delta=on_delta)
 
-        return message.content[0].text.strip()
+        return summary.strip()
 
     async def _generate_experience(
         self,
@@ -440,13 +523,32 @@ Return ONLY the summary text, no formatting or explanations."""
     ) -> List[Dict]:
         """Generate work experience section with ATS-optimized bullet points"""
 
-        experiences = []
+        positions = self._plan_experience(knowledge)
+
+        # Generate ATS-optimized bullet points for every position at once
+        all_bullets = await asyncio.gather(*[
+            self._generate_bullets(
+                experience=exp_entry,
+                accomplishments=accomplishments,
+                stories=stories,
+                keywords=keywords
+            )
+            for exp_entry, accomplishments, stories in positions
+        ])
+
+        experiences = [
+            self._build_experience_item(exp_entry, bullets)
+            for (exp_entry, _, _), bullets in zip(positions, all_bullets)
+        ]
+
+        return self._sort_experience(experiences)
+
+    def _plan_experience(self, knowledge: Dict) -> List[tuple]:
+        """Pair each experience with its related accomplishments and stories"""
+        positions = []
 
         # Group accomplishments and stories by experience/company
         for exp_entry in knowledge['experiences']:
-            content = exp_entry['content']
-
-            # Find related accomplishments and stories
             related_accomplishments = [
                 a for a in knowledge['accomplishments']
                 if self._is_related(a, exp_entry)
@@ -457,39 +559,49 @@ Return ONLY the summary text, no formatting or explanations."""
                 if self._is_related(s, exp_entry)
             ]
 
-            # Generate ATS-optimized bullet points
-            bullets = await self._generate_bullets(
-                experience=exp_entry,
-                accomplishments=related_accomplishments,
-                stories=related_stories,
-                keywords=keywords
-            )
+            positions.append((exp_entry, related_accomplishments, related_stories))
 
-            experience_item = {
-                "title": content.get("job_title", exp_entry.get("title", "")),
-                "company": content.get("company", ""),
-                "location": content.get("location", ""),
-                "start_date": self._format_date(exp_entry.get("date_range")),
-                "end_date": self._format_date(exp_entry.get("date_range"), is_end=True),
-                "bullets": bullets
-            }
+        return positions
+
+    def _build_experience_item(self, exp_entry: Dict, bullets: List[str]) -> Dict:
+        """Build one experience section entry"""
+        content = exp_entry['content']
 
-            experiences.append(experience_item)
+        return {
+            "title": content.get("job_title", exp_entry.get("title", "")),
+            "company": content.get("company", ""),
+            "location": content.get("location", ""),
+            "start_date": self._format_date(exp_entry.get("date_range")),
+            "end_date": self._format_date(exp_entry.get("date_range"), is_end=True),
+            "bullets": bullets
+        }
 
-        # Sort by date (most recent first)
-        experiences.sort(
+    def _sort_experience(self, experiences: List[Dict]) -> List[Dict]:
+        """Sort by date (most recent first)"""
+        return sorted(
+            experiences,
             key=lambda x: x.get("start_date", ""),
             reverse=True
         )
 
-        return experiences
+    async def _complete(
+        self,
+        prompt: str,
+        max_tokens: int,
+        on_delta: Optional[Callable[[str], None]] = None
+    ) -> str:
+        """Complete a prompt, streaming tokens to on_delta when given"""
+        if on_delta is None:
+            return await self.llm.complete(prompt, max_tokens=max_tokens)
+        return await self.llm.stream(prompt, max_tokens=max_tokens, on_text=on_delta)
 
     async def _generate_bullets(
         self,
         experience: Dict,
         accomplishments: List[Dict],
         stories: List[Dict],
-        keywords: List[str]
+        keywords: List[str],
+        on_delta: Optional[Callable[[str], None]] = None
     ) -> List[str]:
         """Generate ATS-optimized bullet points for a position"""
 
@@ -550,13 +662,7 @@ Examples of GOOD bullets WITHOUT specific evidence:
 
 Return ONLY the bullet points (starting with •), no explanations or additional text."""
 
-        message = self.claude.messages.create(
-            model="claude-3-5-sonnet-20241022",
-            max_tokens=800,
-            messages=[{"role": "user", "content": prompt}]
-        )
-
-        bullets_text = message.content[0].text.strip()
+        bullets_text = (await self._complete(prompt, max_tokens=800, on_delta=on_delta)).strip()
         bullets = [line.strip() for line in bullets_text.split('\n') if line.strip().startswith('•')]
 
         return bullets
@@ -564,7 +670,8 @@ Return ONLY the bullet points (starting with •), no explanations or additional
     async def _generate_skills(
         self,
         knowledge: Dict,
-        keywords: List[str]
+        keywords: List[str],
+        on_delta: Optional[Callable[[str], None]] = None
     ) -> Dict[str, List[str]]:
         """Generate categorized skills section"""
 
@@ -595,15 +702,11 @@ Category Name: skill1, skill2, skill3
 
 Keep it concise - max 8-10 skills per category."""
 
-        message = self.claude.messages.create(
-            model="claude-3-5-sonnet-20241022",
-            max_tokens=500,
-            messages=[{"role": "user", "content": prompt}]
-        )
+        response_text = await self._complete(prompt, max_tokens=500, on_delta=on_delta)
 
         # Parse categorized skills
         categorized = {}
-        lines = message.content[0].text.strip().split('\n')
+        lines = response_text.strip().split('\n')
         for line in lines:
             if ':' in line:
                 category, skills = line.split(':', 1)
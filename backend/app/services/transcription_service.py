@@ -1,15 +1,32 @@
 """Transcription Service - Convert audio to text using Gemini"""
 
 import google.generativeai as genai
+import asyncio
 import os
-import subprocess
+from typing import Optional
 from dotenv import load_dotenv
+from ..utils.async_retry import retry_async, poll_until, deadline_after, time_left, to_thread_detached
 
 load_dotenv()
 
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 genai.configure(api_key=GEMINI_API_KEY)
 
+# Optional budget for one transcription (conversion, processing and
+# generation). Unset means no limit: long recordings take a while.
+TRANSCRIPTION_TIMEOUT_SECONDS = (
+    float(os.getenv("TRANSCRIPTION_TIMEOUT_SECONDS"))
+    if os.getenv("TRANSCRIPTION_TIMEOUT_SECONDS") else None
+)
+
+def _delete_gemini_file(uploaded) -> None:
+    """Delete an uploaded file nobody is waiting for any more (request cancelled mid-upload)"""
+    try:
+        genai.delete_file(uploaded.name)
+    except Exception as e:
+        print(f"Could not delete Gemini file {uploaded.name}: {str(e)}")
+
+
 class TranscriptionService:
     def __init__(self):
         # Use gemini-2.0-flash-exp for audio transcription (same model as OCR service)
@@ -19,6 +36,11 @@ class TranscriptionService:
         """
         Transcribe audio file to text using Gemini
 
+        Conversion, processing and generation share one optional deadline
+        (TRANSCRIPTION_TIMEOUT_SECONDS); all waiting happens off the event loop.
+        The upload itself is not bounded or retried, so a slow upload can't
+        leave an orphaned file behind or be sent twice.
+
         Args:
             audio_file_path: Path to the audio file
 
@@ -26,38 +48,39 @@ class TranscriptionService:
             Transcribed text
         """
         wav_path = None
+        audio_file = None
+        deadline = deadline_after(TRANSCRIPTION_TIMEOUT_SECONDS)
         try:
             # Convert WebM to WAV (Gemini prefers WAV format)
             wav_path = audio_file_path.replace('.webm', '.wav')
             print(f"Converting {audio_file_path} to WAV format...")
 
-            # Use ffmpeg to convert (should already be available on macOS)
-            result = subprocess.run(
-                ['ffmpeg', '-i', audio_file_path, '-ar', '16000', '-ac', '1', wav_path, '-y'],
-                capture_output=True,
-                text=True
-            )
-
-            if result.returncode != 0:
-                print(f"FFmpeg conversion failed: {result.stderr}")
-                # Fall back to original file
-                upload_path = audio_file_path
-            else:
+            if await self._convert_to_wav(audio_file_path, wav_path, deadline):
                 print(f"Successfully converted to WAV: {wav_path}")
                 upload_path = wav_path
+            else:
+                # Fall back to original file
+                upload_path = audio_file_path
 
             # Upload audio file to Gemini Files API
             print(f"Uploading audio file to Gemini: {upload_path}")
-            audio_file = genai.upload_file(path=upload_path)
+            audio_file = await to_thread_detached(
+                genai.upload_file, path=upload_path,
+                on_abandoned=_delete_gemini_file
+            )
 
             print(f"File uploaded: {audio_file.name}, state: {audio_file.state.name}")
 
             # Wait for file to be processed
-            import time
-            while audio_file.state.name == "PROCESSING":
-                print("Waiting for file processing...")
-                time.sleep(1)
-                audio_file = genai.get_file(audio_file.name)
+            if audio_file.state.name == "PROCESSING":
+                name = audio_file.name
+                audio_file = await poll_until(
+                    lambda: asyncio.to_thread(genai.get_file, name),
+                    lambda f: f.state.name != "PROCESSING",
+                    interval=1.0,
+                    deadline=deadline,
+                    label="audio file processing"
+                )
 
             if audio_file.state.name == "FAILED":
                 raise Exception("Audio file processing failed")
@@ -70,10 +93,14 @@ class TranscriptionService:
             """
 
             print("Generating transcription...")
-            response = self.model.generate_content([audio_file, prompt])
+            uploaded = audio_file
+            response = await retry_async(
+                lambda: asyncio.to_thread(self.model.generate_content, [uploaded, prompt]),
+                attempts=2,
+                deadline=deadline,
+                label="Transcription"
+            )
 
-            # Clean up uploaded file from Gemini
-            genai.delete_file(audio_file.name)
             print("Transcription complete")
 
             return response.text.strip()
@@ -83,9 +110,42 @@ class TranscriptionService:
             raise Exception(f"Gemini transcription failed: {str(e)}")
 
         finally:
+            # Clean up uploaded file from Gemini
+            if audio_file is not None:
+                try:
+                    await asyncio.to_thread(genai.delete_file, audio_file.name)
+                except Exception as e:
+                    print(f"Could not delete Gemini file {audio_file.name}: {str(e)}")
+
             # Clean up WAV file if it was created
             if wav_path and os.path.exists(wav_path):
                 os.remove(wav_path)
 
+    async def _convert_to_wav(self, source_path: str, wav_path: str, deadline: Optional[float]) -> bool:
+        """Convert audio to 16kHz mono WAV with ffmpeg (without blocking); False if conversion failed"""
+        try:
+            process = await asyncio.create_subprocess_exec(
+                'ffmpeg', '-i', source_path, '-ar', '16000', '-ac', '1', wav_path, '-y',
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.PIPE
+            )
+        except FileNotFoundError:
+            print("FFmpeg not installed, uploading original audio")
+            return False
+
+        try:
+            _, stderr = await asyncio.wait_for(process.communicate(), timeout=time_left(deadline))
+        except BaseException:
+            # Timed out or cancelled: don't leave ffmpeg running
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+            raise
+
+        if process.returncode != 0:
+            print(f"FFmpeg conversion failed: {stderr.decode(errors='replace')}")
+            return False
+        return True
+
 # Singleton
 transcription_service = TranscriptionService()
@@ -0,0 +1,155 @@
+"""Async retry and polling utilities"""
+
+import asyncio
+import random
+import time
+from typing import Any, Awaitable, Callable, Optional, Tuple, Type
+
+
+def deadline_after(seconds: Optional[float]) -> Optional[float]:
+    """Absolute deadline (time.monotonic based) `seconds` from now; None means no deadline"""
+    return None if seconds is None else time.monotonic() + seconds
+
+
+def time_left(deadline: Optional[float]) -> Optional[float]:
+    """Seconds until a deadline (None if there is no deadline, never negative)"""
+    return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+
+def backoff_delay(attempt: int, base_delay: float, max_delay: float) -> float:
+    """Full-jitter exponential backoff: uniform in [0, min(max_delay, base_delay * 2^attempt)]"""
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+
+async def to_thread_detached(
+    fn: Callable[..., Any],
+    *args,
+    on_abandoned: Optional[Callable[[Any], None]] = None,
+    **kwargs
+) -> Any:
+    """
+    asyncio.to_thread for calls with side effects (e.g. uploads)
+
+    A thread can't be stopped, so when the awaiting caller is cancelled or
+    times out the call still runs to completion in the background. Instead
+    of leaving its result behind, on_abandoned(result) is then run (in a
+    worker thread) so the caller can undo it, e.g. delete the uploaded file.
+    """
+    loop = asyncio.get_running_loop()
+    future = asyncio.ensure_future(asyncio.to_thread(fn, *args, **kwargs))
+
+    def undo(done: asyncio.Future) -> None:
+        if not done.cancelled() and done.exception() is None:
+            loop.run_in_executor(None, on_abandoned, done.result())
+
+    try:
+        return await asyncio.shield(future)
+    except asyncio.CancelledError:
+        if on_abandoned is not None:
+            future.add_done_callback(undo)
+        raise
+
+
+async def _run_before_deadline(fn: Callable[[], Awaitable[Any]], deadline: Optional[float], label: str) -> Any:
+    remaining = time_left(deadline)
+    if remaining is None:
+        return await fn()
+    if remaining <= 0:
+        raise asyncio.TimeoutError(f"Deadline exceeded for {label}")
+    return await asyncio.wait_for(fn(), timeout=remaining)
+
+
+async def retry_async(
+    fn: Callable[[], Awaitable[Any]],
+    attempts: int = 3,
+    base_delay: float = 1.0,
+    max_delay: float = 30.0,
+    retry_on: Tuple[Type[BaseException], ...] = (Exception,),
+    deadline: Optional[float] = None,
+    label: str = "operation"
+) -> Any:
+    """
+    Await fn() until it succeeds, sleeping with jittered exponential backoff
+
+    Waiting uses asyncio.sleep, so other requests keep running. Each
+    attempt is bounded by the remaining deadline, and no retry is started
+    if its backoff would end past the deadline. Cancellation is never
+    retried or swallowed.
+
+    Args:
+        fn: Zero-argument coroutine function (called once per attempt)
+        attempts: Total attempts, including the first
+        base_delay: Backoff scale in seconds
+        max_delay: Upper bound for a single backoff
+        retry_on: Exception types worth retrying; anything else is raised at once
+        deadline: Absolute time.monotonic() deadline (see deadline_after)
+        label: Name used in log lines
+
+    Returns:
+        fn()'s result
+
+    Raises:
+        The last error once attempts (or the deadline) run out
+    """
+    for attempt in range(attempts):
+        try:
+            return await _run_before_deadline(fn, deadline, label)
+        except asyncio.CancelledError:
+            raise
+        except retry_on as e:
+            if attempt == attempts - 1:
+                raise
+
+            error = str(e) or type(e).__name__
+            delay = backoff_delay(attempt, base_delay, max_delay)
+            remaining = time_left(deadline)
+            if remaining is not None and delay >= remaining:
+                print(f"{label} failed (attempt {attempt + 1}/{attempts}), no time left to retry: {error}")
+                raise
+
+            print(f"{label} failed (attempt {attempt + 1}/{attempts}), retrying in {delay:.1f}s: {error}")
+            await asyncio.sleep(delay)
+
+
+async def poll_until(
+    fetch: Callable[[], Awaitable[Any]],
+    done: Callable[[Any], bool],
+    interval: float = 1.0,
+    max_interval: float = 5.0,
+    deadline: Optional[float] = None,
+    label: str = "operation"
+) -> Any:
+    """
+    Call fetch() until done(result) is true, without blocking the event loop
+
+    The interval grows by 1.5x per poll (with +-20% jitter) up to
+    max_interval, so many concurrent pollers don't call the API in lockstep.
+
+    Args:
+        fetch: Zero-argument coroutine function returning the current state
+        done: Predicate on fetch()'s result
+        interval: First wait in seconds
+        max_interval: Longest wait between polls
+        deadline: Absolute time.monotonic() deadline (see deadline_after)
+        label: Name used in the timeout message
+
+    Returns:
+        The first result for which done() is true
+
+    Raises:
+        asyncio.TimeoutError: The deadline passed first
+    """
+    result = await _run_before_deadline(fetch, deadline, label)
+    while not done(result):
+        delay = min(max_interval, interval) * random.uniform(0.8, 1.2)
+        remaining = time_left(deadline)
+        if remaining is not None:
+            if remaining <= 0:
+                raise asyncio.TimeoutError(f"Timed out waiting for {label}")
+            delay = min(delay, remaining)
+
+        await asyncio.sleep(delay)
+        interval *= 1.5
+        result = await _run_before_deadline(fetch, deadline, label)
+
+    return result
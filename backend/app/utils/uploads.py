@@ -0,0 +1,66 @@
+"""Upload utility functions"""
+
+import os
+from typing import Optional
+from fastapi import UploadFile
+
+# Bytes read from the request per iteration while spooling to disk
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE_KB", "256")) * 1024
+
+
+class UploadTooLarge(Exception):
+    """Raised when an upload exceeds its size limit"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        super().__init__(f"File too large. Maximum size: {max_bytes / 1024 / 1024}MB")
+
+
+async def spool_upload(
+    file: UploadFile,
+    dest_path: str,
+    max_bytes: int,
+    chunk_size: Optional[int] = None
+) -> int:
+    """
+    Check an upload's size and copy it to disk chunk by chunk
+
+    By the time a route runs, Starlette has already received the whole
+    multipart body into a spooled temp file (in memory up to 1MB, then on
+    disk) and set file.size. The limit is checked against that size before
+    anything is copied, and the copy holds one chunk in memory at a time
+    instead of reading the whole file with file.read().
+
+    Args:
+        file: The incoming upload
+        dest_path: Where to write it
+        max_bytes: Size limit
+        chunk_size: Bytes per read (default UPLOAD_CHUNK_SIZE)
+
+    Returns:
+        Number of bytes written
+
+    Raises:
+        UploadTooLarge: The upload exceeded max_bytes (nothing is written)
+    """
+    chunk_size = chunk_size or UPLOAD_CHUNK_SIZE
+
+    if file.size is not None and file.size > max_bytes:
+        raise UploadTooLarge(max_bytes)
+
+    written = 0
+    try:
+        with open(dest_path, "wb") as f:
+            while True:
+                chunk = await file.read(chunk_size)
+                if not chunk:
+                    break
+                written += len(chunk)
+                f.write(chunk)
+    except BaseException:
+        # Don't leave a partial file behind
+        if os.path.exists(dest_path):
+            os.remove(dest_path)
+        raise
+
+    return written
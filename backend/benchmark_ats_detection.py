@@ -0,0 +1,130 @@
+"""
+ATS Detection Benchmark
+Compares the precompiled signature matcher against the original per-pattern scan
+
+Usage: python benchmark_ats_detection.py [page_kb]
+"""
+import random
+import re
+import sys
+import os
+import time
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.services.ats_detection_service import ats_detection_service
+
+VOCAB = (
+    "the of and to in a is for with on as by our team will you we are experience "
+    "software engineer data platform design build scalable systems customers product "
+    "working across requirements responsibilities qualifications benefits remote hybrid"
+).split()
+
+BLOCK = (
+    '<div class="css-1q2dra3" data-automation-id="jobPostingDescription"><p>{}</p>'
+    '<ul><li>{}</li><li>{}</li></ul></div>\n'
+    '<script type="text/javascript">window.__state={{"key":"{}","v":{}}};</script>\n'
+)
+
+URLS = [
+    "https://acme.wd5.myworkdayjobs.com/en-US/External/job/Remote/Senior-Engineer_R123",
+    "https://boards.greenhouse.io/acme/jobs/4567890",
+    "https://jobs.lever.co/acme/0f1e2d3c-aaaa-bbbb-cccc-1234567890ab",
+    "https://www.linkedin.com/jobs/view/3812345678/",
+    "https://careers.acme.com/jobs/senior-software-engineer-12345",
+]
+
+
+def legacy_detect_from_url(job_url):
+    """The original implementation: one re.search per pattern per system"""
+    url_lower = job_url.lower()
+    for system_name, system_info in ats_detection_service.ats_systems.items():
+        for pattern in system_info["url_patterns"]:
+            if re.search(pattern, url_lower):
+                return {"system": system_name, "confidence": system_info["confidence_boost"]}
+    return None
+
+
+def legacy_detect_from_html(html_content):
+    """The original implementation: one substring scan per signature per system"""
+    html_lower = html_content.lower()
+    matches = {}
+    for system_name, system_info in ats_detection_service.ats_systems.items():
+        match_count = 0
+        for signature in system_info["html_signatures"]:
+            if signature.lower() in html_lower:
+                match_count += 1
+        if match_count > 0:
+            signature_boost = (match_count / len(system_info["html_signatures"])) * 0.3
+            matches[system_name] = 0.5 + signature_boost
+    if matches:
+        best_match = max(matches.items(), key=lambda x: x[1])
+        return {"system": best_match[0], "confidence": best_match[1]}
+    return None
+
+
+def build_page(size_kb, rng, signatures=()):
+    """Job-posting-like HTML of roughly size_kb, with signatures sprinkled in"""
+    def words(n):
+        return " ".join(rng.choice(VOCAB) for _ in range(n))
+
+    parts = []
+    size = 0
+    while size < size_kb * 1024:
+        block = BLOCK.format(words(60), words(15), words(15), words(3), rng.randint(0, 10 ** 6))
+        parts.append(block)
+        size += len(block)
+
+    for signature in signatures:
+        parts.insert(rng.randrange(len(parts)), f'<div class="{signature}"></div>')
+    return "".join(parts)
+
+
+def timed(fn, arg, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(arg)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def check_equivalence(rng):
+    """Randomized pages and URLs must give identical results to the legacy scan"""
+    all_signatures = [
+        sig for info in ats_detection_service.ats_systems.values() for sig in info["html_signatures"]
+    ]
+    for _ in range(300):
+        page = build_page(2, rng, rng.sample(all_signatures, rng.randint(0, 4)))
+        assert ats_detection_service._detect_from_html(page) == legacy_detect_from_html(page)
+
+    for url in URLS:
+        assert ats_detection_service._detect_from_url(url) == legacy_detect_from_url(url)
+    print("Equivalence check passed (300 pages, %d URLs)" % len(URLS))
+
+
+def main():
+    size_kb = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    rng = random.Random(42)
+
+    check_equivalence(rng)
+
+    pages = {
+        "no ATS markup": build_page(size_kb, rng),
+        "workday markup": build_page(size_kb, rng, ["gwt-Workday", "wd-template"]),
+    }
+
+    print(f"\nHTML detection, {size_kb}KB page (ms per call)")
+    for label, page in pages.items():
+        legacy = timed(legacy_detect_from_html, page, 30)
+        current = timed(ats_detection_service._detect_from_html, page, 30)
+        print(f"  {label:16s} legacy {legacy:7.3f}  matcher {current:7.3f}  speedup {legacy / current:4.2f}x")
+
+    print("\nURL detection (us per call)")
+    for url in URLS:
+        legacy = timed(legacy_detect_from_url, url, 20000) * 1000
+        current = timed(ats_detection_service._detect_from_url, url, 20000) * 1000
+        print(f"  {url[:50]:50s} legacy {legacy:6.2f}  matcher {current:6.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -16,7 +16,7 @@ from slowapi.errors import RateLimitExceeded
 import os
 
 # Import routers
-from app.routers import auth, upload, imports, conversation, references, resumes, jobs, knowledge
+from app.routers import auth, upload, imports, conversation, references, resumes, jobs, knowledge, tasks
 
 # Import logging configuration
 from app.logging_config import setup_logging
@@ -124,6 +124,25 @@ app.include_router(references.router)
 app.include_router(resumes.router)
 app.include_router(jobs.router)
 app.include_router(knowledge.router)
+app.include_router(tasks.router)
+
+@app.on_event("startup")
+async def startup():
+    """Start background job workers (requeues jobs persisted before a restart)"""
+    from app.services.job_queue import job_queue
+    await job_queue.start()
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Stop background workers and release pooled outbound connections"""
+    from app.services.llm_client import llm_client
+    from app.services.pdf_exporter import pdf_exporter
+    from app.services.job_queue import job_queue
+    from app.services.http_fetcher import http_fetcher
+    await job_queue.stop()
+    await llm_client.aclose()
+    await http_fetcher.aclose()
+    pdf_exporter.shutdown()
 
 @app.get("/")
 async def root():
@@ -153,6 +172,16 @@ async def health_check():
     status["checks"]["claude_api"] = "configured" if os.getenv("CLAUDE_API_KEY") else "missing"
     status["checks"]["gemini_api"] = "configured" if os.getenv("GEMINI_API_KEY") else "missing"
 
+    # Cache metrics
+    from app.services.llm_cache import llm_cache
+    from app.services.pdf_exporter import pdf_exporter
+    from app.services.http_fetcher import http_fetcher
+    status["caches"] = {
+        "llm": llm_cache.stats(),
+        "pdf": pdf_exporter.cache.stats(),
+        "http": http_fetcher.cache.stats()
+    }
+
     return status
 
 if __name__ == "__main__":
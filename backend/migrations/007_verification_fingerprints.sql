@@ -0,0 +1,13 @@
+-- Migration 007: Incremental fact verification
+-- Per-claim fingerprints on flags, per-section fingerprints on resume versions
+
+-- Which claim (summary, bullet, skill, degree, certification) a flag belongs to
+ALTER TABLE truth_check_flags
+ADD COLUMN IF NOT EXISTS claim_fingerprint TEXT;
+
+CREATE INDEX IF NOT EXISTS idx_truth_flags_claim
+ON truth_check_flags(resume_version_id, claim_fingerprint);
+
+-- Section -> {claims: [fingerprint], evidence: fingerprint} from the last run
+ALTER TABLE resume_versions
+ADD COLUMN IF NOT EXISTS verification_fingerprints JSONB;
@@ -48,14 +48,26 @@ export default function ResumesPage() {
 
   const fetchResumes = async (userId: string) => {
     try {
-      const res = await fetch(`${API_URL}/resumes/list?user_id=${userId}`)
+      // The list endpoint is cursor-paginated; follow next_cursor until done
+      const allResumes: Resume[] = []
+      let cursor: string | null = null
 
-      if (!res.ok) {
-        throw new Error('Failed to fetch resumes')
-      }
+      do {
+        const params = new URLSearchParams({ user_id: userId, limit: '100' })
+        if (cursor) params.set('cursor', cursor)
 
-      const data = await res.json()
-      setResumes(data.resumes || [])
+        const res = await fetch(`${API_URL}/resumes/list?${params}`)
+
+        if (!res.ok) {
+          throw new Error('Failed to fetch resumes')
+        }
+
+        const data = await res.json()
+        allResumes.push(...(data.resumes || []))
+        cursor = data.next_cursor || null
+      } while (cursor)
+
+      setResumes(allResumes)
     } catch (error) {
       console.error('Failed to fetch resumes:', error)
       setResumes([]) // Ensure resumes is always an array